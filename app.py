@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+import sys
 import tkinter as tk
 from tkinter import filedialog, messagebox
 
@@ -57,6 +59,8 @@ def select_and_run_multi():
 
 
 def main():
+    # Mapping, step counts and sidecar paths are reported through logging; show them on stdout
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     root = tk.Tk()
     root.title("Dealership Sales Filter - Milestone 1")
     root.geometry("480x220")
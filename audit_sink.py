@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Callable, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+from openpyxl import Workbook
+
+from write_results import OUTPUT_FORMATS, _write_sheet, _write_table, write_output
+
+
+log = logging.getLogger(__name__)
+
+# Jobs queued before the writer blocks the pipeline; bounds memory held by pending frames
+AUDIT_QUEUE_MAX = 64
+
+FrameSource = Union[pd.DataFrame, Callable[[], pd.DataFrame]]
+
+
+class AuditSink:
+    """Single destination for the dropped-row sidecars of one run_pipeline call.
+
+    Stages push frames (or zero-argument callables that build them) and return immediately; a
+    background thread writes them in arrival order. All files share one timestamp:
+    <base>_<kind>_<ts>.csv for full lists, <base>_<kind>_<ts><ext> for review copies in the
+    output format, and one <base>_audits_<ts> workbook (or directory) with a sheet/file per step.
+    Pushed frames must not be modified afterwards. Status lines are logged by close(), in order
+    (INFO for written files, WARNING for failures).
+    """
+
+    def __init__(self, input_path: str, output_format: str = "xlsx", background: bool = True):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format} (expected one of {', '.join(OUTPUT_FORMATS)})")
+        self.input_path = input_path
+        self.output_format = output_format
+        self.ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._base = os.path.join(
+            os.path.dirname(os.path.abspath(input_path)),
+            os.path.splitext(os.path.basename(input_path))[0],
+        )
+        self._messages: List[Tuple[int, str]] = []
+        self._csv_started: Set[str] = set()
+        self._audit_wb: Optional[Workbook] = None
+        self._audit_count = 0
+        self._closed = False
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.Queue(maxsize=AUDIT_QUEUE_MAX)
+            self._thread = threading.Thread(target=self._drain, name="audit-sink", daemon=True)
+            self._thread.start()
+
+    def __enter__(self) -> "AuditSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def path(self, kind: str, ext: str = ".csv") -> str:
+        return f"{self._base}_{kind}_{self.ts}{ext}"
+
+    @property
+    def audits_path(self) -> str:
+        return self.path("audits", ".xlsx" if self.output_format == "xlsx" else "")
+
+    def write_csv(self, kind: str, frame: FrameSource, label: str) -> None:
+        """Write (or append, on repeated calls with the same kind) a full dropped-row list as CSV."""
+        self._submit(self._do_csv, kind, frame, label)
+
+    def write_review(self, kind: str, frame: FrameSource, label: str, what: str = "") -> None:
+        """Write a review copy in the run's output format."""
+        self._submit(self._do_review, kind, frame, label, what)
+
+    def add_audit_set(self, name: str, frame: FrameSource) -> None:
+        """Add one step's dropped rows to the audits workbook (empty frames are skipped)."""
+        self._submit(self._do_audit_set, name, frame)
+
+    def close(self) -> None:
+        """Finish pending writes, save the audits workbook and log status lines."""
+        if self._closed:
+            return
+        self._closed = True
+        self._submit(self._do_finish)
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        for level, msg in self._messages:
+            log.log(level, msg)
+
+    def _submit(self, fn: Callable, *args) -> None:
+        if self._queue is None:
+            self._run_job(fn, args)
+        else:
+            self._queue.put((fn, args))
+
+    def _drain(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._run_job(*job)
+
+    def _run_job(self, fn: Callable, args: tuple) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            self._messages.append((logging.WARNING, f"AUDIT SINK: {fn.__name__.lstrip('_')} failed: {e}"))
+
+    @staticmethod
+    def _resolve(frame: FrameSource) -> pd.DataFrame:
+        return frame() if callable(frame) else frame
+
+    def _do_csv(self, kind: str, frame: FrameSource, label: str) -> None:
+        path = self.path(kind)
+        try:
+            df = self._resolve(frame)
+            first = path not in self._csv_started
+            df.to_csv(path, mode="w" if first else "a", header=first, index=False)
+            if first:
+                self._csv_started.add(path)
+                self._messages.append((logging.INFO, f"{label}: wrote full list to {path}"))
+        except Exception as e:
+            self._messages.append((logging.WARNING, f"{label}: failed to write CSV: {e}"))
+
+    def _do_review(self, kind: str, frame: FrameSource, label: str, what: str) -> None:
+        path = self.path(kind, OUTPUT_FORMATS[self.output_format])
+        try:
+            write_output(self._resolve(frame), self.input_path, output_format=self.output_format, output_path=path)
+            self._messages.append((logging.INFO, f"{label}: wrote {what or self.output_format} to {path}"))
+        except Exception as e:
+            self._messages.append((logging.WARNING, f"{label}: failed to write {self.output_format}: {e}"))
+
+    def _do_audit_set(self, name: str, frame: FrameSource) -> None:
+        try:
+            df = self._resolve(frame)
+            if df is None or df.empty:
+                return
+            if self.output_format == "xlsx":
+                # Sheets are streamed into a write-only workbook as steps finish; saved in _do_finish
+                if self._audit_wb is None:
+                    self._audit_wb = Workbook(write_only=True)
+                _write_sheet(self._audit_wb, df, name[:31] or "Sheet1")
+            else:
+                os.makedirs(self.audits_path, exist_ok=True)
+                _write_table(df, os.path.join(self.audits_path, f"{name}{OUTPUT_FORMATS[self.output_format]}"), self.output_format)
+            self._audit_count += 1
+        except Exception as e:
+            self._messages.append((logging.WARNING, f"AUDITS: failed to write {name}: {e}"))
+
+    def _do_finish(self) -> None:
+        if not self._audit_count:
+            return
+        try:
+            if self._audit_wb is not None:
+                self._audit_wb.save(self.audits_path)
+            self._messages.append((logging.INFO, f"AUDITS: wrote per-step drops to {self.audits_path}"))
+        except Exception as e:
+            self._messages.append((logging.WARNING, f"AUDITS: failed to write per-step drops: {e}"))
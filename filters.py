@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from constants import (
@@ -15,21 +16,47 @@ from constants import (
     EXCLUDE_KEYWORDS,
     CORPORATE_SUFFIXES,
 )
-from schema_detection import normalize_label
+from preprocess import NUMERIC_FIELDS, address_key_series, parse_numeric
+from schema_detection import normalize_label, parse_dates
 
 
 VIN_RE = re.compile(VIN_REGEX, flags=re.IGNORECASE)
 
 
 def _safe_str(s: pd.Series) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        # Clean each category once, then expand by code; code -1 (missing) picks the trailing ""
+        cats = _safe_str(pd.Series(s.cat.categories)).to_numpy(dtype=object)
+        return pd.Series(np.append(cats, "")[s.cat.codes.to_numpy()], index=s.index, dtype=object)
+    if isinstance(s.dtype, pd.StringDtype):
+        return s.fillna("").str.strip()
     return s.fillna("").astype(str).str.strip()
 
 
+def _str_mask(s: pd.Series, predicate: Callable[[pd.Series], pd.Series]) -> pd.Series:
+    """predicate over _safe_str(s) as a boolean mask; on a categorical it runs once per
+    category and rows are looked up by code, so no per-row strings are built.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        cats = _safe_str(pd.Series(list(s.cat.categories) + [""], dtype=object))
+        hit = predicate(cats).to_numpy(dtype=bool)
+        return pd.Series(hit[s.cat.codes.to_numpy()], index=s.index)
+    return predicate(_safe_str(s))
+
+
 def _effective_date_series(df: pd.DataFrame) -> pd.Series:
-    d = pd.to_datetime(df.get("DeliveryDate"), errors="coerce")
+    """Most recent known date per row: the __EffectiveDate column build_canonical_frame parsed,
+    else DeliveryDate backed by SoldDate/SaleDate/Last_Date, parsed here (e.g. re-read outputs).
+    """
+    if "__EffectiveDate" in df.columns:
+        return df["__EffectiveDate"]
+    if "DeliveryDate" in df.columns:
+        d = parse_dates(df["DeliveryDate"])
+    else:
+        d = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
     for col in ["SoldDate", "SaleDate", "Last_Date"]:
         if col in df.columns:
-            d = d.combine_first(pd.to_datetime(df[col], errors="coerce"))
+            d = d.combine_first(parse_dates(df[col]))
     return d
 
 
@@ -45,45 +72,49 @@ def find_vin_explosion_column(df: pd.DataFrame) -> Optional[str]:
     return sorted(candidates, key=lambda c: len(normed[c]))[0]
 
 
+# One run of characters between VIN-list delimiters (or whitespace)
+_VIN_LIST_TOKEN = "[^\\s" + "".join(re.escape(d) for d in VIN_EXPLOSION_DELIMITERS) + "]+"
+
+
 def explode_vins_on_raw(df: pd.DataFrame, vin_col: Optional[str], vin_list_col: Optional[str]) -> pd.DataFrame:
     """
     If vin_list_col present, explode rows by the list of VIN-like tokens.
     Union with a single VIN in vin_col when present. Drop rows with no valid VINs.
+    Each row is repeated once per distinct VIN (sorted), with vin_col set to it; __ROWNUM and
+    every other column are copied by index repetition. Returns a fresh RangeIndex.
     """
     if vin_list_col is None:
         return df
 
-    records: List[pd.Series] = []
-    for idx, row in df.iterrows():
-        tokens: List[str] = []
-        cell = row[vin_list_col]
-        if pd.notna(cell):
-            text = str(cell)
-            # Split by known delimiters
-            for d in VIN_EXPLOSION_DELIMITERS:
-                text = text.replace(d, " ")
-            parts = [p.strip().upper() for p in text.split() if p.strip()]
-            # Keep only VIN-like
-            tokens.extend([p for p in parts if VIN_RE.fullmatch(p)])
-        # Union with single VIN if present
-        if vin_col is not None and pd.notna(row[vin_col]):
-            v = str(row[vin_col]).strip().upper()
-            if VIN_RE.fullmatch(v):
-                tokens.append(v)
-        tokens = sorted(set(tokens))
-        if not tokens:
-            # No usable VINs; drop row silently
-            continue
-        for v in tokens:
-            new_row = row.copy()
-            if vin_col is not None:
-                new_row[vin_col] = v
-            records.append(new_row)
-
-    if not records:
+    # (row position, upper-cased token) pairs from the list column and the single-VIN column
+    rows: List[np.ndarray] = []
+    vins: List[np.ndarray] = []
+    cells = df[vin_list_col]
+    pos = np.flatnonzero(cells.notna().to_numpy())
+    listed = pd.Series(cells.iloc[pos].astype(str).to_numpy(dtype=object), index=pos)
+    if len(listed):
+        tokens = listed.str.extractall(f"({_VIN_LIST_TOKEN})")[0]
+        rows.append(tokens.index.get_level_values(0).to_numpy())
+        vins.append(tokens.str.upper().to_numpy(dtype=object))
+    if vin_col is not None:
+        single = df[vin_col]
+        pos = np.flatnonzero(single.notna().to_numpy())
+        rows.append(pos)
+        vins.append(pd.Series(single.iloc[pos].astype(str).to_numpy(dtype=object)).str.strip().str.upper().to_numpy(dtype=object))
+    pairs = pd.DataFrame({
+        "row": np.concatenate(rows) if rows else np.array([], dtype=np.int64),
+        "vin": np.concatenate(vins) if vins else np.array([], dtype=object),
+    })
+    # Keep only VIN-like tokens; rows without any are dropped
+    pairs = pairs.loc[pairs["vin"].str.fullmatch(VIN_RE).to_numpy(dtype=bool)]
+    if pairs.empty:
         # All dropped → return empty DataFrame with same columns
         return df.iloc[0:0].copy()
-    return pd.DataFrame.from_records(records, columns=df.columns)
+    pairs = pairs.drop_duplicates().sort_values(["row", "vin"])
+    out = df.iloc[pairs["row"].to_numpy()].reset_index(drop=True)
+    if vin_col is not None:
+        out[vin_col] = pd.Series(pairs["vin"].to_numpy(), dtype=object).astype(df[vin_col].dtype)
+    return out
 
 
 def _normalize_address_key(a1: str, city: str, state: str, z: str) -> str:
@@ -109,226 +140,263 @@ def _normalize_address_key(a1: str, city: str, state: str, z: str) -> str:
     return f"{a1n}|{cityn}|{staten}|{zip5}"
 
 
+def _address_keys(df: pd.DataFrame) -> pd.Series:
+    """Normalized address key per row: the __AddressKey column build_canonical_frame caches,
+    else built here with address_key_series; all blank without address columns.
+    """
+    if "__AddressKey" in df.columns:
+        return df["__AddressKey"]
+    if all(c in df.columns for c in ["Address1", "City", "State", "Zip"]):
+        return address_key_series(df)
+    return pd.Series("", index=df.index, dtype=object)
+
+
+def _group_winners(codes: np.ndarray, keys: List[np.ndarray]) -> np.ndarray:
+    """Mask of the one row per group (codes >= 0) that is largest by keys, compared lexicographically.
+    Each key narrows the candidates to those equal to their group's maximum, so the cost is linear;
+    the last key must be unique per row (e.g. row order) to leave a single winner.
+    """
+    cand = codes >= 0
+    n_groups = int(codes.max(initial=-1)) + 1
+    for key in keys:
+        idx = np.flatnonzero(cand)
+        floor = -np.inf if key.dtype.kind == "f" else np.iinfo(key.dtype).min
+        gmax = np.full(n_groups, floor, dtype=key.dtype)
+        np.maximum.at(gmax, codes[idx], key[idx])
+        cand[idx] = key[idx] == gmax[codes[idx]]
+    return cand
+
+
+def _first_per_code(rows: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """rows (one per code) ordered by their code."""
+    pos = np.full(n_groups, -1, dtype=np.int64)
+    pos[codes[rows]] = rows
+    return pos[pos >= 0]
+
+
 def delete_duplicates(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
-    """Two-pass to match client: first by VIN, then by Address; keep most recent DeliveryDate per group."""
+    """Two-pass to match client: first by VIN, then by Address; keep most recent DeliveryDate per group.
+
+    Ties go to a row with a Deal_Number, then the higher numeric deal number, then the later row;
+    a missing date ranks above every date. Rows dropped by the VIN pass that are newer than
+    everything left at their address remove that whole address group in the address pass.
+    Hash-based: keys are factorized to integer codes and winners picked with grouped maxima
+    (see _group_winners), so no pass sorts or copies the frame. Returns the same rows, in the
+    same order, as the sort-based implementation it replaced (kept in the tests as a reference).
+    """
     initial = len(df_can)
     if initial == 0:
         return df_can, 0
 
-    work = df_can.copy()
-    # Helper columns
-    work["___DATE"] = _effective_date_series(work)
-    work["___ORDER"] = range(len(work))
-
-    # Build VIN validity and address key
-    vin_valid = pd.Series([False] * len(work))
-    if "VIN" in work.columns:
-        vin_valid = _safe_str(work["VIN"]).str.upper().apply(lambda v: bool(VIN_RE.fullmatch(v)))
-    addr_key = pd.Series([""] * len(work))
-    if all(c in work.columns for c in ["Address1", "City", "State", "Zip"]):
-        addr_key = work.apply(lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1)
-
-    # Track address groups to prune if VIN-pass dropped a newer row than any remaining at that address
-    prune_addr_keys: set[str] = set()
-
-    # Pass 1: VIN-only dedupe (valid VINs). Keep most recent DeliveryDate with deterministic tiebreaks.
-    if vin_valid.any():
-        with_vin = work.loc[vin_valid].copy()
-        without_vin = work.loc[~vin_valid].copy()
-
-        # Helper tie-break columns
-        if "Deal_Number" in with_vin.columns:
-            with_vin["__HAS_DEAL"] = _safe_str(with_vin["Deal_Number"]).ne("")
-            with_vin["__DN_NUM"] = pd.to_numeric(_safe_str(with_vin["Deal_Number"]), errors="coerce")
-        else:
-            with_vin["__HAS_DEAL"] = False
-            with_vin["__DN_NUM"] = pd.Series([pd.NA] * len(with_vin))
-        with_vin["__DN_NUM_FILLED"] = with_vin["__DN_NUM"].astype(float).fillna(float("-inf"))
-
-        with_vin["___VIN_UP"] = _safe_str(with_vin["VIN"]).str.upper()
-        # Sort within groups then take the last row per VIN
-        with_vin_sorted = with_vin.sort_values(
-            ["___VIN_UP", "___DATE", "__HAS_DEAL", "__DN_NUM_FILLED", "___ORDER"],
-            ascending=[True, True, True, True, True],
-        )
-        with_vin_dedup = with_vin_sorted.groupby("___VIN_UP", sort=False).tail(1)
-        # Identify VIN-dropped rows and compute address keys for pruning logic
-        dropped_vin = with_vin.loc[~with_vin.index.isin(with_vin_dedup.index)].copy()
-        if not dropped_vin.empty and all(c in with_vin.columns for c in ["Address1", "City", "State", "Zip"]):
-            dropped_vin["___ADDR_KEY_FOR_DROP"] = dropped_vin.apply(
-                lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1
-            )
-        # Remaining after VIN-pass
-        remaining_after_vin = pd.concat([with_vin_dedup, without_vin], ignore_index=False)
-        if not dropped_vin.empty:
-            # Compute address keys and max date among remaining for comparison
-            if all(c in remaining_after_vin.columns for c in ["Address1", "City", "State", "Zip"]):
-                rem_addr_keys = remaining_after_vin.apply(
-                    lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1
-                )
-                rem_dates = remaining_after_vin["___DATE"]
-                max_date_by_addr = pd.Series(rem_dates.values, index=rem_addr_keys).groupby(level=0).max()
-                for _, r in dropped_vin.iterrows():
-                    k = r.get("___ADDR_KEY_FOR_DROP", "")
-                    if not k:
-                        continue
-                    drop_date = r.get("___DATE")
-                    rem_max = max_date_by_addr.get(k, pd.NaT)
-                    try:
-                        if pd.notna(drop_date) and (pd.isna(rem_max) or drop_date > rem_max):
-                            prune_addr_keys.add(k)
-                    except Exception:
-                        # Fallback safe compare via string
-                        if str(drop_date) > str(rem_max):
-                            prune_addr_keys.add(k)
-        # Update work to remaining
-        work = remaining_after_vin
-
-    # Pass 2: Address-only dedupe. Keep most recent DeliveryDate with deterministic tiebreaks.
-    addr_mask = addr_key != ""
-    if addr_mask.any():
-        with_addr = work.loc[addr_mask].copy()
-        # If VIN-pass dropped a newer row at an address, prune that whole address group here
-        if prune_addr_keys:
-            with_addr["___ADDR_KEY"] = with_addr.apply(lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1)
-            with_addr = with_addr.loc[~with_addr["___ADDR_KEY"].isin(prune_addr_keys)].copy()
-            # Recompute mask for without_addr based on pruning
-            without_addr = work.loc[~addr_mask].copy()
-        else:
-            without_addr = work.loc[~addr_mask].copy()
-        without_addr = work.loc[~addr_mask].copy()
-
-        # Helper tie-break columns
-        if "Deal_Number" in with_addr.columns:
-            with_addr["__HAS_DEAL"] = _safe_str(with_addr["Deal_Number"]).ne("")
-            with_addr["__DN_NUM"] = pd.to_numeric(_safe_str(with_addr["Deal_Number"]), errors="coerce")
-        else:
-            with_addr["__HAS_DEAL"] = False
-            with_addr["__DN_NUM"] = pd.Series([pd.NA] * len(with_addr))
-        with_addr["__DN_NUM_FILLED"] = with_addr["__DN_NUM"].astype(float).fillna(float("-inf"))
-
-        if "___ADDR_KEY" not in with_addr.columns:
-            with_addr["___ADDR_KEY"] = with_addr.apply(lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1)
-
-        with_addr_sorted = with_addr.sort_values(
-            ["___ADDR_KEY", "___DATE", "__HAS_DEAL", "__DN_NUM_FILLED", "___ORDER"],
-            ascending=[True, True, True, True, True],
-        )
-        with_addr_dedup = with_addr_sorted.groupby("___ADDR_KEY", sort=False).tail(1)
-        work = pd.concat([with_addr_dedup, without_addr], ignore_index=False)
-
-    # Cleanup helper cols
-    work = work.drop(columns=[c for c in ["___DATE", "___ORDER", "___VIN_UP", "___ADDR_KEY", "__HAS_DEAL", "__DN_NUM", "__DN_NUM_FILLED"] if c in work.columns])
-    removed = initial - len(work)
-    return work, removed
+    # Tie-break keys, most significant first; NaT sorts last (na_position), so it ranks highest
+    date = _effective_date_series(df_can).to_numpy(dtype="datetime64[ns]")
+    has_date = ~np.isnat(date)
+    date_key = np.where(has_date, date.view("i8"), np.iinfo(np.int64).max)
+    if "Deal_Number" in df_can.columns:
+        deal = _safe_str(df_can["Deal_Number"])
+        has_deal = deal.ne("").to_numpy(dtype=np.int8)
+        deal_num = pd.to_numeric(deal, errors="coerce").astype(float).fillna(float("-inf")).to_numpy()
+    else:
+        has_deal = np.zeros(initial, dtype=np.int8)
+        deal_num = np.full(initial, float("-inf"))
+    keys = [date_key, has_deal, deal_num, np.arange(initial, dtype=np.int64)]
+
+    # Pass 1: VIN groups (valid VINs only); codes follow sorted VIN order
+    vin_codes = np.full(initial, -1, dtype=np.int64)
+    if "VIN" in df_can.columns:
+        # Object strings: VIN_RE's lookahead needs Python's regex engine, not Arrow's
+        vin_up = pd.Series(_safe_str(df_can["VIN"]).str.upper().to_numpy(dtype=object))
+        vin_valid = vin_up.str.fullmatch(VIN_RE).to_numpy(dtype=bool)
+        vin_codes[vin_valid], vin_uniques = pd.factorize(vin_up[vin_valid].to_numpy(), sort=True)
+    else:
+        vin_valid, vin_uniques = np.zeros(initial, dtype=bool), []
+    vin_winner = _group_winners(vin_codes, keys)
+    remaining = ~vin_valid | vin_winner
+
+    # Address groups; codes follow sorted key order
+    addr = _address_keys(df_can).to_numpy(dtype=object)
+    has_addr = addr != ""
+    addr_codes = np.full(initial, -1, dtype=np.int64)
+    addr_codes[has_addr], addr_uniques = pd.factorize(addr[has_addr], sort=True)
+    n_addr = len(addr_uniques)
+
+    # Prune addresses where the VIN pass dropped a row newer than every remaining row there
+    rem_max = np.full(n_addr, np.iinfo(np.int64).min, dtype=np.int64)
+    dated = remaining & has_addr & has_date
+    np.maximum.at(rem_max, addr_codes[dated], date_key[dated])
+    dropped = ~remaining & has_addr & has_date
+    newer = date_key[dropped] > rem_max[addr_codes[dropped]]
+    pruned = np.zeros(n_addr, dtype=bool)
+    pruned[addr_codes[dropped][newer]] = True
+
+    # Pass 2: one row per (unpruned) address among the VIN-pass survivors
+    in_addr_pass = remaining & has_addr
+    in_addr_pass[in_addr_pass] = ~pruned[addr_codes[in_addr_pass]]
+    addr_winner = _group_winners(np.where(in_addr_pass, addr_codes, -1), keys)
+
+    # Kept address rows by key, then rows without one: VIN winners by VIN, the rest in input order
+    no_addr = remaining & ~has_addr
+    order = np.concatenate([
+        _first_per_code(np.flatnonzero(addr_winner), addr_codes, n_addr),
+        _first_per_code(np.flatnonzero(no_addr & vin_valid), vin_codes, len(vin_uniques)),
+        np.flatnonzero(no_addr & ~vin_valid),
+    ])
+    out = df_can.iloc[order]
+    return out, initial - len(out)
+
+
+def _blank(df_can: pd.DataFrame) -> pd.Series:
+    return pd.Series([""] * len(df_can), index=df_can.index)
+
+
+def _drop_rows(df_can: pd.DataFrame, keep: np.ndarray) -> Tuple[pd.DataFrame, int]:
+    """Subset df_can by a positional keep mask, returning the kept rows and the removed count."""
+    out = df_can.loc[keep].copy()
+    return out, len(df_can) - len(out)
 
 
-def filter_address_present(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+def keep_address_present(df_can: pd.DataFrame) -> np.ndarray:
     required = ["City", "State", "Zip"]
     have = [c for c in required if c in df_can.columns]
     if len(have) < 3 and "Address1" not in df_can.columns and "Address2" not in df_can.columns:
-        return df_can, 0
-    a1 = _safe_str(df_can["Address1"]) if "Address1" in df_can.columns else pd.Series([""] * len(df_can))
-    a2 = _safe_str(df_can["Address2"]) if "Address2" in df_can.columns else pd.Series([""] * len(df_can))
-    city = _safe_str(df_can["City"]) if "City" in df_can.columns else pd.Series([""] * len(df_can))
-    state = _safe_str(df_can["State"]) if "State" in df_can.columns else pd.Series([""] * len(df_can))
-    zipc = _safe_str(df_can["Zip"]) if "Zip" in df_can.columns else pd.Series([""] * len(df_can))
+        return np.ones(len(df_can), dtype=bool)
+    a1 = _safe_str(df_can["Address1"]) if "Address1" in df_can.columns else _blank(df_can)
+    a2 = _safe_str(df_can["Address2"]) if "Address2" in df_can.columns else _blank(df_can)
+
+    def present(col: str) -> pd.Series:
+        if col not in df_can.columns:
+            return pd.Series(False, index=df_can.index)
+        # City/State/Zip may be categoricals; test each category once
+        return _str_mask(df_can[col], lambda v: v != "")
+
     # PO BOX counts as address
     po_mask = a2.str.contains(r"(?i)\bP\.?O\.?\s*BOX\b|\bPO\s*BOX\b")
     a1_eff = a1.where(a1 != "", a2.where(po_mask, ""))
-    keep = (a1_eff != "") & (city != "") & (state != "") & (zipc != "")
-    out = df_can.loc[keep].copy()
-    return out, len(df_can) - len(out)
+    keep = (a1_eff != "") & present("City") & present("State") & present("Zip")
+    return keep.to_numpy(dtype=bool)
 
 
-def filter_name_present(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+def filter_address_present(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    return _drop_rows(df_can, keep_address_present(df_can))
+
+
+def keep_name_present(df_can: pd.DataFrame) -> np.ndarray:
     if "Last_Name" not in df_can.columns:
-        return df_can, 0
-    last = _safe_str(df_can["Last_Name"]) if "Last_Name" in df_can.columns else pd.Series([""] * len(df_can))
-    keep = last != ""
-    out = df_can.loc[keep].copy()
-    return out, len(df_can) - len(out)
+        return np.ones(len(df_can), dtype=bool)
+    last = _safe_str(df_can["Last_Name"])
+    return (last != "").to_numpy(dtype=bool)
 
 
-def filter_cobuyers(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
-    """Drop rows that appear to contain multiple names (co-buyer patterns) when names are combined in a single field.
-    Heuristics: contains ' & ', ' and ', or '/' as person joiners in the effective name.
-    Do NOT treat commas as co-buyer signals (to avoid 'LAST, FIRST' false positives).
-    If explicit co-buyer columns are present (Co_First_Name/Co_Last_Name/Co_FullName), do not drop.
-    """
+def filter_name_present(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    return _drop_rows(df_can, keep_name_present(df_can))
+
+
+def keep_cobuyers(df_can: pd.DataFrame) -> np.ndarray:
+    """Keep mask for filter_cobuyers."""
+    # If explicit co-buyer columns exist, do not drop based on combined name pattern
+    if any(c in df_can.columns for c in ["Co_First_Name", "Co_Last_Name", "Co_FullName"]):
+        return np.ones(len(df_can), dtype=bool)
     # Build an effective name string
-    full = _safe_str(df_can["FullName"]) if "FullName" in df_can.columns else pd.Series(["" for _ in range(len(df_can))])
-    first = _safe_str(df_can["First_Name"]) if "First_Name" in df_can.columns else pd.Series(["" for _ in range(len(df_can))])
-    last = _safe_str(df_can["Last_Name"]) if "Last_Name" in df_can.columns else pd.Series(["" for _ in range(len(df_can))])
+    full = _safe_str(df_can["FullName"]) if "FullName" in df_can.columns else _blank(df_can)
+    first = _safe_str(df_can["First_Name"]) if "First_Name" in df_can.columns else _blank(df_can)
+    last = _safe_str(df_can["Last_Name"]) if "Last_Name" in df_can.columns else _blank(df_can)
     eff = full
     empty_full = eff.eq("")
     eff = eff.where(~empty_full, (first + " " + last).str.replace(r"\s+", " ", regex=True).str.strip())
-    # If explicit co-buyer columns exist, do not drop based on combined name pattern
-    if any(c in df_can.columns for c in ["Co_First_Name", "Co_Last_Name", "Co_FullName"]):
-        return df_can, 0
     # Co-buyer patterns (exclude comma to avoid 'LAST, FIRST' names)
     cobuyer_mask = eff.str.contains(r"\s+&\s+|\sand\s|\s*/\s*", regex=True, case=False, na=False)
-    out = df_can.loc[~cobuyer_mask].copy()
-    return out, int(cobuyer_mask.sum())
+    return ~cobuyer_mask.to_numpy(dtype=bool)
 
 
-def filter_out_of_state(df_can: pd.DataFrame, home_state: str) -> Tuple[pd.DataFrame, int]:
+def filter_cobuyers(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """Drop rows that appear to contain multiple names (co-buyer patterns) when names are combined in a single field.
+    Heuristics: contains ' & ', ' and ', or '/' as person joiners in the effective name.
+    Do NOT treat commas as co-buyer signals (to avoid 'LAST, FIRST' false positives).
+    If explicit co-buyer columns are present (Co_First_Name/Co_Last_Name/Co_FullName), do not drop.
+    """
+    return _drop_rows(df_can, keep_cobuyers(df_can))
+
+
+def keep_out_of_state(df_can: pd.DataFrame, home_state: str) -> np.ndarray:
     if "State" not in df_can.columns:
-        return df_can, 0
-    state = _safe_str(df_can["State"]).str.upper()
-    keep = state == str(home_state).upper()
-    out = df_can.loc[keep].copy()
-    return out, len(df_can) - len(out)
+        return np.ones(len(df_can), dtype=bool)
+    home = str(home_state).upper()
+    return _str_mask(df_can["State"], lambda v: v.str.upper() == home).to_numpy(dtype=bool)
 
 
-def filter_model_year(df_can: pd.DataFrame, operator: str, year: Optional[int]) -> Tuple[pd.DataFrame, int]:
-    if year is None or "Year" not in df_can.columns:
-        return df_can, 0
-    def to_int(v):
-        try:
-            return int(str(v).strip())
-        except Exception:
-            return None
-    years = df_can["Year"].apply(to_int)
-    if operator == "newer":
-        keep = years > year
-    elif operator == "older":
-        keep = years < year
-    else:
-        keep = years == year
-    out = df_can.loc[keep.fillna(False)].copy()
-    return out, len(df_can) - len(out)
+def filter_out_of_state(df_can: pd.DataFrame, home_state: str) -> Tuple[pd.DataFrame, int]:
+    return _drop_rows(df_can, keep_out_of_state(df_can, home_state))
 
 
-def filter_delivery_age(df_can: pd.DataFrame, months: int) -> Tuple[pd.DataFrame, int]:
+def _has_field(df_can: pd.DataFrame, col: str) -> bool:
+    return col in df_can.columns or f"__{col}" in df_can.columns
+
+
+def _numeric_column(df_can: pd.DataFrame, col: str) -> pd.Series:
+    """A NUMERIC_FIELDS column as numbers: the __<col> column build_canonical_frame parsed,
+    else col itself, parsed here unless it is already numeric.
+    """
+    if f"__{col}" in df_can.columns:
+        return df_can[f"__{col}"]
+    s = df_can[col]
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s
+    return parse_numeric(s, NUMERIC_FIELDS[col])
+
+
+def keep_model_year_window(df_can: pd.DataFrame, min_year: Optional[int], max_year: Optional[int]) -> np.ndarray:
+    if (min_year is None and max_year is None) or not _has_field(df_can, "Year"):
+        return np.ones(len(df_can), dtype=bool)
+    years = _numeric_column(df_can, "Year")
+    keep = years.notna()
+    if min_year is not None:
+        keep &= years >= min_year
+    if max_year is not None:
+        keep &= years <= max_year
+    return keep.fillna(False).to_numpy(dtype=bool)
+
+
+def filter_model_year_window(df_can: pd.DataFrame, min_year: Optional[int], max_year: Optional[int]) -> Tuple[pd.DataFrame, int]:
+    """Keep model years between min_year and max_year inclusive (either may be None) in one pass.
+    Rows without a numeric year are dropped when any bound is set.
+    """
+    return _drop_rows(df_can, keep_model_year_window(df_can, min_year, max_year))
+
+
+def keep_delivery_age(df_can: pd.DataFrame, months: int) -> np.ndarray:
     # Require an effective date when delivery-age is enabled
     eff = _effective_date_series(df_can)
     cutoff = pd.Timestamp.today() - pd.DateOffset(months=months)
     has_date = eff.notna()
-    keep = has_date & (eff <= cutoff)
-    out = df_can.loc[keep].copy()
-    return out, len(df_can) - len(out)
+    return (has_date & (eff <= cutoff)).to_numpy(dtype=bool)
 
 
-def filter_distance(df_can: pd.DataFrame, max_miles: float) -> Tuple[pd.DataFrame, int]:
-    if "Distance" not in df_can.columns:
-        return df_can, 0
-    def to_float(v):
-        try:
-            return float(str(v).replace(",", ""))
-        except Exception:
-            return None
-    miles = df_can["Distance"].apply(to_float)
+def filter_delivery_age(df_can: pd.DataFrame, months: int) -> Tuple[pd.DataFrame, int]:
+    return _drop_rows(df_can, keep_delivery_age(df_can, months))
+
+
+def keep_distance(df_can: pd.DataFrame, max_miles: float, alive: Optional[np.ndarray] = None) -> np.ndarray:
+    """Keep mask for filter_distance. The valid-distance gate is measured over the alive rows
+    (all rows when alive is None), so it matches running the filter on that subset.
+    """
+    if not _has_field(df_can, "Distance"):
+        return np.ones(len(df_can), dtype=bool)
+    miles = _numeric_column(df_can, "Distance")
     # Treat implausible distances as invalid (e.g., > 1000 miles)
-    miles = miles.where(~(miles.notna() & (miles > 1000)), other=None)
-    valid_ratio = miles.notna().mean()
+    miles = miles.mask((miles > 1000).fillna(False))
+    valid = miles.notna().to_numpy(dtype=bool)
+    if alive is not None:
+        valid = valid[alive]
     # Gate: if too few valid numeric distances, skip this filter
-    if valid_ratio < 0.05:
-        return df_can, 0
+    if len(valid) and valid.mean() < 0.05:
+        return np.ones(len(df_can), dtype=bool)
     # Keep rows with distance <= threshold OR missing/invalid distance
     keep = (miles <= max_miles) | miles.isna()
-    out = df_can.loc[keep.fillna(True)].copy()
-    return out, len(df_can) - len(out)
+    return keep.fillna(True).to_numpy(dtype=bool)
+
+
+def filter_distance(df_can: pd.DataFrame, max_miles: float) -> Tuple[pd.DataFrame, int]:
+    return _drop_rows(df_can, keep_distance(df_can, max_miles))
 
 
 def _corporate_score(text: str) -> int:
@@ -347,63 +415,217 @@ def _corporate_score(text: str) -> int:
     return score
 
 
+def _is_corporate_row(full: str, first: str, last: str) -> bool:
+    """Scalar reference for one row of filter_corporate (see CorporateMatcher)."""
+    s = 0
+    text_full = str(full)
+    text_first_last = str(first + " " + last)
+
+    # Score ONLY name fields
+    s += _corporate_score(text_full)
+    s += _corporate_score(text_first_last)
+
+    # Person-likeness (two title-cased tokens in First/Last)
+    person_like = bool(first) and bool(last) and first.istitle() and last.istitle()
+    if person_like:
+        s -= 3
+
+    # HARD RULES (names only):
+    # 1) If 2+ OEM tokens appear in the name → corporate
+    # 2) If any OEM/brand token appears AND any dealer keyword appears → corporate
+    # 3) If any corporate suffix present → corporate
+    # 4) Otherwise, person-like names are preserved
+    try:
+        name_fields_up = (text_full.upper(), text_first_last.upper())
+        tokens = []
+        for f in name_fields_up:
+            tokens.extend([t for t in re.split(r"[^A-Z0-9]+", f) if t])
+        token_set = set(tokens)
+
+        oem_hits = token_set.intersection({o.upper() for o in EXCLUDE_OEMS})
+        brand_hits = token_set.intersection({b.upper() for b in EXCLUDE_BRANDS})
+        keyword_hits = token_set.intersection({k.upper() for k in EXCLUDE_KEYWORDS})
+        suffix_hits = token_set.intersection({suf.upper() for suf in CORPORATE_SUFFIXES})
+
+        # Guardrails for single OEM presence:
+        # - not person-like OR has dealer keywords OR has corporate suffix OR ALL-CAPS multi-token
+        name_all_caps = any(f.isupper() and len(f.split()) >= 2 for f in (text_full, text_first_last))
+
+        if len(oem_hits) >= 2:
+            s = 999
+        elif oem_hits and (not person_like or keyword_hits or suffix_hits or name_all_caps):
+            s = 999
+        elif brand_hits:
+            s = 999
+        elif suffix_hits:
+            s = 999
+        # Else leave score as-is (person-like override already applied above)
+    except Exception:
+        pass
+    return s >= 3
+
+
+class CorporateMatcher:
+    """Name-exclusion patterns precompiled once from EXCLUDE_BRANDS, EXCLUDE_OEMS,
+    EXCLUDE_KEYWORDS and CORPORATE_SUFFIXES.
+
+    drop_mask() makes the same decisions as _is_corporate_row, column-wise: each lexicon is one
+    alternation matched over the upper-cased name columns, and the score terms and hard rules
+    are combined as boolean masks.
+    """
+
+    def __init__(self, brands: set, oems: set, keywords: set, suffixes: set):
+        self._brand_phrase = self._phrase_re(brands)
+        self._keyword_phrase = self._phrase_re(keywords)
+        self._oem = self._token_re(oems)
+        self._brand = self._token_re(brands)
+        self._keyword = self._token_re(keywords)
+        self._suffix = self._token_re(suffixes)
+
+    @staticmethod
+    def _phrase_re(terms: set) -> re.Pattern:
+        """Any of the phrase patterns _corporate_score searches for terms, as one alternation."""
+        if not terms:
+            return re.compile(r"(?!)")
+        return re.compile("|".join(r"\\b" + re.escape(t) + r"\\b" for t in terms))
+
+    @staticmethod
+    def _token_re(terms: set) -> re.Pattern:
+        """A whole token (a run of A-Z/0-9) from terms; multi-token terms can never equal one."""
+        toks = sorted({t.upper() for t in terms if re.fullmatch(r"[A-Z0-9]+", t.upper())}, key=len, reverse=True)
+        if not toks:
+            return re.compile(r"(?!)")
+        return re.compile(r"(?<![A-Z0-9])(?:" + "|".join(re.escape(t) for t in toks) + r")(?![A-Z0-9])")
+
+    def _score(self, up: pd.Series) -> np.ndarray:
+        """_corporate_score over an upper-cased column."""
+        return (
+            3 * up.str.contains(self._brand_phrase).to_numpy(dtype=int)
+            + 2 * up.str.contains(self._keyword_phrase).to_numpy(dtype=int)
+            + 2 * up.str.contains(self._suffix).to_numpy(dtype=int)
+        )
+
+    def drop_mask(self, full: pd.Series, first: pd.Series, last: pd.Series) -> np.ndarray:
+        """Per-row corporate decision for stripped str columns of equal length."""
+        # Positional object columns: lookbehinds need Python's regex engine, not Arrow's
+        full = pd.Series(full.to_numpy(dtype=object))
+        first = pd.Series(first.to_numpy(dtype=object))
+        last = pd.Series(last.to_numpy(dtype=object))
+        first_last = first + " " + last
+        full_up = full.str.upper()
+        fl_up = first_last.str.upper()
+        person_like = (
+            first.ne("") & last.ne("") & first.str.istitle() & last.str.istitle()
+        ).to_numpy(dtype=bool)
+        score = self._score(full_up) + self._score(fl_up) - 3 * person_like
+
+        # Hard rules over the tokens of both name fields
+        both = full_up + " " + fl_up
+
+        def has(pattern: re.Pattern) -> np.ndarray:
+            return both.str.contains(pattern).to_numpy(dtype=bool)
+
+        oem_any = has(self._oem)
+        oem_multi = np.zeros(len(both), dtype=bool)
+        if oem_any.any():
+            per_row = both[oem_any].str.extractall(f"({self._oem.pattern})")[0].groupby(level=0).nunique()
+            oem_multi[per_row.index[per_row >= 2]] = True
+        all_caps = np.zeros(len(both), dtype=bool)
+        for text in (full, first_last):
+            all_caps |= (text.str.isupper() & text.str.contains(r"\S\s+\S")).to_numpy(dtype=bool)
+        suffix = has(self._suffix)
+        hard = (
+            oem_multi
+            | (oem_any & (~person_like | has(self._keyword) | suffix | all_caps))
+            | has(self._brand)
+            | suffix
+        )
+        return hard | (score >= 3)
+
+
+CORPORATE_MATCHER = CorporateMatcher(EXCLUDE_BRANDS, EXCLUDE_OEMS, EXCLUDE_KEYWORDS, CORPORATE_SUFFIXES)
+
+
+def keep_corporate(df_can: pd.DataFrame) -> np.ndarray:
+    # Use FullName/First/Last signals
+    full = _safe_str(df_can["FullName"]) if "FullName" in df_can.columns else _blank(df_can)
+    first = _safe_str(df_can["First_Name"]) if "First_Name" in df_can.columns else _blank(df_can)
+    last = _safe_str(df_can["Last_Name"]) if "Last_Name" in df_can.columns else _blank(df_can)
+    return ~CORPORATE_MATCHER.drop_mask(full, first, last)
+
+
 def filter_corporate(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
-    # Use FullName/First/Last/Store signals
-    full = _safe_str(df_can["FullName"]) if "FullName" in df_can.columns else pd.Series([""] * len(df_can))
-    first = _safe_str(df_can["First_Name"]) if "First_Name" in df_can.columns else pd.Series([""] * len(df_can))
-    last = _safe_str(df_can["Last_Name"]) if "Last_Name" in df_can.columns else pd.Series([""] * len(df_can))
-    store = _safe_str(df_can["Store"]) if "Store" in df_can.columns else pd.Series([""] * len(df_can))
-
-    scores = []
-    for i in range(len(df_can)):
-        s = 0
-        text_full = str(full.iloc[i])
-        text_first_last = str(first.iloc[i] + " " + last.iloc[i])
-
-        # Score ONLY name fields
-        s += _corporate_score(text_full)
-        s += _corporate_score(text_first_last)
-
-        # Person-likeness (two title-cased tokens in First/Last)
-        person_like = bool(first.iloc[i]) and bool(last.iloc[i]) and first.iloc[i].istitle() and last.iloc[i].istitle()
-        if person_like:
-            s -= 3
-
-        # HARD RULES (names only):
-        # 1) If 2+ OEM tokens appear in the name → corporate
-        # 2) If any OEM/brand token appears AND any dealer keyword appears → corporate
-        # 3) If any corporate suffix present → corporate
-        # 4) Otherwise, person-like names are preserved
-        try:
-            name_fields_up = (text_full.upper(), text_first_last.upper())
-            tokens = []
-            for f in name_fields_up:
-                tokens.extend([t for t in re.split(r"[^A-Z0-9]+", f) if t])
-            token_set = set(tokens)
-
-            oem_hits = token_set.intersection({o.upper() for o in EXCLUDE_OEMS})
-            brand_hits = token_set.intersection({b.upper() for b in EXCLUDE_BRANDS})
-            keyword_hits = token_set.intersection({k.upper() for k in EXCLUDE_KEYWORDS})
-            suffix_hits = token_set.intersection({suf.upper() for suf in CORPORATE_SUFFIXES})
-
-            # Guardrails for single OEM presence:
-            # - not person-like OR has dealer keywords OR has corporate suffix OR ALL-CAPS multi-token
-            name_all_caps = any(f.isupper() and len(f.split()) >= 2 for f in (text_full, text_first_last))
-
-            if len(oem_hits) >= 2:
-                s = 999
-            elif oem_hits and (not person_like or keyword_hits or suffix_hits or name_all_caps):
-                s = 999
-            elif brand_hits:
-                s = 999
-            elif suffix_hits:
-                s = 999
-            # Else leave score as-is (person-like override already applied above)
-        except Exception:
-            pass
-        scores.append(s)
-    keep = pd.Series(scores) < 3
-    out = df_can.loc[keep].copy()
-    return out, len(df_can) - len(out)
+    return _drop_rows(df_can, keep_corporate(df_can))
+
+
+# Drop-reason codes: 0 keeps the row, code i means step DROP_REASONS[i - 1] dropped it first.
+# Bit i - 1 of a would-drop mask is set when that step rejects the row, whether or not an
+# earlier step already dropped it. Codes do not depend on which presets are enabled.
+DROP_REASONS = ["exclude_corporate", "name_present", "address_present", "out_of_state", "model_year_window", "delivery_age", "distance", "dedupe"]
+DROP_REASON_CODES = {name: i + 1 for i, name in enumerate(DROP_REASONS)}
 
 
+def drop_reason_bit(name: str) -> int:
+    return 1 << (DROP_REASON_CODES[name] - 1)
+
+
+def describe_drop_mask(would_drop: np.ndarray) -> np.ndarray:
+    """Comma-joined step names for each would-drop mask (decoded once per distinct mask)."""
+    masks, codes = np.unique(np.asarray(would_drop), return_inverse=True)
+    names = np.array([", ".join(n for n in DROP_REASONS if int(m) & drop_reason_bit(n)) for m in masks], dtype=object)
+    return names[codes.reshape(-1)]
+
+
+class RowFilter(NamedTuple):
+    """One enabled per-row preset: its step name (a DROP_REASONS entry), its audit sheet (None
+    when it has none) and a keep(df, alive) callable returning a positional bool mask over the
+    whole frame.
+    """
+    name: str
+    audit: Optional[str]
+    keep: Callable[[pd.DataFrame, np.ndarray], np.ndarray]
+
+    @property
+    def code(self) -> int:
+        return DROP_REASON_CODES[self.name]
+
+
+def enabled_row_filters(presets: Dict = PRESETS, include_distance: bool = True) -> List[RowFilter]:
+    """The per-row presets enabled in presets, in pipeline order (dedupe is not a row filter)."""
+    filters: List[RowFilter] = []
+    if presets.get("exclude_corporate"):
+        filters.append(RowFilter("exclude_corporate", "Dropped_exclude_corporate", lambda df, alive: keep_corporate(df)))
+    if presets.get("name_present"):
+        filters.append(RowFilter("name_present", None, lambda df, alive: keep_name_present(df)))
+    if presets.get("address_present"):
+        filters.append(RowFilter("address_present", "Dropped_address_present", lambda df, alive: keep_address_present(df)))
+    if presets.get("delete_out_of_state"):
+        home = presets.get("home_state")
+        filters.append(RowFilter("out_of_state", "Dropped_out_of_state", lambda df, alive: keep_out_of_state(df, home)))
+    my = presets.get("model_year_filter", {})
+    if my.get("enabled"):
+        filters.append(RowFilter("model_year_window", "Dropped_model_year", lambda df, alive: keep_model_year_window(df, my.get("min_year"), my.get("max_year"))))
+    da = presets.get("delivery_age_filter", {})
+    if da.get("enabled"):
+        filters.append(RowFilter("delivery_age", "Dropped_delivery_age", lambda df, alive: keep_delivery_age(df, da.get("months", 18))))
+    dist = presets.get("distance_filter", {})
+    if include_distance and dist.get("enabled"):
+        filters.append(RowFilter("distance", "Dropped_distance", lambda df, alive: keep_distance(df, dist.get("max_miles", 100), alive)))
+    return filters
+
+
+def apply_row_filters(df_can: pd.DataFrame, filters: List[RowFilter]) -> Tuple[np.ndarray, np.ndarray]:
+    """Evaluate filters over df_can without subsetting it.
+
+    Returns per-row drop-reason codes (uint8; the first filter that dropped the row, 0 if kept) and
+    would-drop bitmasks (uint16; every filter that rejects the row). reason == f.code selects the
+    rows f dropped, so step counts and dropped sets match applying the filter_* functions one
+    after another. Callers materialize the survivors once with df_can.loc[reason == 0].
+    """
+    reason = np.zeros(len(df_can), dtype=np.uint8)
+    would_drop = np.zeros(len(df_can), dtype=np.uint16)
+    for f in filters:
+        rejected = ~f.keep(df_can, reason == 0)
+        would_drop[rejected] |= drop_reason_bit(f.name)
+        reason[rejected & (reason == 0)] = f.code
+    return reason, would_drop
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from constants import (
@@ -11,15 +12,76 @@ from constants import (
     US_STATE_ABBR,
     DELIVERYDATE_PRECEDENCE,
 )
-from schema_detection import detect_schema, normalize_label
+from schema_detection import detect_schema, detect_schema_cached, normalize_label, parse_dates
 
 
 def coerce_str(s: pd.Series) -> pd.Series:
     if s is None:
         return pd.Series([], dtype=object)
+    if isinstance(s.dtype, pd.StringDtype):
+        # Already strings (e.g. string[pyarrow]); keep the storage and use its string kernels
+        return s.fillna("").str.strip()
     return s.fillna("").astype(str).str.strip()
 
 
+def _arrow_string_dtype(df: pd.DataFrame):
+    """Return string[pyarrow] when the raw frame was read with Arrow-backed strings, else None."""
+    dtype = pd.StringDtype("pyarrow")
+    for col in df.columns:
+        if df[col].dtype == dtype:
+            return dtype
+    return None
+
+
+# Canonical fields that repeat heavily across rows (rooftops, geography, vehicle descriptors)
+CATEGORY_FIELDS = ["Store", "City", "State", "Zip", "Make", "Model", "Vehicle_Condition"]
+# A field is dictionary-encoded when its distinct values are at most this share of the rows
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _encode_low_cardinality(s: pd.Series) -> pd.Series:
+    """s as a categorical (integer codes into its distinct values) when few values repeat, else s."""
+    codes, uniques = pd.factorize(s)
+    if len(uniques) > CATEGORY_MAX_RATIO * len(s):
+        return s
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=s.index, name=s.name)
+
+
+# Canonical fields the filters compare as numbers, and the compact nullable dtype each is parsed
+# into. build_canonical_frame keeps the parsed values in an internal __<field> column (like
+# __EffectiveDate); the field itself keeps the source text for the output.
+NUMERIC_FIELDS = {"Year": "Int16", "Distance": "Float32"}
+
+_INT_TEXT_RE = r"[+-]?\d+"
+
+
+def parse_numeric(s: pd.Series, dtype: str) -> pd.Series:
+    """Numbers in s as a compact nullable dtype; anything else is NA.
+    Integer dtypes only accept integer text, as int() does (no thousands separators or decimal
+    point), and keep values within their range; float dtypes allow thousands separators.
+    """
+    if not pd.api.types.is_numeric_dtype(s) or pd.api.types.is_bool_dtype(s):
+        text = coerce_str(s)
+        if dtype.startswith("Int"):
+            text = text.where(text.str.fullmatch(_INT_TEXT_RE).fillna(False).astype(bool), "")
+        else:
+            text = text.str.replace(",", "", regex=False)
+        s = pd.to_numeric(text, errors="coerce")
+    v = s.astype("float64")
+    if dtype.startswith("Int"):
+        info = np.iinfo(dtype.lower())
+        v = v.where((v % 1 == 0) & (v >= info.min) & (v <= info.max))
+    return v.astype(dtype)
+
+
+def decode_compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Undo build_canonical_frame's dictionary encoding, for frames leaving the pipeline.
+    Categoricals go back to their values' dtype.
+    """
+    cols = {c: df[c].cat.categories.dtype for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.astype(cols) if cols else df
+
+
 def normalize_state_value(value: str) -> str:
     if value is None:
         return ""
@@ -27,17 +89,27 @@ def normalize_state_value(value: str) -> str:
     return v
 
 
-def _pre_trim_normalize(df: pd.DataFrame) -> pd.DataFrame:
+def _constant_column(n: int, value: Optional[str]) -> pd.Series:
+    """n copies of value, e.g. the blank for an unmapped field, without building a per-row list."""
+    return pd.Series(np.full(n, value, dtype=object))
+
+
+def _pre_trim_normalize(df: pd.DataFrame, columns: Optional[List[str]] = None) -> pd.DataFrame:
     """Lightweight normalization before detection.
     - Trim whitespace
     - Collapse internal whitespace
     - Normalize common non-breaking spaces
+    With columns, only those are normalized; the rest pass through as they are.
     """
-    work = df.copy()
+    # Shallow copy: columns are replaced whole, never written in place, so the input is untouched
+    work = df.copy(deep=False)
+    wanted = None if columns is None else set(columns)
     for col in work.columns:
+        if wanted is not None and col not in wanted:
+            continue
         try:
             if pd.api.types.is_string_dtype(work[col]) or work[col].dtype == object:
-                s = work[col].astype(str)
+                s = work[col] if isinstance(work[col].dtype, pd.StringDtype) else work[col].astype(str)
                 s = s.str.replace("\u00A0", " ", regex=False)
                 s = s.str.replace(r"\s+", " ", regex=True).str.strip()
                 work[col] = s
@@ -100,64 +172,151 @@ def _split_csz_value(text: str) -> Tuple[str, str, str]:
     return "", "", zip5
 
 
-def _pre_split_city_state_zip(df: pd.DataFrame) -> pd.DataFrame:
-    """Add synthetic columns __CSZ_City/__CSZ_State/__CSZ_Zip by splitting any composite CSZ columns.
-    Detection will consider these via value-pattern scoring.
+_CSZ_LABELS = {"ZIP", "ZIP CODE", "POSTAL", "POSTAL CODE"}
+_CSZ_CITY_LABELS = _CSZ_LABELS | {"CITY", "STATE"}
+# The same rules as _split_csz_value, as named-group patterns for Series.str.extract
+_CSZ_ZIP_PATTERN = r"(?s)^(?P<rest>.*?)\b(?P<zip>\d{5})(?:-\d{4})?$"
+_CSZ_CITY_ST_PATTERN = r"^(?:(?P<city>[A-Za-z][A-Za-z \-\.'/]*)[,\s]+)?(?P<st>[A-Za-z]{2})$"
+_CSZ_CITY_PATTERN = r"[A-Za-z][A-Za-z \-\.'/]*"
+_CSZ_COMMA_ST_PATTERN = r"(?s)^(?P<city>.*),\s*(?P<st>[A-Za-z]{2})\s*(?:,\s*)*$"
+_CSZ_SPACE_ST_PATTERN = r"(?s)^(?P<city>.*\S)\s+(?P<st>[A-Za-z]{2})$"
+_CSZ_PATTERN = r"[A-Za-z].*,?\s*[A-Za-z]{2}\s+\d{5}(?:-\d{4})?"
+
+
+def _split_csz_texts(t: pd.Series) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """_split_csz_value over an object Series of stripped str (RangeIndex), as (city, state, zip) arrays.
+    One extractor settles most rows; the comma and whitespace fallbacks only see rows still unmatched.
+    """
+    n = len(t)
+    city = np.full(n, "", dtype=object)
+    state = np.full(n, "", dtype=object)
+    m = t.str.extract(_CSZ_ZIP_PATTERN)
+    has_zip = m["zip"].notna()
+    zip5 = m["zip"].fillna("").to_numpy(dtype=object)
+    rest = m["rest"].where(has_zip, t)
+    w = rest.str.strip()
+    # A bare "ZIP"/"POSTAL" label before the zip is not a city
+    open_ = ~(has_zip & w.str.upper().isin(_CSZ_LABELS))
+
+    # City, ST / City ST (zip optional) and ST <zip>
+    cs = w[open_].str.extract(_CSZ_CITY_ST_PATTERN)
+    with_city = cs.index[cs["city"].notna()]
+    city[with_city] = cs.loc[with_city, "city"].str.strip()
+    state[with_city] = cs.loc[with_city, "st"].str.upper()
+    st_only = cs.index[cs["city"].isna() & cs["st"].notna() & has_zip[cs.index]]
+    state[st_only] = cs.loc[st_only, "st"].str.upper()
+    # A lone ST without a zip matches nothing below either
+    open_[cs.index[cs["st"].notna()]] = False
+
+    # City <zip>, unless the "city" is a field label
+    cand = w[open_ & has_zip]
+    city_only = cand.index[cand.str.fullmatch(_CSZ_CITY_PATTERN)]
+    named = city_only[~w[city_only].str.upper().isin(_CSZ_CITY_LABELS)]
+    city[named] = w[named]
+    open_[city_only] = False
+
+    # Fallback: last comma-separated part is a state; the parts before it are the city
+    cand = rest[open_ & rest.str.contains(",", regex=False)]
+    cs = cand.str.extract(_CSZ_COMMA_ST_PATTERN)
+    hit = cs.index[cs["st"].notna() & cs["city"].str.contains(r"[^\s,]", na=False)]
+    city[hit] = cs.loc[hit, "city"].str.replace(r"\s*,[\s,]*", ", ", regex=True).str.replace(r"^[\s,]+|[\s,]+$", "", regex=True)
+    state[hit] = cs.loc[hit, "st"].str.upper()
+    open_[hit] = False
+
+    # Fallback: last whitespace-separated token is a state
+    cs = w[open_].str.extract(_CSZ_SPACE_ST_PATTERN)
+    hit = cs.index[cs["st"].notna()]
+    city[hit] = cs.loc[hit, "city"].str.replace(r"\s+", " ", regex=True)
+    state[hit] = cs.loc[hit, "st"].str.upper()
+    return city, state, zip5
+
+
+def _split_csz_series(values: pd.Series) -> Tuple[pd.Series, pd.Series, pd.Series]:
+    """Vectorized _split_csz_value: (city, state, zip) Series aligned with values.
+    Each distinct value is parsed once; missing values give empty parts.
     """
-    work = df.copy()
+    arr = values.to_numpy(dtype=object)
+    if pd.api.types.infer_dtype(arr, skipna=True) != "string":
+        # Mixed objects hash alike (1 == 1.0) but parse differently once stringified
+        arr = np.array([v if v is None else str(v) for v in arr], dtype=object)
+    codes, uniques = pd.factorize(arr)
+    texts = pd.Series([str(u).strip() for u in uniques], dtype=object)
+    # Code -1 (missing) picks the trailing empty string
+    return tuple(
+        pd.Series(np.append(part, "")[codes], index=values.index, dtype=object)
+        for part in _split_csz_texts(texts)
+    )
+
+
+def find_csz_columns(df: pd.DataFrame) -> List[str]:
+    """Return columns that look like composite City/State/Zip fields by header or sampled values."""
     cand_cols: List[str] = []
-    normed = {col: normalize_label(col) for col in work.columns}
+    normed = {col: normalize_label(col) for col in df.columns}
     for col, norm in normed.items():
         if any(tok in norm for tok in ["city state zip", "city st zip", "csz", "city state", "city st", "city/ state", "city/state"]):
             cand_cols.append(col)
         else:
             # Heuristic: values frequently match City, ST 12345
             try:
-                s = work[col].astype(str)
-                sample = s.dropna().astype(str).head(200)
-                rate = sample.str.contains(r"[A-Za-z].*,?\s*[A-Za-z]{2}\s+\d{5}(?:-\d{4})?", regex=True).mean()
+                s = df[col]
+                # Numbers, booleans and dates never contain letters followed by a zip
+                if pd.api.types.is_numeric_dtype(s) or pd.api.types.is_datetime64_any_dtype(s):
+                    continue
+                sample = s.iloc[np.flatnonzero(s.notna().to_numpy())[:200]].astype(str)
+                rate = sample.str.contains(_CSZ_PATTERN, regex=True).mean()
                 if rate >= 0.3:
                     cand_cols.append(col)
             except Exception:
                 pass
+    return cand_cols
+
+
+def _pre_split_city_state_zip(df: pd.DataFrame, cand_cols: Optional[List[str]] = None) -> pd.DataFrame:
+    """Add synthetic columns __CSZ_City/__CSZ_State/__CSZ_Zip by splitting any composite CSZ columns.
+    Detection will consider these via value-pattern scoring.
+    When cand_cols is given (e.g. discovered on an earlier chunk), discovery is skipped and all
+    three synthetic columns are always materialized so a reused mapping can resolve them.
+    """
+    work = df.copy(deep=False)
+    fixed = cand_cols is not None
+    if cand_cols is None:
+        cand_cols = find_csz_columns(work)
+    cand_cols = [c for c in cand_cols if c in work.columns]
     if not cand_cols:
         return work
-    city_acc = pd.Series([None] * len(work))
-    state_acc = pd.Series([None] * len(work))
-    zip_acc = pd.Series([None] * len(work))
+    city_acc = _constant_column(len(work), None)
+    state_acc = city_acc
+    zip_acc = city_acc
     for col in cand_cols:
         try:
-            triples = work[col].apply(_split_csz_value)
-            c = triples.apply(lambda t: t[0] if isinstance(t, tuple) else "")
-            s = triples.apply(lambda t: t[1] if isinstance(t, tuple) else "")
-            z = triples.apply(lambda t: t[2] if isinstance(t, tuple) else "")
+            c, s, z = _split_csz_series(work[col])
             city_acc = city_acc.where(city_acc.notna(), c.where(c != "", None))
             state_acc = state_acc.where(state_acc.notna(), s.where(s != "", None))
             zip_acc = zip_acc.where(zip_acc.notna(), z.where(z != "", None))
         except Exception:
             pass
     # Materialize synthetic columns only if we extracted anything
-    if city_acc.notna().any():
+    if fixed or city_acc.notna().any():
         work["__CSZ_City"] = city_acc.fillna("")
-    if state_acc.notna().any():
+    if fixed or state_acc.notna().any():
         work["__CSZ_State"] = state_acc.fillna("")
-    if zip_acc.notna().any():
+    if fixed or zip_acc.notna().any():
         work["__CSZ_Zip"] = zip_acc.fillna("")
     return work
 
 
 def assemble_address(df: pd.DataFrame, mapping: Dict[str, str]) -> Tuple[pd.Series, pd.Series, pd.Series, pd.Series, pd.Series]:
-    addr1 = coerce_str(df[mapping["Address1"]]) if "Address1" in mapping else pd.Series(["" for _ in range(len(df))])
-    addr2 = coerce_str(df[mapping["Address2"]]) if "Address2" in mapping else pd.Series(["" for _ in range(len(df))])
-    city = coerce_str(df[mapping["City"]]) if "City" in mapping else pd.Series(["" for _ in range(len(df))])
-    state = coerce_str(df[mapping["State"]]) if "State" in mapping else pd.Series(["" for _ in range(len(df))])
-    zipc = coerce_str(df[mapping["Zip"]]) if "Zip" in mapping else pd.Series(["" for _ in range(len(df))])
+    addr1 = coerce_str(df[mapping["Address1"]]) if "Address1" in mapping else _constant_column(len(df), "")
+    addr2 = coerce_str(df[mapping["Address2"]]) if "Address2" in mapping else _constant_column(len(df), "")
+    city = coerce_str(df[mapping["City"]]) if "City" in mapping else _constant_column(len(df), "")
+    state = coerce_str(df[mapping["State"]]) if "State" in mapping else _constant_column(len(df), "")
+    zipc = coerce_str(df[mapping["Zip"]]) if "Zip" in mapping else _constant_column(len(df), "")
 
     # If addr1 empty but addr2 contains PO BOX, promote
     po_mask = addr2.str.contains(r"(?i)\bP\.?O\.?\s*BOX\b|\bPO\s*BOX\b")
     addr1 = addr1.where(~(addr1.eq("") & po_mask), addr2)
-    # Normalize state to uppercase
-    state = state.apply(normalize_state_value)
+    # Normalize state to uppercase (values are already stripped strings)
+    state = state.str.upper()
     # If Address1 and Address2 came from the same source column, only keep Address2 when it contains unit tokens
     try:
         if mapping.get("Address1") and mapping.get("Address2") and mapping.get("Address1") == mapping.get("Address2"):
@@ -170,20 +329,22 @@ def assemble_address(df: pd.DataFrame, mapping: Dict[str, str]) -> Tuple[pd.Seri
 
 
 def choose_delivery_date(df: pd.DataFrame, mapping: Dict[str, str]) -> pd.Series:
+    """Delivery date as datetime64, parsed once with a format inferred from the column (parse_dates)."""
     if "DeliveryDate" in mapping:
-        return pd.to_datetime(df[mapping["DeliveryDate"]], errors="coerce")
+        return parse_dates(df[mapping["DeliveryDate"]])
     # Fallback: search columns by precedence
     norm_cols = {col: normalize_label(col) for col in df.columns}
     for tok in DELIVERYDATE_PRECEDENCE:
         for col, norm in norm_cols.items():
             if tok in norm:
-                return pd.to_datetime(df[col], errors="coerce")
-    return pd.to_datetime(pd.Series([None] * len(df)))
+                return parse_dates(df[col])
+    return pd.to_datetime(_constant_column(len(df), None))
 
 
 def derive_fullname(df: pd.DataFrame, mapping: Dict[str, str]) -> pd.Series:
-    first = coerce_str(df[mapping["First_Name"]]) if "First_Name" in mapping else pd.Series(["" for _ in range(len(df))])
-    last = coerce_str(df[mapping["Last_Name"]]) if "Last_Name" in mapping else pd.Series(["" for _ in range(len(df))])
+    blank = _constant_column(len(df), "")
+    first = coerce_str(df[mapping["First_Name"]]) if "First_Name" in mapping else blank
+    last = coerce_str(df[mapping["Last_Name"]]) if "Last_Name" in mapping else blank
     # Prefer constructed FullName from First + Last when either exists
     constructed = (first + " " + last).str.replace(r"\s+", " ", regex=True).str.strip()
     if constructed.eq("").all() and "FullName" in mapping:
@@ -214,47 +375,222 @@ def _normalize_phone_value(value: str) -> str:
     return out
 
 
+_PHONE_EXT_RE = re.compile(r"(?:ext\.?|x)\s*(\d{1,5})$", flags=re.IGNORECASE)
+_BARE7_RE = re.compile(r"\d{3}-\d{4}")
+# Values up to this many characters go through the code-point matrix; longer ones are rare
+_PHONE_FAST_WIDTH = 32
+_DASH = ord("-")
+
+
+def _phone_core_matrix(cp: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Last (up to) 10 ASCII digits of each row of a code-point matrix, left-aligned, and their count."""
+    is_digit = (cp >= ord("0")) & (cp <= ord("9"))
+    ndig = is_digit.sum(axis=1, dtype=np.int16)
+    # Position of each digit among the row's kept digits; digits before the last 10 fall below 0
+    pos = np.cumsum(is_digit, axis=1, dtype=np.int16) - 1 - np.maximum(ndig - 10, 0).astype(np.int16)[:, None]
+    keep = is_digit & (pos >= 0)
+    rows = np.nonzero(keep)[0]
+    core = np.zeros((len(cp), 10), dtype=np.uint32)
+    core[rows, pos[keep]] = cp[keep]
+    return core, np.minimum(ndig, 10)
+
+
+def _normalize_phone_array(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """_normalize_phone_value over an object array of str, computed on a code-point matrix.
+    Returns (normalized object array, bare7), bare7 marking 7-digit results without an extension
+    (the ones an area code completes). Python's \\d also matches non-ASCII digits, so values with
+    non-ASCII characters, and values longer than _PHONE_FAST_WIDTH, use the scalar function.
+    """
+    n = len(values)
+    out = np.empty(n, dtype=object)
+    bare7 = np.zeros(n, dtype=bool)
+    lens = np.fromiter(map(len, values), dtype=np.int64, count=n)
+    fast = np.nonzero(lens <= _PHONE_FAST_WIDTH)[0]
+    width = max(1, int(lens[fast].max(initial=0)))
+    cp = values[fast].astype(f"U{width}").view(np.uint32).reshape(len(fast), width)
+    ascii_rows = (cp < 128).all(axis=1)
+    fast, cp = fast[ascii_rows], cp[ascii_rows]
+
+    core, ncore = _phone_core_matrix(cp)
+    res = np.zeros((len(cp), 12), dtype=np.uint32)
+    ten = ncore == 10
+    seven = ncore == 7
+    res[:, :10] = core
+    # AAA-NNN-NNNN
+    res[ten, 4:7] = core[ten, 3:6]
+    res[ten, 8:12] = core[ten, 6:10]
+    res[ten, 3] = _DASH
+    res[ten, 7] = _DASH
+    # NNN-NNNN
+    res[seven, 4:8] = core[seven, 3:7]
+    res[seven, 3] = _DASH
+    res[seven, 8:] = 0
+    # Trailing NULs are dropped when the rows are read back as strings
+    out[fast] = res.view("U12").ravel().astype(object)
+
+    # Extensions need an "x"; only those values run the regex
+    has_x = ((cp == ord("x")) | (cp == ord("X"))).any(axis=1)
+    no_ext = np.ones(len(fast), dtype=bool)
+    for i in np.nonzero(has_x)[0]:
+        m_ext = _PHONE_EXT_RE.search(values[fast[i]])
+        if m_ext:
+            out[fast[i]] = f"{out[fast[i]]} x{m_ext.group(1)}"
+            no_ext[i] = False
+    bare7[fast] = seven & no_ext
+
+    slow = np.ones(n, dtype=bool)
+    slow[fast] = False
+    for i in np.nonzero(slow)[0]:
+        out[i] = _normalize_phone_value(values[i])
+        bare7[i] = _BARE7_RE.fullmatch(out[i]) is not None
+    return out, bare7
+
+
 def _merge_area_code(area_series: pd.Series | None, number_series: pd.Series) -> pd.Series:
     """Combine area code with 7-digit numbers; leave 10+ digits as-is (normalized).
-    If area_series is None, just normalize the number.
+    If area_series is None, just normalize the number. Same result as applying
+    _normalize_phone_value per cell; each distinct number is normalized once.
     """
     if number_series is None:
         return pd.Series(["" for _ in range(0)])
-    area = coerce_str(area_series) if area_series is not None else pd.Series(["" for _ in range(len(number_series))])
-    nums = number_series.fillna("").astype(str)
-    out_vals: List[str] = []
-    for a_raw, n_raw in zip(area.tolist(), nums.tolist()):
-        n_norm = _normalize_phone_value(n_raw)
-        # If n_norm is 7-digit like NNN-NNNN, and area is 3 digits, build AAA-NNN-NNNN
-        if re.fullmatch(r"\d{3}-\d{4}", n_norm):
-            a_digits = re.sub(r"\D", "", a_raw)
-            if re.fullmatch(r"\d{3}", a_digits):
-                n_norm = f"{a_digits}-{n_norm}"
-        out_vals.append(n_norm)
-    return pd.Series(out_vals)
-
-
-def build_canonical_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str], List[str]]:
-    # Pre-normalize and split composites before detection
+    nums = number_series.fillna("").astype(str).to_numpy(dtype=object)
+    codes, uniques = pd.factorize(nums)
+    norm, bare7 = _normalize_phone_array(np.asarray(uniques, dtype=object))
+    out, bare7 = norm[codes], bare7[codes]
+    if area_series is not None and bare7.any():
+        # Area code applies when it has exactly three digits once punctuation is removed
+        area = coerce_str(area_series).to_numpy(dtype=object)[bare7]
+        a_codes, a_uniques = pd.factorize(area)
+        a_digits = np.array([re.sub(r"\D", "", a) for a in a_uniques], dtype=object)[a_codes]
+        ok = np.fromiter(map(len, a_digits), dtype=np.int64, count=len(a_digits)) == 3
+        rows = np.nonzero(bare7)[0][ok]
+        out[rows] = a_digits[ok] + "-" + out[rows]
+    return pd.Series(out.tolist())
+
+
+_ADDR_PO_BOX_RE = r"\bP\.?\s*O\.?\s*BOX\b"
+_ADDR_UNIT_RE = r"\b(APT|APARTMENT|UNIT|STE|SUITE|#|BLDG|BUILDING|RM|ROOM)\b"
+
+
+def _map_distinct(s: pd.Series, fn) -> np.ndarray:
+    """fn (str Series -> Series) over the distinct values of s, expanded back to rows as an object array.
+    Categoricals use their categories; missing values map to fn of "".
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes, uniques = s.cat.codes.to_numpy(), s.cat.categories
+    else:
+        codes, uniques = pd.factorize(s)
+    # Code -1 (missing) picks the trailing ""
+    texts = pd.Series([str(u) for u in uniques] + [""], dtype=object)
+    return fn(texts).to_numpy(dtype=object)[codes]
+
+
+def _address_part(v: pd.Series) -> pd.Series:
+    """Upper-case, standardize PO BOX and unit labels, drop punctuation, collapse whitespace."""
+    v = v.str.strip().str.upper()
+    v = v.str.replace(_ADDR_PO_BOX_RE, "PO BOX", regex=True)
+    v = v.str.replace(_ADDR_UNIT_RE, "UNIT", regex=True)
+    v = v.str.replace(r"[^A-Z0-9\s]", " ", regex=True)
+    return v.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def address_key_series(df: pd.DataFrame) -> pd.Series:
+    """Normalized ADDRESS1|CITY|STATE|ZIP5 per row ("" unless all four parts are present).
+    Vectorized filters._normalize_address_key: each distinct value of each part is normalized
+    once with string kernels. Missing cells count as blank.
+    """
+    a1 = _map_distinct(df["Address1"], _address_part)
+    city = _map_distinct(df["City"], _address_part)
+    state = _map_distinct(df["State"], _address_part)
+    zip5 = _map_distinct(df["Zip"], lambda v: v.str.replace(r"[^0-9]", "", regex=True).str[:5])
+    key = pd.Series(a1, index=df.index, dtype=object) + "|" + city + "|" + state + "|" + zip5
+    complete = (a1 != "") & (city != "") & (state != "") & (zip5 != "")
+    return key.where(complete, "")
+
+
+def detect_canonical_mapping(
+    df: pd.DataFrame,
+    schema_cache_dir: Optional[str] = None,
+    detect_workers: int = 1,
+) -> Tuple[Dict[str, str], List[str], List[str]]:
+    """Run build_canonical_frame's detection stage alone, e.g. on a sample of a large file.
+    Returns (mapping, warnings, csz_cols); pass mapping and csz_cols back to build_canonical_frame.
+    """
     df = _pre_trim_normalize(df)
+    csz_cols = find_csz_columns(df)
     df = _pre_split_city_state_zip(df)
-    mapping, warnings = detect_schema(df)
+    if schema_cache_dir:
+        mapping, warnings = detect_schema_cached(df, schema_cache_dir, workers=detect_workers)
+    else:
+        mapping, warnings = detect_schema(df, workers=detect_workers)
+    return mapping, warnings, csz_cols
+
+
+def source_columns_for(
+    columns: List[str],
+    mapping: Dict[str, str],
+    csz_cols: Optional[List[str]] = None,
+) -> List[str]:
+    """Raw columns build_canonical_frame reads for this mapping, in file order.
+    Covers mapped fields, composite City/State/Zip sources and, when DeliveryDate is unmapped,
+    the precedence columns choose_delivery_date falls back to.
+    """
+    needed = {src for src in mapping.values() if not src.startswith("__CSZ_")}
+    needed.update(csz_cols or [])
+    if "DeliveryDate" not in mapping:
+        needed.update(c for c in columns if any(tok in normalize_label(c) for tok in DELIVERYDATE_PRECEDENCE))
+    return [c for c in columns if c in needed]
+
+
+def build_canonical_frame(
+    df: pd.DataFrame,
+    mapping: Optional[Dict[str, str]] = None,
+    csz_cols: Optional[List[str]] = None,
+    schema_cache_dir: Optional[str] = None,
+    detect_workers: int = 1,
+) -> Tuple[pd.DataFrame, Dict[str, str], List[str]]:
+    """Build the canonical frame from a raw frame.
+    Mapped CATEGORY_FIELDS with few distinct values are returned as categoricals, and
+    NUMERIC_FIELDS are also parsed into internal __<field> columns of compact nullable numbers.
+    Pass mapping (and the csz_cols it was detected with) to skip detection, e.g. for
+    later chunks of a streamed file whose schema was detected on the first chunk.
+    schema_cache_dir reuses accepted mappings for known header layouts (see detect_schema_cached).
+    detect_workers > 1 spreads detection over threads and processes (see detect_schema).
+    """
+    # Pre-normalize and split composites before detection; with a known mapping only its
+    # source columns are normalized
+    used = None if mapping is None else source_columns_for(list(df.columns), mapping, csz_cols)
+    df = _pre_trim_normalize(df, columns=used)
+    df = _pre_split_city_state_zip(df, cand_cols=csz_cols)
+    if mapping is None and schema_cache_dir:
+        mapping, warnings = detect_schema_cached(df, schema_cache_dir, workers=detect_workers)
+    elif mapping is None:
+        mapping, warnings = detect_schema(df, workers=detect_workers)
+    else:
+        warnings = []
 
     # Initialize canonical DataFrame with only the locked output order
     data: Dict[str, pd.Series] = {}
+    # Each unmapped field gets its own constant column: the frame is assembled without copying,
+    # so a shared column would alias every field it fills
+    def blank() -> pd.Series:
+        return _constant_column(len(df), "")
+
+    def missing() -> pd.Series:
+        return _constant_column(len(df), None)
 
     # Names
-    data["First_Name"] = coerce_str(df[mapping["First_Name"]]) if "First_Name" in mapping else pd.Series(["" for _ in range(len(df))])
-    data["Last_Name"] = coerce_str(df[mapping["Last_Name"]]) if "Last_Name" in mapping else pd.Series(["" for _ in range(len(df))])
+    data["First_Name"] = coerce_str(df[mapping["First_Name"]]) if "First_Name" in mapping else blank()
+    data["Last_Name"] = coerce_str(df[mapping["Last_Name"]]) if "Last_Name" in mapping else blank()
     data["FullName"] = derive_fullname(df, mapping)
 
     # Contact
-    data["Email"] = coerce_str(df[mapping["Email"]]) if "Email" in mapping else pd.Series(["" for _ in range(len(df))])
+    data["Email"] = coerce_str(df[mapping["Email"]]) if "Email" in mapping else blank()
     # Numbers
-    home_num = df[mapping["Home_Phone"]] if "Home_Phone" in mapping else pd.Series(["" for _ in range(len(df))])
-    mobile_num = df[mapping["Mobile_Phone"]] if "Mobile_Phone" in mapping else pd.Series(["" for _ in range(len(df))])
-    work_num = df[mapping["Work_Phone"]] if "Work_Phone" in mapping else pd.Series(["" for _ in range(len(df))])
-    phone2_num = df[mapping["Phone2"]] if "Phone2" in mapping else pd.Series(["" for _ in range(len(df))])
+    home_num = df[mapping["Home_Phone"]] if "Home_Phone" in mapping else None
+    mobile_num = df[mapping["Mobile_Phone"]] if "Mobile_Phone" in mapping else None
+    work_num = df[mapping["Work_Phone"]] if "Work_Phone" in mapping else None
+    phone2_num = df[mapping["Phone2"]] if "Phone2" in mapping else None
     # Area codes (scoped, else generic AreaCode)
     ac_generic = df[mapping["AreaCode"]] if "AreaCode" in mapping else None
     ac_home = df[mapping["Home_AreaCode"]] if "Home_AreaCode" in mapping else ac_generic
@@ -262,10 +598,11 @@ def build_canonical_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str
     ac_work = df[mapping["Work_AreaCode"]] if "Work_AreaCode" in mapping else ac_generic
     ac_p2 = df[mapping["Phone2_AreaCode"]] if "Phone2_AreaCode" in mapping else ac_generic
 
-    data["Home_Phone"] = _merge_area_code(ac_home, home_num)
-    data["Mobile_Phone"] = _merge_area_code(ac_mobile, mobile_num)
-    data["Work_Phone"] = _merge_area_code(ac_work, work_num)
-    data["Phone2"] = _merge_area_code(ac_p2, phone2_num)
+    # An unmapped number normalizes to blanks whatever the area code
+    data["Home_Phone"] = _merge_area_code(ac_home, home_num) if home_num is not None else blank()
+    data["Mobile_Phone"] = _merge_area_code(ac_mobile, mobile_num) if mobile_num is not None else blank()
+    data["Work_Phone"] = _merge_area_code(ac_work, work_num) if work_num is not None else blank()
+    data["Phone2"] = _merge_area_code(ac_p2, phone2_num) if phone2_num is not None else blank()
 
     # Address
     a1, a2, city, state, zipc = assemble_address(df, mapping)
@@ -273,15 +610,15 @@ def build_canonical_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str
 
     # Vehicle basics
     for canon in ["VIN", "Make", "Model", "Year", "Vehicle_Condition", "Mileage", "Term"]:
-        data[canon] = df[mapping[canon]] if canon in mapping else pd.Series([None for _ in range(len(df))])
+        data[canon] = df[mapping[canon]] if canon in mapping else missing()
 
     # Store/Deal/CustomerID
     for canon in ["Store", "Deal_Number", "CustomerID"]:
-        data[canon] = coerce_str(df[mapping[canon]]) if canon in mapping else pd.Series(["" for _ in range(len(df))])
+        data[canon] = coerce_str(df[mapping[canon]]) if canon in mapping else blank()
 
     # Distance / Delivery
-    data["Distance"] = df[mapping["Distance"]] if "Distance" in mapping else pd.Series([None for _ in range(len(df))])
-    data["Delivery_Miles"] = df[mapping["Delivery_Miles"]] if "Delivery_Miles" in mapping else pd.Series([None for _ in range(len(df))])
+    data["Distance"] = df[mapping["Distance"]] if "Distance" in mapping else missing()
+    data["Delivery_Miles"] = df[mapping["Delivery_Miles"]] if "Delivery_Miles" in mapping else missing()
     data["DeliveryDate"] = choose_delivery_date(df, mapping)
 
     # Preserve original row number if present
@@ -296,9 +633,29 @@ def build_canonical_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, str
             out_cols.append(col)
             out_data[col] = data[col]
 
-    out_df = pd.DataFrame(out_data)
+    # No copy: the columns are new Series or columns of the normalized working frame
+    out_df = pd.DataFrame(out_data, copy=False)
     if "__ROWNUM" in data and "__ROWNUM" not in out_df.columns:
         out_df["__ROWNUM"] = data["__ROWNUM"]
+    # Typed effective date shared by the delivery-age filter, dedupe and the audits
+    out_df["__EffectiveDate"] = data["DeliveryDate"]
+    # Typed Year and Distance for the model-year and distance filters, parsed once
+    for canon, dtype in NUMERIC_FIELDS.items():
+        out_df[f"__{canon}"] = parse_numeric(data[canon], dtype)
+    # Arrow string mode: fields built from Python values (phones, blanks) join the same storage
+    arrow_dtype = _arrow_string_dtype(df)
+    if arrow_dtype is not None:
+        for col in out_df.columns:
+            dt = out_df[col].dtype
+            if dt == object or (isinstance(dt, pd.StringDtype) and dt != arrow_dtype):
+                out_df[col] = out_df[col].astype(arrow_dtype)
+    # Address key for dedupe and its audits, built once per frame
+    out_df["__AddressKey"] = address_key_series(out_df)
+    # Low-cardinality mapped fields become categoricals; filters compare their codes and
+    # decode_compact_dtypes restores plain strings at the output edge
+    for col in CATEGORY_FIELDS:
+        if col in mapping and col in out_df.columns:
+            out_df[col] = _encode_low_cardinality(out_df[col])
     return out_df, mapping, warnings
 
 
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import datetime as _dt
+import hashlib
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+import pandas as pd
+
+
+log = logging.getLogger(__name__)
+
+# Strings pandas' default na_values turn into NaN; blanked here so streamed sheets match
+# pd.read_excel(dtype=str).fillna("") cell for cell.
+_NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+# Excel error literals (values_only returns them as plain strings)
+_EXCEL_ERRORS = frozenset({"#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A", "#GETTING_DATA"})
+
+XLSX_BATCH_ROWS = 50_000
+
+# Parsed-input cache: Arrow IPC files named by content hash + reader options, LRU by mtime
+INPUT_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Bump when reader output changes so stale cache entries are not reused
+_CACHE_FORMAT_VERSION = 1
+
+SheetName = Union[str, int, None]
+
+# Opt-in Arrow-backed string storage (run_pipeline(arrow_strings=True)); needs pyarrow
+ARROW_STRING_DTYPE = "string[pyarrow]"
+
+
+def _cell_to_str(v) -> str:
+    """Convert a raw openpyxl cell value the way pandas' openpyxl reader + dtype=str would."""
+    if v is None:
+        return ""
+    if isinstance(v, str):
+        return "" if v in _NA_STRINGS or v in _EXCEL_ERRORS else v
+    if isinstance(v, bool):
+        return str(v)
+    if isinstance(v, (int, float)):
+        # Integral floats are written without the trailing .0 (e.g. 2020.0 -> "2020")
+        try:
+            iv = int(v)
+        except (OverflowError, ValueError):
+            return str(v)
+        return str(iv) if iv == v else str(float(v))
+    if isinstance(v, _dt.date) and not isinstance(v, _dt.datetime):
+        v = _dt.datetime(v.year, v.month, v.day)
+    return str(v)
+
+
+def _header_names(cells: Sequence) -> List[str]:
+    """Header labels as pandas builds them: blanks become 'Unnamed: i', duplicates get '.1', '.2' suffixes."""
+    raw = list(cells)
+    while raw and (raw[-1] is None or raw[-1] == ""):
+        raw.pop()
+    names = [f"Unnamed: {i}" if v is None or v == "" else str(v) for i, v in enumerate(raw)]
+    counts: defaultdict = defaultdict(int)
+    for i, col in enumerate(names):
+        cur_count = counts[col]
+        while cur_count > 0:
+            counts[col] = cur_count + 1
+            col = f"{col}.{cur_count}"
+            cur_count = counts[col]
+        names[i] = col
+        counts[col] = cur_count + 1
+    return names
+
+
+def _select_sheet(wb, input_path: str, sheet_name: SheetName):
+    if sheet_name is None:
+        return wb.worksheets[0]
+    if isinstance(sheet_name, int):
+        if not 0 <= sheet_name < len(wb.worksheets):
+            raise ValueError(f"Worksheet index {sheet_name} out of range for {input_path} ({len(wb.worksheets)} sheets)")
+        return wb.worksheets[sheet_name]
+    if sheet_name not in wb.sheetnames:
+        raise ValueError(f"Worksheet '{sheet_name}' not found in {input_path}; available: {', '.join(wb.sheetnames)}")
+    return wb[sheet_name]
+
+
+def iter_xlsx_frames(
+    input_path: str,
+    sheet_name: SheetName = None,
+    batch_size: int = XLSX_BATCH_ROWS,
+    usecols: Optional[Sequence[str]] = None,
+) -> Iterator[pd.DataFrame]:
+    """Stream one worksheet as string DataFrames of up to batch_size rows.
+
+    Uses openpyxl's read-only mode and reads cell values only, so no cell objects or full-sheet
+    row lists are kept. The first row is the header; cells to the right of the last header are
+    ignored and trailing blank rows are dropped, as with pd.read_excel.
+    sheet_name may be a sheet name or a 0-based index; None reads the first sheet.
+    usecols keeps only those columns (labels as built for the header); other cells are not
+    converted, but still count when deciding whether a row is blank.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(input_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = _select_sheet(wb, input_path, sheet_name)
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = _header_names(header)
+        width = len(columns)
+        positions = None
+        if usecols is not None:
+            wanted = set(usecols)
+            positions = [i for i, c in enumerate(columns) if c in wanted]
+            columns = [columns[i] for i in positions]
+        batch: List[List[str]] = []
+        pending_blank = 0
+        for values in rows:
+            if positions is None:
+                rec = [_cell_to_str(v) for v in values[:width]]
+                if len(rec) < width:
+                    rec.extend([""] * (width - len(rec)))
+                blank = not any(rec)
+            else:
+                rec = [_cell_to_str(values[i]) if i < len(values) else "" for i in positions]
+                blank = not any(rec) and not any(_cell_to_str(v) for v in values[:width] if v is not None)
+            if blank:
+                # Hold blank rows back until a later row shows they are not trailing
+                pending_blank += 1
+                continue
+            while pending_blank:
+                batch.append([""] * len(columns))
+                pending_blank -= 1
+                if len(batch) >= batch_size:
+                    yield pd.DataFrame(batch, columns=columns, dtype=str)
+                    batch = []
+            batch.append(rec)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=columns, dtype=str)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, dtype=str)
+    finally:
+        wb.close()
+
+
+def read_xlsx(input_path: str, sheet_name: SheetName = None, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read a whole worksheet as strings via iter_xlsx_frames (empty cells become "")."""
+    frames = list(iter_xlsx_frames(input_path, sheet_name=sheet_name, usecols=usecols))
+    if not frames:
+        return pd.DataFrame(dtype=str)
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_csv_arrow(input_path: str, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Read a CSV with pyarrow's multithreaded reader, every column as string[pyarrow].
+
+    Column types are pinned to string so dates/numbers are not re-rendered, and null detection is
+    off so empty cells stay "", matching pd.read_csv(dtype=str, keep_default_na=False).
+    usecols keeps only those columns (labels as pandas names them), in file order.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    # Header via pandas so duplicate labels get the same '.1' suffixes as the default reader
+    names = list(pd.read_csv(input_path, nrows=0).columns)
+    table = pacsv.read_csv(
+        input_path,
+        read_options=pacsv.ReadOptions(column_names=names, skip_rows=1),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=[n for n in names if n in set(usecols)] if usecols is not None else [],
+            column_types={n: pa.string() for n in names},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False,
+            null_values=[],
+        ),
+    )
+    dtype = pd.StringDtype("pyarrow")
+    return table.to_pandas(types_mapper={pa.string(): dtype, pa.large_string(): dtype}.get)
+
+
+def _file_digest(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_key(input_path: str, options: Dict) -> str:
+    opts = json.dumps({"v": _CACHE_FORMAT_VERSION, **options}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{_file_digest(input_path)}|{opts}".encode()).hexdigest()
+
+
+def _evict_lru(cache_dir: str, max_bytes: int, keep: str) -> None:
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".arrow"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+
+
+def read_cached(
+    input_path: str,
+    parse: Callable[[], pd.DataFrame],
+    options: Dict,
+    cache_dir: str,
+    max_bytes: int = INPUT_CACHE_MAX_BYTES,
+) -> pd.DataFrame:
+    """Return parse() for input_path, reusing a columnar copy from cache_dir when one exists.
+
+    Entries are keyed by the file's content hash plus the reader options, so a renamed or
+    re-downloaded copy of the same export still hits, and any edit misses. Hits memory-map the
+    Arrow IPC file instead of re-parsing text. Least recently used entries are evicted once the
+    directory exceeds max_bytes. Requires pyarrow; without it the file is parsed uncached.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        log.warning("CACHE: pyarrow is not installed; reading without cache")
+        return parse()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, _cache_key(input_path, options) + ".arrow")
+    if os.path.exists(path):
+        try:
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            df = table.to_pandas()
+            os.utime(path, None)
+            log.info(f"CACHE: hit {path}")
+            return df
+        except Exception as e:
+            log.warning(f"CACHE: unreadable entry {path}, re-parsing: {e}")
+
+    df = parse()
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        _evict_lru(cache_dir, max_bytes, keep=path)
+    except Exception as e:
+        log.warning(f"CACHE: failed to write {path}: {e}")
+    return df
@@ -1,46 +1,359 @@
 from __future__ import annotations
 
+import logging
 import os
-from typing import Tuple
-from datetime import datetime
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
+from audit_sink import AuditSink
 from constants import PRESETS, CANONICAL_OUTPUT_ORDER
-from preprocess import build_canonical_frame
+from preprocess import build_canonical_frame, decode_compact_dtypes, detect_canonical_mapping, find_csz_columns, source_columns_for, _pre_trim_normalize
+from read_inputs import ARROW_STRING_DTYPE, SheetName, iter_xlsx_frames, read_cached, read_csv_arrow, read_xlsx
 from schema_detection import detect_schema
 from filters import (
     find_vin_explosion_column,
     explode_vins_on_raw,
     delete_duplicates,
-    filter_address_present,
-    filter_cobuyers,
-    filter_name_present,
-    filter_out_of_state,
-    filter_model_year,
-    filter_delivery_age,
-    filter_distance,
-    filter_corporate,
+    enabled_row_filters,
+    apply_row_filters,
+    describe_drop_mask,
+    drop_reason_bit,
+    keep_distance,
+    DROP_REASON_CODES,
 )
-from write_results import write_xlsx, write_multi_sheet
+from write_results import OUTPUT_FORMATS, write_output
 
 
-def _read_any(input_path: str) -> pd.DataFrame:
+log = logging.getLogger(__name__)
+
+
+def _read_any(
+    input_path: str,
+    sheet_name: SheetName = None,
+    cache_dir: Optional[str] = None,
+    arrow_strings: bool = False,
+    usecols: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Read a whole input file as strings; usecols (labels as the reader names them) limits the columns."""
     ext = os.path.splitext(input_path)[1].lower()
-    if ext in {".csv", ".txt"}:
-        df = pd.read_csv(input_path, dtype=str, keep_default_na=False)
-    elif ext in {".xlsx", ".xlsm"}:
-        df = pd.read_excel(input_path, dtype=str)
-        df = df.fillna("")
-    else:
+    if ext not in {".csv", ".txt", ".xlsx", ".xlsm"}:
         raise ValueError(f"Unsupported input extension: {ext}")
+
+    def parse() -> pd.DataFrame:
+        if ext in {".xlsx", ".xlsm"}:
+            df = read_xlsx(input_path, sheet_name=sheet_name, usecols=usecols)
+            return df.astype(ARROW_STRING_DTYPE) if arrow_strings else df
+        if arrow_strings:
+            return read_csv_arrow(input_path, usecols=usecols)
+        if usecols is not None:
+            # Select by position so duplicate headers keep the '.1' suffixes of a full read
+            header = list(pd.read_csv(input_path, nrows=0).columns)
+            positions = [i for i, c in enumerate(header) if c in set(usecols)]
+            return pd.read_csv(input_path, dtype=str, keep_default_na=False, usecols=positions)
+        return pd.read_csv(input_path, dtype=str, keep_default_na=False)
+
+    if cache_dir:
+        options = {"ext": ext, "sheet_name": sheet_name, "arrow_strings": arrow_strings, "usecols": usecols}
+        df = read_cached(input_path, parse, options, cache_dir)
+    else:
+        df = parse()
     df = df.copy()
     df["__ROWNUM"] = (df.reset_index().index + 2).astype(int)
     return df
 
 
-def run_pipeline(input_csv_path: str, with_audits: bool = False) -> Tuple[pd.DataFrame, str]:
-    raw = _read_any(input_csv_path)
+def _read_sample(input_path: str, nrows: int) -> pd.DataFrame:
+    """First nrows data rows of a CSV with every column, numbered like _read_any."""
+    df = pd.read_csv(input_path, dtype=str, keep_default_na=False, nrows=nrows)
+    df["__ROWNUM"] = range(2, 2 + len(df))
+    return df
+
+
+def _iter_chunks(input_path: str, chunksize: int, sheet_name: SheetName = None, arrow_strings: bool = False) -> Iterator[pd.DataFrame]:
+    """Yield the input in chunks of up to chunksize rows, with __ROWNUM continuing across chunks."""
+    ext = os.path.splitext(input_path)[1].lower()
+    if ext in {".csv", ".txt"}:
+        chunks = pd.read_csv(input_path, dtype=str, keep_default_na=False, chunksize=chunksize)
+    elif ext in {".xlsx", ".xlsm"}:
+        chunks = iter_xlsx_frames(input_path, sheet_name=sheet_name, batch_size=chunksize)
+    else:
+        raise ValueError(f"Unsupported input extension: {ext}")
+    offset = 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        if arrow_strings:
+            chunk = chunk.astype(ARROW_STRING_DTYPE)
+        chunk["__ROWNUM"] = range(offset + 2, offset + 2 + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+# Leading rows that detection and composite City/State/Zip discovery run on for whole-file runs.
+# Plain CSV runs read them first and then load only the columns the mapping uses; files no
+# longer than this are read once.
+DETECT_SAMPLE_ROWS = 50_000
+# Canonical columns needed after the row-local filters: the distance gate and the dedupe passes
+STREAM_KEY_COLUMNS = ["VIN", "Deal_Number", "Address1", "City", "State", "Zip", "DeliveryDate", "__EffectiveDate", "__AddressKey", "__Distance"]
+# Schema detection's value scoring and tie-breakers depend on sample size, so the first chunk
+# handed to detection is grown to at least this many rows
+STREAM_DETECT_MIN_ROWS = 50_000
+
+
+def _merge_leading_chunks(chunks: Iterator[pd.DataFrame], min_rows: int) -> Iterator[pd.DataFrame]:
+    """Concatenate leading chunks until at least min_rows rows, then pass the rest through unchanged."""
+    head: List[pd.DataFrame] = []
+    n = 0
+    for chunk in chunks:
+        if n >= min_rows:
+            yield chunk
+            continue
+        head.append(chunk)
+        n += len(chunk)
+        if n >= min_rows:
+            yield pd.concat(head, ignore_index=True)
+            head = []
+    if head:
+        yield pd.concat(head, ignore_index=True)
+
+
+def _apply_row_local_filters(can_df: pd.DataFrame, steps: Dict[str, List[int]]) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Apply the enabled per-row presets (everything except distance and dedupe) to one chunk.
+    Accumulates [before, after] counts into steps; returns the kept rows and the address-dropped rows.
+    """
+    row_filters = enabled_row_filters(PRESETS, include_distance=False)
+    reason, _ = apply_row_filters(can_df, row_filters)
+    address_dropped = None
+    remaining = len(can_df)
+    for f in row_filters:
+        dropped = reason == f.code
+        acc = steps.setdefault(f.name, [0, 0])
+        acc[0] += remaining
+        remaining -= int(dropped.sum())
+        acc[1] += remaining
+        if f.name == "address_present":
+            drop_cols = [c for c in ["__ROWNUM", "Address1", "Address2", "City", "State", "Zip", "Store", "VIN"] if c in can_df.columns]
+            address_dropped = can_df.loc[dropped, drop_cols]
+    return can_df.loc[reason == 0], address_dropped
+
+
+def _log_mapping(mapping: Dict[str, str]) -> None:
+    """Report the source column picked for each key field."""
+    lines = [f"  {k}: {mapping.get(k, '<none>')}" for k in ["VIN", "Address1", "Address2", "City", "State", "Zip"]]
+    log.info("MAPPING:\n" + "\n".join(lines))
+
+
+def _log_steps(steps: List[tuple]) -> None:
+    """Report row counts per step: (name, rows) for the initial count, (name, before, after) otherwise."""
+    for step in steps:
+        if len(step) == 3:
+            log.info(f"{step[0]}: {step[1]} -> {step[2]}")
+        else:
+            log.info(f"{step[0]}: {step[1]}")
+
+
+# Readable subset of canonical columns for the per-step audit sets
+AUDIT_COLUMNS = ["__ROWNUM", "Store", "VIN", "Deal_Number", "FullName", "Address1", "City", "State", "Zip", "Year", "DeliveryDate", "__EffectiveDate"]
+
+
+def _pick_audit_cols(df: pd.DataFrame) -> pd.DataFrame:
+    cols = [c for c in AUDIT_COLUMNS if c in df.columns]
+    return df[cols] if cols else df
+
+
+def _audit_set(can_df: pd.DataFrame, code: int) -> pd.DataFrame:
+    """Audit rows for one drop-reason code, with every step that would have dropped each row."""
+    rows = can_df["__DropReason"].to_numpy() == code
+    out = _pick_audit_cols(can_df.loc[rows]).copy()
+    out["Would_Drop"] = describe_drop_mask(can_df["__DropMask"].to_numpy()[rows])
+    return out
+
+
+def _all_vin_occurrences(df_before: pd.DataFrame, kept_idx: set) -> pd.DataFrame:
+    """Every row whose VIN appears more than once before dedupe, tagged kept/dropped."""
+    vin_counts = df_before["VIN"].value_counts()
+    dup_vins = set(vin_counts[vin_counts > 1].index)
+    all_dupes = df_before[df_before["VIN"].isin(dup_vins)].copy()
+    all_dupes["Status"] = all_dupes["___IDX_ALL"].apply(lambda i: "kept" if i in kept_idx else "dropped")
+    audit_cols = [c for c in ["__ROWNUM", "Status", "VIN", "Deal_Number", "DeliveryDate", "Store", "FullName", "Address1", "City", "State", "Zip", "Year"] if c in all_dupes.columns]
+    if "DeliveryDate" in all_dupes.columns:
+        return all_dupes[audit_cols].sort_values(["VIN", "DeliveryDate"])
+    return all_dupes[audit_cols].sort_values(["VIN"])
+
+
+def _run_pipeline_streaming(
+    input_path: str,
+    chunksize: int,
+    sink: AuditSink,
+    sheet_name: SheetName = None,
+    cache_dir: Optional[str] = None,
+    arrow_strings: bool = False,
+    detect_workers: int = 1,
+) -> Tuple[pd.DataFrame, str]:
+    """Bounded-memory variant of run_pipeline for very large CSV/XLSX exports.
+
+    Schema (and composite City/State/Zip columns) is detected once on the first chunk (at least
+    STREAM_DETECT_MIN_ROWS rows) and reused.
+    Each chunk goes through canonicalization and the row-local filters, then is spooled to a
+    temporary directory; only STREAM_KEY_COLUMNS are kept in memory for the global distance gate
+    and delete_duplicates. A second pass over the spool collects the surviving rows.
+    Dropped-row lists are appended to the sink's CSVs only (XLSX cannot hold multi-million-row sheets).
+    """
+    mapping: Optional[Dict[str, str]] = None
+    csz_cols: Optional[List[str]] = None
+    vin_col = None
+    vin_list_col = None
+    initial = 0
+    steps: Dict[str, List[int]] = {}
+    key_parts: List[pd.DataFrame] = []
+
+    with tempfile.TemporaryDirectory(prefix="salesfilter_") as spool_dir:
+        part_paths: List[str] = []
+        chunks = _merge_leading_chunks(_iter_chunks(input_path, chunksize, sheet_name=sheet_name, arrow_strings=arrow_strings), STREAM_DETECT_MIN_ROWS)
+        for i, raw in enumerate(chunks):
+            if i == 0:
+                for c in raw.columns:
+                    if c.strip().lower() == "vin":
+                        vin_col = c
+                        break
+                vin_list_col = find_vin_explosion_column(raw) if PRESETS.get("vin_explosion") else None
+            if vin_list_col is not None:
+                raw = explode_vins_on_raw(raw, vin_col=vin_col, vin_list_col=vin_list_col).reset_index(drop=True)
+            if mapping is None:
+                if raw.empty:
+                    continue
+                csz_cols = find_csz_columns(_pre_trim_normalize(raw.head(200)))
+                can_df, mapping, warnings = build_canonical_frame(raw, csz_cols=csz_cols, schema_cache_dir=cache_dir, detect_workers=detect_workers)
+                _log_mapping(mapping)
+            else:
+                can_df, _, _ = build_canonical_frame(raw, mapping=mapping, csz_cols=csz_cols)
+            can_df["___IDX_ALL"] = range(initial, initial + len(can_df))
+            initial += len(can_df)
+
+            can_df, address_dropped = _apply_row_local_filters(can_df, steps)
+            if address_dropped is not None and not address_dropped.empty:
+                sink.write_csv("address_dropped", address_dropped, "ADDRESS DROPPED")
+
+            part_path = os.path.join(spool_dir, f"part_{i:06d}.pkl")
+            can_df.to_pickle(part_path)
+            part_paths.append(part_path)
+            key_parts.append(can_df[[c for c in STREAM_KEY_COLUMNS + ["___IDX_ALL"] if c in can_df.columns]])
+
+        if mapping is None:
+            raise ValueError(f"No rows to process in {input_path}")
+
+        keys = pd.concat(key_parts, ignore_index=True)
+        key_parts.clear()
+        step_list: List[tuple] = [("initial", initial)]
+        step_list.extend((name, b, a) for name, (b, a) in steps.items())
+
+        # Distance gate is file-wide (share of valid distances), so it runs on the collected keys
+        df_conf = PRESETS.get("distance_filter", {})
+        if df_conf.get("enabled"):
+            before = len(keys)
+            keys = keys.loc[keep_distance(keys, df_conf.get("max_miles", 100))]
+            step_list.append(("distance", before, len(keys)))
+
+        if "VIN" in keys.columns and log.isEnabledFor(logging.DEBUG):
+            vin_series = keys["VIN"].fillna("").astype(str).str.strip().str.upper()
+            log.debug(f"VIN DIAG: unique={vin_series.nunique(dropna=True)} of {len(vin_series)}, pct_len17={(vin_series.str.len() == 17).mean():.2%}")
+
+        survivors = keys["___IDX_ALL"]
+        kept_order = survivors
+        if PRESETS.get("delete_duplicates"):
+            before = len(keys)
+            deduped, _ = delete_duplicates(keys)
+            kept_order = deduped["___IDX_ALL"]
+            step_list.append(("dedupe", before, len(deduped)))
+        del keys
+
+        # Second pass: collect kept rows; rows that survived filtering but lost dedupe go to the sidecar
+        survivor_set = set(survivors.tolist())
+        kept_set = set(kept_order.tolist())
+        kept_parts: List[pd.DataFrame] = []
+        for part_path in part_paths:
+            part = pd.read_pickle(part_path)
+            in_survivors = part["___IDX_ALL"].isin(survivor_set)
+            is_kept = part["___IDX_ALL"].isin(kept_set)
+            kept_parts.append(part.loc[is_kept])
+            dropped = part.loc[in_survivors & ~is_kept]
+            if not dropped.empty:
+                drop_cols = [c for c in ["__ROWNUM", "VIN", "Deal_Number", "DeliveryDate", "Store", "FullName", "Address1", "City", "State", "Zip", "Year"] if c in dropped.columns]
+                sink.write_csv("dedupe_dropped", dropped[drop_cols], "DEDUPE DROPPED")
+
+    can_df = pd.concat(kept_parts, ignore_index=True)
+    # Restore the row order delete_duplicates produced
+    can_df = can_df.set_index("___IDX_ALL").loc[kept_order.tolist()].reset_index(drop=True)
+    present = [c for c in CANONICAL_OUTPUT_ORDER if c in can_df.columns]
+    out_df = decode_compact_dtypes(can_df.loc[:, present])
+
+    out_path = write_output(out_df, input_path, output_format=sink.output_format)
+    _log_steps(step_list)
+    return out_df, out_path
+
+
+def run_pipeline(
+    input_csv_path: str,
+    with_audits: bool = False,
+    chunksize: Optional[int] = None,
+    sheet_name: SheetName = None,
+    cache_dir: Optional[str] = None,
+    arrow_strings: bool = False,
+    output_format: str = "xlsx",
+    detect_workers: int = 1,
+) -> Tuple[pd.DataFrame, str]:
+    """Run the fixed presets on one file and write the filtered output.
+    With chunksize, the input is streamed in chunks of that many rows (see _run_pipeline_streaming).
+    sheet_name picks the worksheet of an .xlsx/.xlsm input (name or 0-based index; default first).
+    Without chunksize, the schema is detected on the first DETECT_SAMPLE_ROWS rows. Plain CSV
+    files longer than that are read in two phases: the leading rows, then only the source columns
+    the mapping uses. With cache_dir or arrow_strings, and for XLSX inputs, the whole file is
+    parsed once instead and the sample is its head.
+    cache_dir enables the parsed-input cache for that read (see read_inputs.read_cached)
+    and the schema-mapping cache (see schema_detection.detect_schema_cached).
+    arrow_strings reads every column as string[pyarrow] and keeps that storage through
+    canonicalization and the filters (needs pyarrow).
+    output_format is one of OUTPUT_FORMATS: "xlsx" (default), "csv" (gzip), "parquet" or "feather"
+    (the last two need pyarrow). It applies to the filtered output and the XLSX review sidecars;
+    with a columnar format, audits are written as a directory with one file per step.
+    Each audit sheet lists the rows that step dropped first; its Would_Drop column names every
+    step that rejects the row (see filters.DROP_REASONS).
+    Progress goes to logging: INFO for the mapping, step counts and sidecar paths, DEBUG for
+    dropped-row samples and VIN stats, which are only computed when DEBUG is enabled.
+    detect_workers > 1 spreads schema detection over that many threads (header matching) and
+    processes (column value tests), for very wide sheets; the mapping is the same as with one.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    if chunksize and with_audits:
+        raise ValueError("with_audits is not supported in chunked streaming mode")
+    # Sidecar files are written by the sink's background thread; leaving the block waits for them
+    with AuditSink(input_csv_path, output_format=output_format) as sink:
+        if chunksize:
+            return _run_pipeline_streaming(input_csv_path, chunksize, sink, sheet_name=sheet_name, cache_dir=cache_dir, arrow_strings=arrow_strings, detect_workers=detect_workers)
+        return _run_pipeline_in_memory(input_csv_path, sink, with_audits=with_audits, sheet_name=sheet_name, cache_dir=cache_dir, arrow_strings=arrow_strings, detect_workers=detect_workers)
+
+
+def _run_pipeline_in_memory(
+    input_csv_path: str,
+    sink: AuditSink,
+    with_audits: bool = False,
+    sheet_name: SheetName = None,
+    cache_dir: Optional[str] = None,
+    arrow_strings: bool = False,
+    detect_workers: int = 1,
+) -> Tuple[pd.DataFrame, str]:
+    # Plain CSV runs read header and leading rows first, then only the mapped columns. Cached,
+    # Arrow and XLSX runs parse the whole file once (or hit the cache) and detect on its head.
+    ext = os.path.splitext(input_csv_path)[1].lower()
+    full = None
+    if cache_dir or arrow_strings or ext in {".xlsx", ".xlsm"}:
+        full = _read_any(input_csv_path, sheet_name=sheet_name, cache_dir=cache_dir, arrow_strings=arrow_strings)
+        raw = full.head(DETECT_SAMPLE_ROWS)
+    else:
+        raw = _read_sample(input_csv_path, DETECT_SAMPLE_ROWS)
+    whole_file = len(raw) < DETECT_SAMPLE_ROWS
 
     # Optional VIN explosion on raw
     vin_col = None
@@ -52,247 +365,119 @@ def run_pipeline(input_csv_path: str, with_audits: bool = False) -> Tuple[pd.Dat
     if vin_list_col is not None:
         raw = explode_vins_on_raw(raw, vin_col=vin_col, vin_list_col=vin_list_col)
 
-    # Build canonical frame
-    can_df, mapping, warnings = build_canonical_frame(raw)
+    if whole_file:
+        # Build canonical frame
+        can_df, mapping, warnings = build_canonical_frame(raw, schema_cache_dir=cache_dir, detect_workers=detect_workers)
+    else:
+        # Phase two: detect on the sample, then load only the source columns the mapping needs
+        mapping, warnings, csz_cols = detect_canonical_mapping(raw, schema_cache_dir=cache_dir, detect_workers=detect_workers)
+        if full is None:
+            file_cols = [c for c in raw.columns if c != "__ROWNUM"]
+            needed = set(source_columns_for(file_cols, mapping, csz_cols)) | {vin_col, vin_list_col}
+            usecols = [c for c in file_cols if c in needed]
+            del raw
+            raw = _read_any(input_csv_path, usecols=usecols)
+        else:
+            raw = full
+        if vin_list_col is not None:
+            raw = explode_vins_on_raw(raw, vin_col=vin_col, vin_list_col=vin_list_col)
+        can_df, _, _ = build_canonical_frame(raw, mapping=mapping, csz_cols=csz_cols)
+
     # Mapping report for key fields
-    report_keys = ["VIN", "Address1", "Address2", "City", "State", "Zip"]
-    print("MAPPING:")
-    for k in report_keys:
-        src = mapping.get(k, "<none>")
-        print(f"  {k}: {src}")
+    _log_mapping(mapping)
+    # Samples and VIN stats are only computed when DEBUG output will actually be shown
+    diagnostics = log.isEnabledFor(logging.DEBUG)
 
     steps = []
-    # Track drops per step for optional multi-sheet audit
-    audits: dict[str, pd.DataFrame] = {}
     steps.append(("initial", len(can_df)))
 
     # Add a stable row id for tracking drops across steps
-    can_df = can_df.copy()
     can_df["___IDX_ALL"] = range(len(can_df))
 
-    # Corporate/dealer exclusion
-    if PRESETS.get("exclude_corporate"):
-        before_df = can_df.copy()
-        before = len(can_df)
-        can_df, removed = filter_corporate(can_df)
-        steps.append(("exclude_corporate", before, len(can_df)))
-        if with_audits:
-            dropped_mask = ~before_df["___IDX_ALL"].isin(can_df["___IDX_ALL"])
-            audits["Dropped_exclude_corporate"] = before_df.loc[dropped_mask].copy()
-
-    # Co-buyer exclusion removed per spec; handled via negative keywords in mapping
-
-    # Name present
-    if PRESETS.get("name_present"):
-        before = len(can_df)
-        # Debug: compute mask before filtering to show what will be dropped
-        if "Last_Name" in can_df.columns:
-            last_dbg = can_df["Last_Name"].fillna("").astype(str).str.strip()
-            name_keep_mask = last_dbg != ""
-            name_drop = can_df.loc[~name_keep_mask, [c for c in ["First_Name", "Last_Name", "FullName", "Store", "VIN"] if c in can_df.columns]].head(20)
+    # Every enabled per-row preset is evaluated as a keep mask over the same frame; each row gets
+    # a drop-reason code and would-drop bitmask, counts come from those and the survivors are
+    # materialized once afterwards
+    # (co-buyer exclusion is not a preset; handled via negative keywords in mapping)
+    row_filters = enabled_row_filters(PRESETS)
+    reason, would_drop = apply_row_filters(can_df, row_filters)
+    remaining = len(can_df)
+    for f in row_filters:
+        mask = reason == f.code
+        steps.append((f.name, remaining, remaining - int(mask.sum())))
+        remaining = steps[-1][2]
+        if f.name == "name_present" and diagnostics:
+            name_drop = can_df.loc[mask, [c for c in ["First_Name", "Last_Name", "FullName", "Store", "VIN"] if c in can_df.columns]].head(20)
             if not name_drop.empty:
-                print("NAME DROPPED SAMPLE (first 20):")
-                print(name_drop.to_string(index=False))
-        can_df, removed = filter_name_present(can_df)
-        steps.append(("name_present", before, len(can_df)))
-
-    # Address present
-    if PRESETS.get("address_present"):
-        before_df = can_df.copy()
-        before = len(can_df)
-        # Debug: compute mask before filtering to show what will be dropped
-        a1 = can_df["Address1"].fillna("").astype(str).str.strip() if "Address1" in can_df.columns else None
-        a2 = can_df["Address2"].fillna("").astype(str).str.strip() if "Address2" in can_df.columns else None
-        city = can_df["City"].fillna("").astype(str).str.strip() if "City" in can_df.columns else None
-        state = can_df["State"].fillna("").astype(str).str.strip() if "State" in can_df.columns else None
-        zipc = can_df["Zip"].fillna("").astype(str).str.strip() if "Zip" in can_df.columns else None
-        if a1 is not None and a2 is not None and city is not None and state is not None and zipc is not None:
-            po_mask_dbg = a2.str.contains(r"(?i)\bP\.?O\.?\s*BOX\b|\bPO\s*BOX\b")
-            a1_eff_dbg = a1.where(a1 != "", a2.where(po_mask_dbg, ""))
-            addr_keep_mask = (a1_eff_dbg != "") & (city != "") & (state != "") & (zipc != "")
+                log.debug("NAME DROPPED SAMPLE (first 20):\n" + name_drop.to_string(index=False))
+        if f.name == "address_present" and all(c in can_df.columns for c in ["Address1", "Address2", "City", "State", "Zip"]):
+            # Rows the filter dropped, with original row numbers
             addr_drop_cols = [c for c in ["__ROWNUM", "Address1", "Address2", "City", "State", "Zip", "Store", "VIN"] if c in can_df.columns]
-            addr_drop = can_df.loc[~addr_keep_mask, addr_drop_cols].head(20)
-            if not addr_drop.empty:
-                print("ADDRESS DROPPED SAMPLE (first 20):")
-                print(addr_drop.to_string(index=False))
-            # Save full dropped list to CSV with original row numbers
-            try:
-                base_dir = os.path.dirname(os.path.abspath(input_csv_path))
-                base_name = os.path.splitext(os.path.basename(input_csv_path))[0]
-                ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-                drop_path = os.path.join(base_dir, f"{base_name}_address_dropped_{ts}.csv")
-                can_df.loc[~addr_keep_mask, addr_drop_cols].to_csv(drop_path, index=False)
-                print(f"ADDRESS DROPPED: wrote full list to {drop_path}")
-            except Exception as e:
-                print(f"ADDRESS DROPPED: failed to write CSV: {e}")
-        can_df, removed = filter_address_present(can_df)
-        steps.append(("address_present", before, len(can_df)))
-        if with_audits:
-            dropped_mask = ~before_df["___IDX_ALL"].isin(can_df["___IDX_ALL"])
-            audits["Dropped_address_present"] = before_df.loc[dropped_mask].copy()
-
-    # Out of state
-    if PRESETS.get("delete_out_of_state"):
-        before_df = can_df.copy()
-        before = len(can_df)
-        can_df, removed = filter_out_of_state(can_df, PRESETS.get("home_state"))
-        steps.append(("out_of_state", before, len(can_df)))
-        if with_audits:
-            dropped_mask = ~before_df["___IDX_ALL"].isin(can_df["___IDX_ALL"])
-            audits["Dropped_out_of_state"] = before_df.loc[dropped_mask].copy()
-
-    # Model year
-    # Model year window: keep between min_year and max_year inclusive when enabled
-    my = PRESETS.get("model_year_filter", {})
-    if my.get("enabled"):
-        before_df = can_df.copy()
-        before = len(can_df)
-        miny = my.get("min_year")
-        maxy = my.get("max_year")
-        if miny is not None:
-            # Inclusive lower bound: >= miny implemented as > (miny-1)
-            can_df, _ = filter_model_year(can_df, "newer", (miny - 1))
-        if maxy is not None:
-            can_df, _ = filter_model_year(can_df, "older", maxy + 1)
-        steps.append(("model_year_window", before, len(can_df)))
-        if with_audits:
-            dropped_mask = ~before_df["___IDX_ALL"].isin(can_df["___IDX_ALL"])
-            audits["Dropped_model_year"] = before_df.loc[dropped_mask].copy()
-
-    # Delivery age
-    da = PRESETS.get("delivery_age_filter", {})
-    if da.get("enabled"):
-        before_df = can_df.copy()
-        before = len(can_df)
-        can_df, removed = filter_delivery_age(can_df, da.get("months", 18))
-        steps.append(("delivery_age", before, len(can_df)))
-        if with_audits:
-            dropped_mask = ~before_df["___IDX_ALL"].isin(can_df["___IDX_ALL"])
-            # Include raw date columns and effective date for clarity
-            dd = before_df.get("DeliveryDate")
-            sold = before_df.get("SoldDate") if "SoldDate" in before_df.columns else None
-            sale = before_df.get("SaleDate") if "SaleDate" in before_df.columns else None
-            last = before_df.get("Last_Date") if "Last_Date" in before_df.columns else None
-            eff = pd.to_datetime(before_df.get("DeliveryDate"), errors="coerce")
-            for col in ["SoldDate", "SaleDate", "Last_Date"]:
-                if col in before_df.columns:
-                    eff = eff.combine_first(pd.to_datetime(before_df[col], errors="coerce"))
-            dropped_da = before_df.loc[dropped_mask].copy()
-            dropped_da["__EffectiveDate"] = eff.loc[dropped_mask]
-            audits["Dropped_delivery_age"] = dropped_da
-
-    # Distance
-    df_conf = PRESETS.get("distance_filter", {})
-    if df_conf.get("enabled"):
-        before_df = can_df.copy()
-        before = len(can_df)
-        can_df, removed = filter_distance(can_df, df_conf.get("max_miles", 100))
-        steps.append(("distance", before, len(can_df)))
-        if with_audits:
-            dropped_mask = ~before_df["___IDX_ALL"].isin(can_df["___IDX_ALL"])
-            audits["Dropped_distance"] = before_df.loc[dropped_mask].copy()
+            addr_drop = can_df.loc[mask, addr_drop_cols]
+            if diagnostics and not addr_drop.empty:
+                log.debug("ADDRESS DROPPED SAMPLE (first 20):\n" + addr_drop.head(20).to_string(index=False))
+            # Save full dropped list to CSV
+            sink.write_csv("address_dropped", addr_drop, "ADDRESS DROPPED")
+    all_df = can_df
+    can_df = all_df.loc[reason == 0]
 
     # VIN diagnostics before dedupe
-    if "VIN" in can_df.columns:
+    if diagnostics and "VIN" in can_df.columns:
         vin_series = can_df["VIN"].fillna("").astype(str).str.strip().str.upper()
         unique_vins = vin_series.nunique(dropna=True)
         total_rows = len(vin_series)
         vin17_ratio = (vin_series.str.len() == 17).mean()
-        print(f"VIN DIAG: unique={unique_vins} of {total_rows}, pct_len17={vin17_ratio:.2%}")
+        log.debug(f"VIN DIAG: unique={unique_vins} of {total_rows}, pct_len17={vin17_ratio:.2%}")
         try:
             top_vins = vin_series.value_counts().head(10)
-            print("Top VINs by frequency (pre-dedupe):")
-            print(top_vins.to_string())
+            log.debug("Top VINs by frequency (pre-dedupe):\n" + top_vins.to_string())
         except Exception:
             pass
 
     # Dedupe
     if PRESETS.get("delete_duplicates"):
         before = len(can_df)
-        # Track pre-dedupe indices to identify dropped rows
-        can_df = can_df.copy()
-        can_df["___IDX"] = range(len(can_df))
-        df_before = can_df.copy()
-        can_df, removed = delete_duplicates(can_df)
-        kept_idx = set(can_df.get("___IDX", pd.Series([], dtype=int)).tolist())
-        drop_mask = ~df_before["___IDX"].isin(kept_idx)
+        df_before = can_df
+        can_df, removed = delete_duplicates(df_before)
+        kept_idx = set(can_df["___IDX_ALL"].tolist())
+        drop_mask = ~df_before["___IDX_ALL"].isin(kept_idx)
         drop_cols = [c for c in ["__ROWNUM", "VIN", "Deal_Number", "DeliveryDate", "Store", "FullName", "Address1", "City", "State", "Zip", "Year"] if c in df_before.columns]
         dropped_rows = df_before.loc[drop_mask, drop_cols]
         # Print sample
-        if not dropped_rows.empty:
-            print("DEDUPE DROPPED SAMPLE (first 20):")
-            print(dropped_rows.head(20).to_string(index=False))
-        # Write full list to CSV and XLSX
-        try:
-            base_dir = os.path.dirname(os.path.abspath(input_csv_path))
-            base_name = os.path.splitext(os.path.basename(input_csv_path))[0]
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            dedupe_drop_path = os.path.join(base_dir, f"{base_name}_dedupe_dropped_{ts}.csv")
-            dropped_rows.to_csv(dedupe_drop_path, index=False)
-            print(f"DEDUPE DROPPED: wrote full list to {dedupe_drop_path}")
-            # Also write to XLSX for review
-            dedupe_drop_xlsx = os.path.join(base_dir, f"{base_name}_dedupe_dropped_{ts}.xlsx")
-            try:
-                write_xlsx(dropped_rows, input_csv_path, output_path=dedupe_drop_xlsx)
-                print(f"DEDUPE DROPPED: wrote Excel to {dedupe_drop_xlsx}")
-            except Exception as ex:
-                print(f"DEDUPE DROPPED: failed to write Excel: {ex}")
-
-            # Audit: all occurrences for VINs with duplicates (kept vs dropped)
-            if "VIN" in df_before.columns:
-                vin_counts = df_before["VIN"].value_counts()
-                dup_vins = set(vin_counts[vin_counts > 1].index)
-                all_dupes = df_before[df_before["VIN"].isin(dup_vins)].copy()
-                all_dupes["Status"] = all_dupes["___IDX"].apply(lambda i: "kept" if i in kept_idx else "dropped")
-                audit_cols = [c for c in ["__ROWNUM", "Status", "VIN", "Deal_Number", "DeliveryDate", "Store", "FullName", "Address1", "City", "State", "Zip", "Year"] if c in all_dupes.columns]
-                all_dupes = all_dupes[audit_cols].sort_values(["VIN", "DeliveryDate"]) if "DeliveryDate" in all_dupes.columns else all_dupes.sort_values(["VIN"]) 
-                audit_xlsx = os.path.join(base_dir, f"{base_name}_dedupe_all_occurrences_{ts}.xlsx")
-                try:
-                    write_xlsx(all_dupes, input_csv_path, output_path=audit_xlsx)
-                    print(f"DEDUPE AUDIT: wrote all occurrences (kept+dropped) to {audit_xlsx}")
-                except Exception as ex:
-                    print(f"DEDUPE AUDIT: failed to write Excel: {ex}")
-        except Exception as e:
-            print(f"DEDUPE DROPPED: failed to write CSV: {e}")
-        # Clean temp col if present
-        if "___IDX" in can_df.columns:
-            can_df = can_df.drop(columns=["___IDX"])
+        if diagnostics and not dropped_rows.empty:
+            log.debug("DEDUPE DROPPED SAMPLE (first 20):\n" + dropped_rows.head(20).to_string(index=False))
+        # Full list as CSV plus a review copy in the output format
+        sink.write_csv("dedupe_dropped", dropped_rows, "DEDUPE DROPPED")
+        sink.write_review("dedupe_dropped", dropped_rows, "DEDUPE DROPPED")
+        # Audit: all occurrences for VINs with duplicates (kept vs dropped); built on the sink's thread
+        if "VIN" in df_before.columns:
+            sink.write_review(
+                "dedupe_all_occurrences",
+                lambda: _all_vin_occurrences(df_before, kept_idx),
+                "DEDUPE AUDIT",
+                "all occurrences (kept+dropped)",
+            )
         steps.append(("dedupe", before, len(can_df)))
-        if with_audits:
-            audits["Dropped_dedupe"] = df_before.loc[drop_mask].copy()
+        # Survivors keep their ___IDX_ALL (= position in all_df), so dedupe drops are tagged in place
+        dedupe_pos = df_before["___IDX_ALL"].to_numpy()[drop_mask.to_numpy()]
+        reason[dedupe_pos] = DROP_REASON_CODES["dedupe"]
+        would_drop[dedupe_pos] |= drop_reason_bit("dedupe")
+
+    if with_audits:
+        # Audit sheets are cut from the reason codes on the sink's thread, not copied per step
+        all_df["__DropReason"] = reason
+        all_df["__DropMask"] = would_drop
+        audits = [(f.audit, f.code) for f in row_filters if f.audit]
+        if PRESETS.get("delete_duplicates"):
+            audits.append(("Dropped_dedupe", DROP_REASON_CODES["dedupe"]))
+        for name, code in audits:
+            sink.add_audit_set(name, lambda code=code: _audit_set(all_df, code))
 
     # Enforce canonical output order; drop columns not in the list
     present = [c for c in CANONICAL_OUTPUT_ORDER if c in can_df.columns]
-    out_df = can_df.loc[:, present].copy()
+    out_df = decode_compact_dtypes(can_df.loc[:, present])
 
-    out_path = write_xlsx(out_df, input_csv_path)
-    if with_audits:
-        # Build a multi-sheet workbook with dropped rows per step
-        try:
-            base_dir = os.path.dirname(os.path.abspath(input_csv_path))
-            base_name = os.path.splitext(os.path.basename(input_csv_path))[0]
-            ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audit_xlsx = os.path.join(base_dir, f"{base_name}_audits_{ts}.xlsx")
-            # Choose a readable set of columns for audits
-            def pick_cols(df: pd.DataFrame) -> pd.DataFrame:
-                cols = [c for c in ["__ROWNUM", "Store", "VIN", "Deal_Number", "FullName", "Address1", "City", "State", "Zip", "Year", "DeliveryDate", "__EffectiveDate"] if c in df.columns]
-                return df[cols] if cols else df
-            audits_trimmed = {k: pick_cols(v) for k, v in audits.items() if isinstance(v, pd.DataFrame) and not v.empty}
-            if audits_trimmed:
-                write_multi_sheet(audits_trimmed, input_csv_path, audit_xlsx)
-                print(f"AUDITS: wrote per-step drops to {audit_xlsx}")
-        except Exception as ex:
-            print(f"AUDITS: failed to write multi-sheet workbook: {ex}")
-    # Print debug steps
-    try:
-        for step in steps:
-            if len(step) == 3:
-                name, b, a = step
-                print(f"{name}: {b} -> {a}")
-            else:
-                print(f"{step[0]}: {step[1]}")
-    except Exception:
-        pass
+    out_path = write_output(out_df, input_csv_path, output_format=sink.output_format)
+    _log_steps(steps)
     return out_df, out_path
 
 
@@ -302,12 +487,21 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run fixed-preset sales sheet filtering")
     parser.add_argument("input_paths", nargs="+", help="One or more input files (.csv/.xlsx/.xlsm)")
     parser.add_argument("--with-audits", action="store_true", help="Also write multi-sheet workbook of per-step dropped rows")
+    parser.add_argument("--chunksize", type=int, default=None, help="Stream input in chunks of N rows to bound memory on very large exports")
+    parser.add_argument("--sheet", default=None, help="Worksheet to read from .xlsx/.xlsm inputs (name or 0-based index; default first sheet)")
+    parser.add_argument("--cache-dir", default=None, help="Cache parsed inputs (Arrow IPC, needs pyarrow) and accepted schema mappings in this directory to skip re-parsing and re-detection on repeat runs")
+    parser.add_argument("--arrow-strings", action="store_true", help="Read and process text columns as string[pyarrow] (needs pyarrow)")
+    parser.add_argument("--output-format", choices=list(OUTPUT_FORMATS), default="xlsx", help="Format of the filtered output and review sidecars (csv is gzip-compressed; parquet/feather need pyarrow)")
+    parser.add_argument("--detect-workers", type=int, default=1, help="Use N workers for schema detection (threads for header matching, processes for column tests; helps on very wide sheets; same mapping as 1)")
+    parser.add_argument("--log-level", choices=["debug", "info", "warning"], default="debug", help="debug prints dropped-row samples and VIN stats; info skips computing them (fast batch runs); warning prints only problems")
     args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s", stream=sys.stdout)
+    sheet = int(args.sheet) if args.sheet is not None and args.sheet.isdigit() else args.sheet
     # Preserve prior behavior when a single file is given
     exit_code = 0
     for p in args.input_paths:
         try:
-            df, path = run_pipeline(p, with_audits=args.with_audits)
+            df, path = run_pipeline(p, with_audits=args.with_audits, chunksize=args.chunksize, sheet_name=sheet, cache_dir=args.cache_dir, arrow_strings=args.arrow_strings, output_format=args.output_format, detect_workers=args.detect_workers)
             print(f"Wrote {len(df)} rows to {path}")
         except Exception as e:
             print(f"ERROR: {p}: {e}")
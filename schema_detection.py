@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import logging
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from functools import cached_property
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
-from rapidfuzz import fuzz
+from pandas.tseries.api import guess_datetime_format
+from rapidfuzz import fuzz, process
 
 from constants import (
     SYNONYMS,
@@ -22,6 +30,12 @@ from constants import (
 )
 
 
+log = logging.getLogger(__name__)
+
+# Bump when detection rules change so mappings accepted by older rules are re-detected
+_MAPPING_CACHE_VERSION = 1
+
+
 class SchemaError(Exception):
     pass
 
@@ -52,262 +66,496 @@ def sample_series_values(series: pd.Series, max_rows: int = 500) -> pd.Series:
     """Return up to max_rows non-null values for quick scanning."""
     if not isinstance(series, pd.Series):
         return pd.Series([], dtype=object)
-    return series.dropna().astype(str).head(max_rows)
+    return series.dropna().head(max_rows).astype(str)
 
 
-def _looks_like_city(series: pd.Series) -> float:
-    vals = sample_series_values(series)
-    if vals.empty:
-        return 0.0
-    # City-like: alphabetic with spaces/hyphens, not mostly digits
-    def is_city(v: str) -> bool:
-        v = v.strip()
-        if not v:
-            return False
-        if re.search(r"\d", v):
-            return False
-        return bool(re.fullmatch(r"[A-Za-z][A-Za-z\-\s\.']+", v))
-    rate = vals.apply(is_city).mean()
-    return float(rate)
+# Distinct leading values a column's date format is guessed from
+DATE_FORMAT_SAMPLE = 200
 
 
-def _looks_like_state(series: pd.Series) -> float:
-    from constants import US_STATE_ABBR
-    vals = sample_series_values(series)
-    if vals.empty:
-        return 0.0
-    abbr = {s.upper() for s in US_STATE_ABBR}
-    def is_state(v: str) -> bool:
-        v = v.strip().upper()
-        return v in abbr
-    return float(vals.apply(is_state).mean())
+def infer_date_format(series: pd.Series, max_values: int = DATE_FORMAT_SAMPLE) -> Optional[str]:
+    """strftime format guessed for most of the first max_values distinct non-blank strings, or None."""
+    sample = sample_series_values(series, max_rows=max_values * 5).str.strip()
+    sample = sample[sample != ""].drop_duplicates().head(max_values)
+    if sample.empty:
+        return None
+    formats = pd.Series([guess_datetime_format(v) for v in sample], dtype=object).dropna()
+    return formats.mode().iloc[0] if not formats.empty else None
 
 
-def _looks_like_zip(series: pd.Series) -> float:
-    vals = sample_series_values(series)
-    if vals.empty:
-        return 0.0
-    def is_zip(v: str) -> bool:
-        return bool(re.fullmatch(r"\d{5}(?:-\d{4})?", v.strip()))
-    return float(vals.apply(is_zip).mean())
+def parse_dates(series: pd.Series) -> pd.Series:
+    """Parse a column of date strings to datetime64 once, with a format inferred from a sample.
+    Unparseable values become NaT; columns that are already datetime64 pass through. Falls back
+    to per-value inference when no single format fits the sample (e.g. Excel datetimes as objects).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    fmt = infer_date_format(series) if pd.api.types.is_string_dtype(series) else None
+    if fmt is not None:
+        return pd.to_datetime(series, format=fmt, errors="coerce")
+    return pd.to_datetime(series, errors="coerce")
 
 
-def _oem_rate(series: pd.Series) -> float:
-    vals = sample_series_values(series)
-    if vals.empty:
-        return 0.0
-    oems = {o.upper() for o in EXCLUDE_OEMS}
-    def is_oem(v: str) -> bool:
-        v = v.strip().upper()
-        return v in oems
-    return float(vals.apply(is_oem).mean())
+STREET_SUFFIXES = {
+    "ST","STREET","RD","ROAD","AVE","AV","AVENUE","BLVD","DR","DRIVE","LN","LANE","CT","COURT","HWY","HIGHWAY","PKWY","WAY","TER","TERRACE","PL","PLACE","CIR","CIRCLE","TRL","TRAIL","LOOP",
+    "BND","BEND","CV","COVE","CMN","COMMONS","SQ","SQUARE","RUN","PASS","ALY","ALLEY","XING","CROSSING","HL","HILL","HOLW","HOLLOW","MDW","MEADOW","RTE","ROUTE","VLG","VILLAGE","RIV","RIVER",
+    "CRK","CREEK","GRV","GROVE","GDNS","GARDENS","IS","ISLAND","LNDG","LANDING","LK","LAKE","LGT","LIGHT","MTN","MOUNTAIN","PR","PRAIRIE","PT","POINT","RDG","RIDGE","STA","STATION","VIS","VISTA"
+}
+
+_CITY_RE = r"[A-Za-z][A-Za-z\-\s\.']+"
+_ZIP_FULL_RE = r"\d{5}(?:-\d{4})?"
+_STREET_LEAD_RE = r"^(\d+\s+|P\.?O\.?\s*BOX\b)"
+# A suffix as a whole token, where tokens are split on anything but A-Z/0-9 (upper-cased values)
+_STREET_SUFFIX_RE = r"(?<![A-Z0-9])(?:" + "|".join(sorted(STREET_SUFFIXES, key=len, reverse=True)) + r")(?![A-Z0-9])"
+_PO_BOX_RE = r"(?i)\bP\.?\s*O\.?\s*BOX\b|\bPO\s*BOX\b"
+_NUMERIC_RE = r"-?\d+(?:\.\d+)?"
+
+
+@dataclass(eq=False)
+class ColumnProfile:
+    """Value tests for one column, computed once and shared by every scoring function.
+
+    All rates are over one cached sample (sample_series_values) and use vectorized string
+    kernels; each is computed on first access, so columns that never reach a test don't pay for it.
+    Rates are 0.0 on an empty sample, except the gate-only rates (vin/date/po_box), which keep
+    the NaN a mean over no values gives.
+    """
+
+    series: pd.Series
+    sample: pd.Series
+
+    @classmethod
+    def of(cls, series: pd.Series) -> "ColumnProfile":
+        return cls(series, sample_series_values(series))
+
+    def _rate(self, mask: pd.Series) -> float:
+        return float(mask.mean()) if len(self.sample) else 0.0
+
+    @cached_property
+    def stripped(self) -> pd.Series:
+        return self.sample.str.strip()
+
+    @cached_property
+    def upper(self) -> pd.Series:
+        return self.stripped.str.upper()
+
+    @cached_property
+    def city_rate(self) -> float:
+        # City-like: alphabetic with spaces/hyphens, no digits
+        return self._rate(~self.stripped.str.contains(r"\d") & self.stripped.str.fullmatch(_CITY_RE))
+
+    @cached_property
+    def state_rate(self) -> float:
+        from constants import US_STATE_ABBR
+        return self._rate(self.upper.isin(US_STATE_ABBR))
+
+    @cached_property
+    def zip_rate(self) -> float:
+        return self._rate(self.stripped.str.fullmatch(_ZIP_FULL_RE))
+
+    @cached_property
+    def oem_rate(self) -> float:
+        return self._rate(self.upper.isin({o.upper() for o in EXCLUDE_OEMS}))
+
+    @cached_property
+    def street_rate(self) -> float:
+        # Leading number or PO BOX, or a known street suffix token
+        return self._rate(self.upper.str.match(_STREET_LEAD_RE) | self.upper.str.contains(_STREET_SUFFIX_RE))
+
+    @cached_property
+    def numeric_column_rate(self) -> float:
+        """Share of all non-null values (not just the sample) that are plain numbers."""
+        non_null = self.series.dropna()
+        if not isinstance(non_null.dtype, pd.StringDtype):
+            non_null = non_null.astype(str)
+        if non_null.empty:
+            return 0.0
+        return float(non_null.str.fullmatch(r"\s*-?\d+(?:\.\d+)?\s*").mean())
+
+    @cached_property
+    def vin_hits(self) -> int:
+        return int(self.sample.str.contains(VIN_RE).sum())
+
+    @cached_property
+    def vin_rate(self) -> float:
+        return float(self.vin_hits / len(self.sample)) if len(self.sample) else float("nan")
+
+    @cached_property
+    def po_box_rate(self) -> float:
+        return float(self.sample.str.contains(_PO_BOX_RE, regex=True).mean())
+
+    @cached_property
+    def email_hits(self) -> int:
+        return int(self.sample.str.contains(EMAIL_RE).sum())
+
+    @cached_property
+    def phone_hits(self) -> int:
+        return int(self.sample.str.contains(PHONE_RE).sum())
+
+    @cached_property
+    def zip_hits(self) -> int:
+        return int(self.sample.str.contains(ZIP_RE).sum())
+
+    @cached_property
+    def numeric_hits(self) -> int:
+        compact = self.sample.str.replace(",", "", regex=False).str.replace(" ", "", regex=False)
+        return int(compact.str.fullmatch(_NUMERIC_RE).sum())
+
+    @cached_property
+    def year_hits(self) -> int:
+        try:
+            parsed = pd.to_numeric(self.sample.str.replace(r"[^0-9]", "", regex=True), errors="coerce")
+            return int(parsed.between(1980, 2030).sum())
+        except Exception:
+            return 0
+
+    @cached_property
+    def _parsed_dates(self) -> Optional[pd.Series]:
+        try:
+            return parse_dates(self.sample)
+        except Exception:
+            return None
+
+    @cached_property
+    def date_hits(self) -> int:
+        return int(self._parsed_dates.notna().sum()) if self._parsed_dates is not None else 0
+
+    @cached_property
+    def date_rate(self) -> float:
+        return float(self._parsed_dates.notna().mean()) if self._parsed_dates is not None else 0.0
+
+
+ColumnValues = Union[pd.Series, ColumnProfile]
+
 
+def _as_profile(values: ColumnValues) -> ColumnProfile:
+    return values if isinstance(values, ColumnProfile) else ColumnProfile.of(values)
 
-def _is_state_value(v: str) -> bool:
+
+def _looks_like_city(values: ColumnValues) -> float:
+    return _as_profile(values).city_rate
+
+
+def _looks_like_state(values: ColumnValues) -> float:
+    return _as_profile(values).state_rate
+
+
+def _looks_like_zip(values: ColumnValues) -> float:
+    return _as_profile(values).zip_rate
+
+
+def _oem_rate(values: ColumnValues) -> float:
+    return _as_profile(values).oem_rate
+
+
+def _looks_like_street(values: ColumnValues) -> float:
+    return _as_profile(values).street_rate
+
+
+def _state_mask(series: pd.Series) -> pd.Series:
+    """Per-row: value is a US state abbreviation (whole column, not the sample)."""
     from constants import US_STATE_ABBR
-    if v is None:
-        return False
-    vv = str(v).strip().upper()
-    return vv in US_STATE_ABBR
+    return series.notna() & series.astype(str).str.strip().str.upper().isin(US_STATE_ABBR)
 
 
-def _is_zip_value(v: str) -> bool:
-    if v is None:
-        return False
-    return bool(re.fullmatch(r"\d{5}(?:-\d{4})?", str(v).strip()))
+def _zip_mask(series: pd.Series) -> pd.Series:
+    """Per-row: value is a 5 or 9 digit ZIP (whole column, not the sample)."""
+    hits = series.astype(str).str.strip().str.fullmatch(_ZIP_FULL_RE)
+    return series.notna() & hits.fillna(False).astype(bool)
 
 
-STREET_SUFFIXES = {
-    "ST","STREET","RD","ROAD","AVE","AV","AVENUE","BLVD","DR","DRIVE","LN","LANE","CT","COURT","HWY","HIGHWAY","PKWY","WAY","TER","TERRACE","PL","PLACE","CIR","CIRCLE","TRL","TRAIL","LOOP",
-    "BND","BEND","CV","COVE","CMN","COMMONS","SQ","SQUARE","RUN","PASS","ALY","ALLEY","XING","CROSSING","HL","HILL","HOLW","HOLLOW","MDW","MEADOW","RTE","ROUTE","VLG","VILLAGE","RIV","RIVER",
-    "CRK","CREEK","GRV","GROVE","GDNS","GARDENS","IS","ISLAND","LNDG","LANDING","LK","LAKE","LGT","LIGHT","MTN","MOUNTAIN","PR","PRAIRIE","PT","POINT","RDG","RIDGE","STA","STATION","VIS","VISTA"
-}
+def _best_state_zip_mask(df: pd.DataFrame, rates: Dict[str, Tuple[float, float]]) -> Optional[pd.Series]:
+    """Per-row: the most State-like and the most Zip-like columns both hold valid values.
+    rates maps each column to its (state_rate, zip_rate). None unless both columns reach
+    a 0.3 rate; City co-occurrence is measured against this.
+    """
+    state_best_col = None
+    state_best_rate = 0.0
+    zip_best_col = None
+    zip_best_rate = 0.0
+    for col in df.columns:
+        r_state, r_zip = rates[col]
+        if r_state > state_best_rate:
+            state_best_rate = r_state
+            state_best_col = col
+        if r_zip > zip_best_rate:
+            zip_best_rate = r_zip
+            zip_best_col = col
+    if state_best_col is None or state_best_rate < 0.3 or zip_best_col is None or zip_best_rate < 0.3:
+        return None
+    return _state_mask(df[state_best_col]) & _zip_mask(df[zip_best_col])
 
 
-def _looks_like_street(series: pd.Series) -> float:
-    vals = sample_series_values(series)
-    if vals.empty:
+def _city_co_rate(city_s: pd.Series, state_zip_mask: Optional[pd.Series]) -> float:
+    """Share of rows with a non-blank City and valid State/Zip (0 without a State/Zip mask)."""
+    if state_zip_mask is None:
         return 0.0
-    def is_street(v: str) -> bool:
-        v = v.strip().upper()
-        if not v:
-            return False
-        # Leading number or PO BOX
-        if re.match(r"^(\d+\s+|P\.?O\.?\s*BOX\b)", v):
-            return True
-        # Contains a known street suffix
-        toks = re.split(r"[^A-Z0-9]+", v)
-        return any(tok in STREET_SUFFIXES for tok in toks)
-    return float(vals.apply(is_street).mean())
-
-
-def header_score(canonical: str, header_norm: str) -> int:
-    # Exact or synonym contains check
-    synonyms = SYNONYMS.get(canonical, set())
-    if header_norm in synonyms or header_norm == canonical.lower():
-        return FUZZY_STRONG
-    # Fuzzy against each synonym and canonical token
-    pool = list(synonyms) + [canonical.replace("_", " ")]
-    scores = [
-        fuzz.token_set_ratio(header_norm, s) for s in pool
-    ]
-    base = max(scores) if scores else 0
-    # Apply negative keyword penalty for misleading columns
-    negatives = NEGATIVE_KEYWORDS.get(canonical, set())
-    if any(tok in header_norm.split() for tok in negatives) or any(tok in header_norm for tok in negatives):
-        penalty = 20
+    try:
+        nonempty = city_s.fillna("").astype(str).str.strip() != ""
+        return float((nonempty & state_zip_mask).mean())
+    except Exception:
+        return 0.0
+
+
+def _city_misassigned(df: pd.DataFrame, mapping: Dict[str, str], header_norms: Dict[str, str], city_s: pd.Series) -> bool:
+    """City guard: the chosen header reads like a name or vehicle column, or City equals Last_Name in 20%+ of rows."""
+    chosen_norm = header_norms.get(mapping.get("City") or "", "")
+    looks_like_name_header = any(tok in chosen_norm for tok in ["first", "last", "fullname", "customer name"]) or chosen_norm in {"first name", "last name"}
+    looks_like_vehicle_header = any(tok in chosen_norm for tok in ["model", "series", "trim"]) or chosen_norm in {"model"}
+    eq_rate_to_last = 0.0
+    if "Last_Name" in mapping and mapping["Last_Name"] in df.columns:
+        try:
+            eq_rate_to_last = (df[mapping["Last_Name"]].fillna("").astype(str).str.strip() == city_s.fillna("").astype(str).str.strip()).mean()
+        except Exception:
+            eq_rate_to_last = 0.0
+    return looks_like_name_header or looks_like_vehicle_header or eq_rate_to_last >= 0.2
+
+
+def _csz_city_usable(df: pd.DataFrame, profiles: Dict[str, ColumnProfile]) -> bool:
+    return "__CSZ_City" in df.columns and profiles["__CSZ_City"].city_rate >= 0.3
+
+
+class HeaderIndex:
+    """Header-matching tables precompiled once from SYNONYMS, NEGATIVE_KEYWORDS and POSITIVE_KEYWORDS.
+
+    score() rates every normalized header against every canonical in one batched
+    token_set_ratio matrix (headers x all synonyms), reduces it to the best synonym per
+    canonical, then applies the keyword penalty/boost and exact-match override as masks.
+    """
+
+    def __init__(self, synonyms: Dict[str, set], negatives: Dict[str, set], positives: Dict[str, set]):
+        self.canonicals: List[str] = list(synonyms)
+        self._exact: List[set] = []
+        pool: List[str] = []
+        starts: List[int] = []
+        for canonical in self.canonicals:
+            syns = synonyms.get(canonical, set())
+            starts.append(len(pool))
+            pool.extend(list(syns) + [canonical.replace("_", " ")])
+            self._exact.append(set(syns) | {canonical.lower()})
+        self._pool = pool
+        self._starts = np.array(starts)
+        # Substring keyword scans as one compiled alternation per canonical
+        self._negatives = [self._keyword_re(negatives.get(c, set())) for c in self.canonicals]
+        self._positives = [self._keyword_re(positives.get(c, set())) for c in self.canonicals]
         # Stronger penalty for Store to avoid mapping fees/ids as Store
-        if canonical == "Store":
-            penalty = 40
-        base = max(0, base - penalty)
-    # Apply small boost for positive keywords
-    positives = POSITIVE_KEYWORDS.get(canonical, set())
-    if any(tok in header_norm for tok in positives):
-        base = min(100, base + 5)
-    return base
-
-
-def value_pattern_score(canonical: str, series: pd.Series) -> int:
-    values = sample_series_values(series)
-    if values.empty:
+        self._penalty = np.array([40 if c == "Store" else 20 for c in self.canonicals], dtype=float)
+
+    @staticmethod
+    def _keyword_re(keywords: set) -> Optional[re.Pattern]:
+        if not keywords:
+            return None
+        return re.compile("|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)))
+
+    @staticmethod
+    def _keyword_mask(headers: pd.Series, patterns: List[Optional[re.Pattern]]) -> np.ndarray:
+        cols = [
+            headers.str.contains(rx).to_numpy(dtype=bool) if rx is not None else np.zeros(len(headers), dtype=bool)
+            for rx in patterns
+        ]
+        return np.column_stack(cols) if cols else np.zeros((len(headers), 0), dtype=bool)
+
+    def score(self, header_norms: Sequence[str], workers: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, exact): headers x canonicals, in self.canonicals order.
+        exact marks exact synonym hits, whose score is FUZZY_STRONG. workers is passed to
+        rapidfuzz's cdist, which splits the matrix across threads outside the GIL (-1: all cores).
+        """
+        header_norms = list(header_norms)
+        if not header_norms:
+            empty = np.zeros((0, len(self.canonicals)))
+            return empty, empty.astype(bool)
+        sim = process.cdist(header_norms, self._pool, scorer=fuzz.token_set_ratio, dtype=np.float64, workers=workers)
+        base = np.maximum.reduceat(sim, self._starts, axis=1)
+        headers = pd.Series(header_norms, dtype=object)
+        negative = self._keyword_mask(headers, self._negatives)
+        base = np.where(negative, np.maximum(0, base - self._penalty), base)
+        positive = self._keyword_mask(headers, self._positives)
+        base = np.where(positive, np.minimum(100, base + 5), base)
+        exact = np.array([[h in ex for ex in self._exact] for h in header_norms], dtype=bool)
+        return np.where(exact, FUZZY_STRONG, base), exact
+
+
+HEADER_INDEX = HeaderIndex(SYNONYMS, NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS)
+
+
+def header_score(canonical: str, header_norm: str) -> Union[int, float]:
+    """Score one header against one canonical; detect_schema scores all pairs at once via HEADER_INDEX."""
+    scores, exact = HEADER_INDEX.score([header_norm])
+    j = HEADER_INDEX.canonicals.index(canonical)
+    return FUZZY_STRONG if exact[0, j] else float(scores[0, j])
+
+
+def value_pattern_score(canonical: str, values: ColumnValues) -> int:
+    profile = _as_profile(values)
+    if profile.sample.empty:
         return 0
     if canonical == "VIN":
         # Require a meaningful fraction of 17-char VINs
-        vin_hits = values.str.contains(VIN_RE).sum()
-        frac = vin_hits / max(1, len(values))
-        if frac >= 0.01:
+        if profile.vin_rate >= 0.01:
             return 4
-        elif vin_hits > 0:
+        elif profile.vin_hits > 0:
             return 2
         return 0
     if canonical == "Email":
-        hits = values.str.contains(EMAIL_RE).sum()
-        return 3 if hits > 0 else 0
+        return 3 if profile.email_hits > 0 else 0
     if canonical in {"Home_Phone", "Mobile_Phone", "Work_Phone", "Phone2", "Phone"}:
-        hits = values.str.contains(PHONE_RE).sum()
-        return 2 if hits > 0 else 0
+        return 2 if profile.phone_hits > 0 else 0
     if canonical == "Zip":
-        hits = values.str.contains(ZIP_RE).sum()
-        return 2 if hits > 0 else 0
+        return 2 if profile.zip_hits > 0 else 0
     if canonical in {"Distance", "Mileage", "Delivery_Miles"}:
         # Numeric leaning
-        def looks_numeric(v: str) -> bool:
-            v = v.replace(",", "").replace(" ", "")
-            return bool(re.fullmatch(r"-?\d+(?:\.\d+)?", v))
-
-        nums = values.apply(looks_numeric).sum()
-        return 2 if nums > 0 else 0
+        return 2 if profile.numeric_hits > 0 else 0
     if canonical == "Year":
         # Must look like plausible model year (e.g., 19xx or 20xx within range)
-        try:
-            parsed = pd.to_numeric(values.str.replace(r"[^0-9]", "", regex=True), errors="coerce")
-            hits = parsed.between(1980, 2030).sum()
-            return 3 if hits > 0 else 0
-        except Exception:
-            return 0
+        return 3 if profile.year_hits > 0 else 0
     if canonical in {"DeliveryDate"}:
-        # Try pandas datetime parse success rate
-        try:
-            parsed = pd.to_datetime(values, errors="coerce")
-            hits = parsed.notna().sum()
-            return 2 if hits > 0 else 0
-        except Exception:
-            return 0
+        # Pandas datetime parse success
+        return 2 if profile.date_hits > 0 else 0
     # Names/Address: no strong value pattern; return 0
     return 0
 
 
-def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
+def _score_header_candidates(
+    profile: ColumnProfile,
+    header_scores: np.ndarray,
+    header_exact: np.ndarray,
+) -> List[Tuple[str, float]]:
+    """Header-driven (canonical, score) candidates for one column, in HEADER_INDEX order."""
+    out: List[Tuple[str, float]] = []
+    for j, canonical in enumerate(HEADER_INDEX.canonicals):
+        hs = FUZZY_STRONG if header_exact[j] else float(header_scores[j])
+        if hs >= FUZZY_CANDIDATE:
+            vs = value_pattern_score(canonical, profile)
+            out.append((canonical, max(hs, FUZZY_CANDIDATE) + vs))
+    return out
+
+
+class _CityTerms(NamedTuple):
+    """A column's City value score, less the co-occurrence term that needs the whole frame's State/Zip mask."""
+
+    city_rate: float
+    oem_penalty: float
+    neg_penalty: int
+    low_unique_penalty: int
+
+    def score(self, co_rate: float) -> int:
+        return int(max(0, (80 + self.city_rate * 20 + co_rate * 20) - self.oem_penalty - self.neg_penalty - self.low_unique_penalty))
+
+
+def _score_value_candidates(
+    profile: ColumnProfile,
+    norm: str,
+) -> Tuple[List[Tuple[str, int]], Optional[_CityTerms]]:
+    """Value-driven address candidates for one column, regardless of its header.
+    City is returned as _CityTerms (None if the column isn't City-like); the caller scores it
+    against the co-occurrence rate with the best State/Zip columns.
+    """
+    out: List[Tuple[str, int]] = []
+    city = None
+    s = profile.series
+    # Skip entirely numeric-like columns
+    if profile.numeric_column_rate > 0.8:
+        return out, city
+    street_score = profile.street_rate
+    if street_score >= 0.2:
+        base_a1 = int(80 + street_score * 20)
+        base_a2 = int(70 + street_score * 20)
+        negatives_a1 = NEGATIVE_KEYWORDS.get("Address1", set())
+        negatives_a2 = NEGATIVE_KEYWORDS.get("Address2", set())
+        if any(tok in norm for tok in negatives_a1):
+            base_a1 = max(0, base_a1 - 20)
+        if any(tok in norm for tok in negatives_a2):
+            base_a2 = max(0, base_a2 - 20)
+        out.append(("Address1", base_a1))
+        out.append(("Address2", base_a2))
+    city_score = profile.city_rate
+    if city_score >= 0.3:
+        oem_penalty = profile.oem_rate * 60  # heavy penalty if column contains make names
+        neg_city = NEGATIVE_KEYWORDS.get("City", set())
+        neg_penalty = 20 if any(tok in norm for tok in neg_city) else 0
+        uniq_ratio = s.nunique(dropna=True) / max(1, len(s))
+        low_unique_penalty = 20 if uniq_ratio < 0.001 else 0
+        city = _CityTerms(city_score, oem_penalty, neg_penalty, low_unique_penalty)
+    state_score = profile.state_rate
+    if state_score >= 0.3:
+        out.append(("State", int(85 + state_score * 15)))
+    zip_score = profile.zip_rate
+    if zip_score >= 0.3:
+        out.append(("Zip", int(85 + zip_score * 15)))
+    return out, city
+
+
+class _ColumnScores(NamedTuple):
+    header: List[Tuple[str, float]]
+    value: List[Tuple[str, int]]
+    city: Optional[_CityTerms]
+    state_rate: float
+    zip_rate: float
+
+
+def _score_column(values: ColumnValues, norm: str, header_scores: np.ndarray, header_exact: np.ndarray) -> _ColumnScores:
+    """Every per-column scoring pass of detect_schema; top-level so process workers can run it
+    on the column's values alone and send back only the small candidate lists and rates.
+    """
+    profile = _as_profile(values)
+    value, city = _score_value_candidates(profile, norm)
+    return _ColumnScores(
+        _score_header_candidates(profile, header_scores, header_exact),
+        value,
+        city,
+        profile.state_rate,
+        profile.zip_rate,
+    )
+
+
+def detect_schema(df: pd.DataFrame, workers: int = 1) -> Tuple[Dict[str, str], List[str]]:
     """
     Return mapping of canonical field -> source column name, and a list of warnings.
     Applies staged scoring: header match + value pattern + precedence rules.
     Allows coexistence for some roles (e.g., FullName with First/Last).
+
+    workers > 1 runs the header fuzzy matrix on that many threads and the per-column value
+    tests in that many processes (each gets one column's values, not the frame); the
+    mapping is the same as with workers=1.
     """
     if df is None or df.empty:
         raise SchemaError("Empty DataFrame provided for schema detection")
 
     warnings: List[str] = []
     header_norms = {col: normalize_label(col) for col in df.columns}
+    # One sample and one set of value tests per column, shared by every pass below
+    profiles = {col: ColumnProfile.of(df[col]) for col in df.columns}
+    cols = list(header_norms)
 
     # Candidate scores per canonical: list of (source_col, score)
     candidates: Dict[str, List[Tuple[str, int]]] = {}
 
-    for col, norm in header_norms.items():
-        series = df[col]
-        for canonical in SYNONYMS.keys():
-            hs = header_score(canonical, norm)
-            if hs >= FUZZY_CANDIDATE:
-                vs = value_pattern_score(canonical, series)
-                score = max(hs, FUZZY_CANDIDATE) + vs
-                candidates.setdefault(canonical, []).append((col, score))
-
-    # Identify best State/Zip by value-likeness for co-occurrence
-    state_best_col = None
-    state_best_rate = 0.0
-    zip_best_col = None
-    zip_best_rate = 0.0
-    for col in df.columns:
-        s = df[col]
-        r_state = _looks_like_state(s)
-        if r_state > state_best_rate:
-            state_best_rate = r_state
-            state_best_col = col
-        r_zip = _looks_like_zip(s)
-        if r_zip > zip_best_rate:
-            zip_best_rate = r_zip
-            zip_best_col = col
-
-    state_mask = None
-    zip_mask = None
-    if state_best_col is not None and state_best_rate >= 0.3:
-        state_mask = df[state_best_col].apply(_is_state_value)
-    if zip_best_col is not None and zip_best_rate >= 0.3:
-        zip_mask = df[zip_best_col].apply(_is_zip_value)
+    norms = [header_norms[c] for c in cols]
+    header_scores, header_exact = HEADER_INDEX.score(norms, workers=workers)
+    if workers > 1 and len(cols) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(cols))) as pool:
+            chunk = max(1, len(cols) // (workers * 4))
+            scored = list(pool.map(_score_column, (df[c] for c in cols), norms, header_scores, header_exact, chunksize=chunk))
+    else:
+        scored = [_score_column(profiles[c], norms[i], header_scores[i], header_exact[i]) for i, c in enumerate(cols)]
+    for col, sc in zip(cols, scored):
+        for canonical, score in sc.header:
+            candidates.setdefault(canonical, []).append((col, score))
+
+    # Best State/Zip by value-likeness for co-occurrence; computed once and shared by every City candidate
+    state_zip_mask = _best_state_zip_mask(df, {col: (sc.state_rate, sc.zip_rate) for col, sc in zip(cols, scored)})
 
     # Value-driven candidates for address fields regardless of header names
-    for col in df.columns:
-        s = df[col]
-        # Skip entirely numeric-like columns
-        if s.dropna().astype(str).str.fullmatch(r"\s*-?\d+(?:\.\d+)?\s*").mean() > 0.8:
-            continue
-        street_score = _looks_like_street(s)
-        if street_score >= 0.2:
-            base_a1 = int(80 + street_score * 20)
-            base_a2 = int(70 + street_score * 20)
-            norm = header_norms.get(col, "")
-            negatives_a1 = NEGATIVE_KEYWORDS.get("Address1", set())
-            negatives_a2 = NEGATIVE_KEYWORDS.get("Address2", set())
-            if any(tok in norm for tok in negatives_a1):
-                base_a1 = max(0, base_a1 - 20)
-            if any(tok in norm for tok in negatives_a2):
-                base_a2 = max(0, base_a2 - 20)
-            candidates.setdefault("Address1", []).append((col, base_a1))
-            candidates.setdefault("Address2", []).append((col, base_a2))
-        city_score = _looks_like_city(s)
-        if city_score >= 0.3:
-            oem_penalty = _oem_rate(s) * 60  # heavy penalty if column contains make names
-            norm = header_norms.get(col, "")
-            neg_city = NEGATIVE_KEYWORDS.get("City", set())
-            neg_penalty = 20 if any(tok in norm for tok in neg_city) else 0
-            co_rate = 0.0
-            if state_mask is not None and zip_mask is not None:
-                nonempty = s.fillna("").astype(str).str.strip() != ""
-                co_rate = ((nonempty & state_mask & zip_mask).mean())
-            uniq_ratio = s.nunique(dropna=True) / max(1, len(s))
-            low_unique_penalty = 20 if uniq_ratio < 0.001 else 0
-            score_city = int(max(0, (80 + city_score * 20 + co_rate * 20) - oem_penalty - neg_penalty - low_unique_penalty))
-            candidates.setdefault("City", []).append((col, score_city))
-        state_score = _looks_like_state(s)
-        if state_score >= 0.3:
-            candidates.setdefault("State", []).append((col, int(85 + state_score * 15)))
-        zip_score = _looks_like_zip(s)
-        if zip_score >= 0.3:
-            candidates.setdefault("Zip", []).append((col, int(85 + zip_score * 15)))
+    for col, sc in zip(cols, scored):
+        for canonical, score in sc.value:
+            candidates.setdefault(canonical, []).append((col, score))
+        if sc.city is not None:
+            candidates.setdefault("City", []).append((col, sc.city.score(_city_co_rate(df[col], state_zip_mask))))
 
     # For DeliveryDate, also consider precedence keywords even if fuzzy below threshold
     for col, norm in header_norms.items():
         if any(tok in norm for tok in DELIVERYDATE_PRECEDENCE):
-            vs = value_pattern_score("DeliveryDate", df[col])
+            vs = value_pattern_score("DeliveryDate", profiles[col])
             candidates.setdefault("DeliveryDate", []).append((col, FUZZY_CANDIDATE + vs))
 
     mapping: Dict[str, str] = {}
@@ -356,8 +604,8 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
         csz_col = f"__CSZ_{canon}"
         try:
             if csz_col in df.columns:
-                chosen_like = like_fn(df[col]) if col in df.columns else 0.0
-                csz_like = like_fn(df[csz_col])
+                chosen_like = like_fn(profiles[col]) if col in df.columns else 0.0
+                csz_like = like_fn(profiles[csz_col])
                 chosen_norm = header_norms.get(col or "", "")
                 is_composite_header = "city state zip" in chosen_norm
                 if (is_composite_header or chosen_like < min_thresh) and csz_like >= min_thresh:
@@ -387,15 +635,18 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
         except Exception:
             return None
 
+    def profile_of(canon: str) -> Optional[ColumnProfile]:
+        col = mapping.get(canon)
+        return profiles.get(col) if col else None
+
     # Address1
-    addr1_s = series_of("Address1")
-    if addr1_s is not None:
-        street_like = _looks_like_street(addr1_s)
+    addr1_p = profile_of("Address1")
+    if addr1_p is not None:
+        street_like = addr1_p.street_rate
         # Allow lower threshold if PO BOX is common
         po_rate = 0.0
         try:
-            vals = sample_series_values(addr1_s)
-            po_rate = vals.str.contains(r"(?i)\bP\.?\s*O\.?\s*BOX\b|\bPO\s*BOX\b", regex=True).mean()
+            po_rate = addr1_p.po_box_rate
         except Exception:
             pass
         min_thresh = 0.2 if po_rate >= 0.2 else 0.3
@@ -410,18 +661,8 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
     if city_s is not None:
         # Guardrail: if City header clearly refers to a name column, prefer CSZ split
         try:
-            chosen_col = mapping.get("City")
-            chosen_norm = header_norms.get(chosen_col or "", "")
-            looks_like_name_header = any(tok in chosen_norm for tok in ["first", "last", "fullname", "customer name"]) or chosen_norm in {"first name", "last name"}
-            looks_like_vehicle_header = any(tok in chosen_norm for tok in ["model", "series", "trim"]) or chosen_norm in {"model"}
-            eq_rate_to_last = 0.0
-            if "Last_Name" in mapping and mapping["Last_Name"] in df.columns:
-                try:
-                    eq_rate_to_last = (df[mapping["Last_Name"]].fillna("").astype(str).str.strip() == city_s.fillna("").astype(str).str.strip()).mean()
-                except Exception:
-                    eq_rate_to_last = 0.0
-            if looks_like_name_header or looks_like_vehicle_header or eq_rate_to_last >= 0.2:
-                if "__CSZ_City" in df.columns and _looks_like_city(df["__CSZ_City"]) >= 0.3:
+            if _city_misassigned(df, mapping, header_norms, city_s):
+                if _csz_city_usable(df, profiles):
                     mapping["City"] = "__CSZ_City"
                     city_s = df["__CSZ_City"]
                     warnings.append("Remapped City to __CSZ_City due to name-like chosen column")
@@ -432,14 +673,8 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
                     )
         except Exception:
             pass
-        city_like = _looks_like_city(city_s)
-        co_rate = 0.0
-        try:
-            nonempty = city_s.fillna("").astype(str).str.strip() != ""
-            if state_mask is not None and zip_mask is not None:
-                co_rate = (nonempty & state_mask & zip_mask).mean()
-        except Exception:
-            pass
+        city_like = _looks_like_city(profiles[mapping["City"]])
+        co_rate = _city_co_rate(city_s, state_zip_mask)
         if city_like < 0.5 or co_rate < 0.3:
             raise SchemaError(
                 "City mapping is low confidence: city-like "
@@ -448,9 +683,9 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
             )
 
     # State
-    state_s = series_of("State")
-    if state_s is not None:
-        state_like = _looks_like_state(state_s)
+    state_p = profile_of("State")
+    if state_p is not None:
+        state_like = state_p.state_rate
         if state_like < 0.7:
             raise SchemaError(
                 "State mapping is low confidence: state-like "
@@ -458,9 +693,9 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
             )
 
     # Zip
-    zip_s = series_of("Zip")
-    if zip_s is not None:
-        zip_like = _looks_like_zip(zip_s)
+    zip_p = profile_of("Zip")
+    if zip_p is not None:
+        zip_like = zip_p.zip_rate
         if zip_like < 0.7:
             raise SchemaError(
                 "Zip mapping is low confidence: zip-like "
@@ -468,11 +703,10 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
             )
 
     # VIN
-    vin_s = series_of("VIN")
-    if vin_s is not None:
+    vin_p = profile_of("VIN")
+    if vin_p is not None:
         try:
-            values = sample_series_values(vin_s)
-            frac17 = values.astype(str).str.contains(VIN_RE).mean()
+            frac17 = vin_p.vin_rate
         except Exception:
             frac17 = 0.0
         if frac17 < 0.01:
@@ -482,13 +716,9 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
             )
 
     # DeliveryDate (warn or fail)
-    dd_s = series_of("DeliveryDate")
-    if dd_s is not None:
-        try:
-            parsed = pd.to_datetime(sample_series_values(dd_s), errors="coerce")
-            dd_rate = parsed.notna().mean()
-        except Exception:
-            dd_rate = 0.0
+    dd_p = profile_of("DeliveryDate")
+    if dd_p is not None:
+        dd_rate = dd_p.date_rate
         if dd_rate < 0.2:
             raise SchemaError(
                 "DeliveryDate mapping is low confidence: parse success rate "
@@ -498,3 +728,96 @@ def detect_schema(df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
     return mapping, warnings
 
 
+def header_fingerprint(columns) -> str:
+    """Stable key for a header layout: the set of normalized labels, independent of column order."""
+    labels = sorted({normalize_label(c) for c in columns})
+    return hashlib.sha256(json.dumps({"v": _MAPPING_CACHE_VERSION, "labels": labels}).encode()).hexdigest()
+
+
+def _cached_mapping_ok(df: pd.DataFrame, mapping: Dict[str, str]) -> bool:
+    """Re-check a cached mapping with detect_schema's confidence gates (same helpers and thresholds).
+    A mapping that fresh detection would reject, or whose City it would move to __CSZ_City, fails.
+    """
+    profiles: Dict[str, ColumnProfile] = {}
+
+    def profile_of_col(col: str) -> ColumnProfile:
+        if col not in profiles:
+            profiles[col] = ColumnProfile.of(df[col])
+        return profiles[col]
+
+    def profile(canon: str) -> Optional[ColumnProfile]:
+        return profile_of_col(mapping[canon]) if canon in mapping else None
+
+    addr1 = profile("Address1")
+    if addr1 is not None:
+        min_thresh = 0.2 if addr1.po_box_rate >= 0.2 else 0.3
+        if addr1.street_rate < min_thresh:
+            return False
+    state = profile("State")
+    if state is not None and state.state_rate < 0.7:
+        return False
+    zipc = profile("Zip")
+    if zipc is not None and zipc.zip_rate < 0.7:
+        return False
+    city = profile("City")
+    if city is not None:
+        header_norms = {col: normalize_label(col) for col in df.columns}
+        # The co-occurrence mask comes from the best State/Zip columns of the whole frame, as in detect_schema
+        rates = {col: (profile_of_col(col).state_rate, profile_of_col(col).zip_rate) for col in df.columns}
+        if _city_misassigned(df, mapping, header_norms, df[mapping["City"]]) and _csz_city_usable(df, profiles):
+            return False
+        if city.city_rate < 0.5:
+            return False
+        if _city_co_rate(df[mapping["City"]], _best_state_zip_mask(df, rates)) < 0.3:
+            return False
+    vin = profile("VIN")
+    if vin is not None and vin.vin_rate < 0.01:
+        return False
+    dd = profile("DeliveryDate")
+    if dd is not None and dd.date_rate < 0.2:
+        return False
+    return True
+
+
+def detect_schema_cached(df: pd.DataFrame, cache_dir: str, workers: int = 1) -> Tuple[Dict[str, str], List[str]]:
+    """detect_schema with accepted mappings remembered in cache_dir, keyed by header_fingerprint.
+
+    Recurring feeds keep the same header layout, so a hit only re-validates the cached mapping
+    with the cheap confidence gates (street-likeness, State/Zip/City rates, VIN fraction,
+    DeliveryDate parse rate); if a gate fails, or a label no longer resolves to exactly one
+    column, full detection runs and its result replaces the entry. Mappings are stored by
+    normalized label, so case/punctuation changes in the header still hit. workers is passed
+    to detect_schema on a miss.
+    """
+    fp = header_fingerprint(df.columns)
+    path = os.path.join(cache_dir, f"schema_{fp}.json")
+    by_norm: Dict[str, List[str]] = {}
+    for col in df.columns:
+        by_norm.setdefault(normalize_label(col), []).append(col)
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                cached = json.load(fh)
+            cols = {canon: by_norm.get(norm, []) for canon, norm in cached.items()}
+            if all(len(c) == 1 for c in cols.values()):
+                mapping = {canon: c[0] for canon, c in cols.items()}
+                if _cached_mapping_ok(df, mapping):
+                    log.info(f"SCHEMA: reused mapping from {path}")
+                    return mapping, []
+            log.info(f"SCHEMA: cached mapping {path} failed validation; re-detecting")
+        except Exception as e:
+            log.warning(f"SCHEMA: unreadable cache entry {path}, re-detecting: {e}")
+
+    mapping, warnings = detect_schema(df, workers=workers)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Only mappings whose labels resolve unambiguously can be replayed
+        if all(len(by_norm[normalize_label(col)]) == 1 for col in mapping.values()):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({canon: normalize_label(col) for canon, col in mapping.items()}, fh, indent=2, sort_keys=True)
+            os.replace(tmp_path, path)
+    except Exception as e:
+        log.warning(f"SCHEMA: failed to write cache entry {path}: {e}")
+    return mapping, warnings
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import logging
+
+import pandas as pd
+
+from audit_sink import AuditSink
+
+
+def test_audit_sink_appends_csv_and_collects_audit_sheets(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    src = str(tmp_path / "in.csv")
+    calls = []
+
+    def build() -> pd.DataFrame:
+        calls.append(1)
+        return pd.DataFrame({"VIN": ["C"], "Status": ["kept"]})
+
+    with AuditSink(src) as sink:
+        sink.write_csv("address_dropped", pd.DataFrame({"__ROWNUM": [2], "City": ["RIALTO"]}), "ADDRESS DROPPED")
+        sink.write_csv("address_dropped", pd.DataFrame({"__ROWNUM": [9], "City": ["POMONA"]}), "ADDRESS DROPPED")
+        sink.write_review("dedupe_all_occurrences", build, "DEDUPE AUDIT", "all occurrences")
+        sink.add_audit_set("Dropped_distance", pd.DataFrame({"VIN": ["A", "B"]}))
+        sink.add_audit_set("Dropped_dedupe", pd.DataFrame({"VIN": []}))
+    assert calls == [1]
+
+    csv = pd.read_csv(sink.path("address_dropped"), dtype=str)
+    assert csv.values.tolist() == [["2", "RIALTO"], ["9", "POMONA"]]
+    assert pd.read_excel(sink.path("dedupe_all_occurrences", ".xlsx"), dtype=str)["VIN"].tolist() == ["C"]
+    # Empty sets get no sheet
+    assert list(pd.read_excel(sink.audits_path, sheet_name=None)) == ["Dropped_distance"]
+    out = caplog.messages
+    assert out[0].startswith("ADDRESS DROPPED: wrote full list to ")
+    assert out[-1] == f"AUDITS: wrote per-step drops to {sink.audits_path}"
+
+
+def test_audit_sink_reports_failed_jobs_without_raising(tmp_path, caplog):
+    def broken() -> pd.DataFrame:
+        raise RuntimeError("boom")
+
+    with AuditSink(str(tmp_path / "in.csv"), output_format="csv", background=False) as sink:
+        sink.write_review("dedupe_dropped", broken, "DEDUPE DROPPED")
+    assert caplog.record_tuples == [("audit_sink", logging.WARNING, "DEDUPE DROPPED: failed to write csv: boom")]
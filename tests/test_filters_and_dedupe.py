@@ -1,16 +1,24 @@
 from __future__ import annotations
 
 import os
+from typing import Tuple
+
 import pandas as pd
+import pytest
 
-from preprocess import build_canonical_frame
+from preprocess import address_key_series, build_canonical_frame
 from filters import (
     filter_address_present,
     filter_out_of_state,
     filter_delivery_age,
     filter_distance,
+    filter_model_year_window,
     delete_duplicates,
+    VIN_RE,
+    _address_keys,
+    _effective_date_series,
     _normalize_address_key,
+    _safe_str,
 )
 
 
@@ -56,7 +64,415 @@ def test_dedupe_no_duplicate_keys():
     out, _ = delete_duplicates(can)
     # Verify no duplicate normalized address using the same normalization as production
     if all(c in out.columns for c in ["Address1", "City", "State", "Zip"]):
-        addr_key = out.apply(lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1)
+        addr_key = address_key_series(out)
         dup = addr_key[addr_key != ""].duplicated(keep=False)
         assert not dup.any()
 
+
+
+def test_merge_area_code_matches_scalar_normalization():
+    from preprocess import _merge_area_code, _normalize_phone_value
+
+    nums = pd.Series(
+        ["(909) 555-1234", "555-1234", "1-800-555-0000 ext. 12", "5551234 x9", "555 1234 X", "", "12345",
+         "+44 20 7946 0958", "9095551234.0", "n/a", "٥٥٥١٢٣٤", "x12", "555-1234 " * 5, None, 5551234, "555-1234"],
+        index=range(100, 116),
+    )
+    area = pd.Series(["909", "", "951", "(951)", "12", "909", "909", "909", "909", "909", "909", "909", "909", "909", "909", "٩٠٩"],
+                     index=nums.index)
+    expected = []
+    for a, n in zip(area, nums.fillna("").astype(str)):
+        v = _normalize_phone_value(n)
+        digits = "".join(ch for ch in a if ch.isdigit())
+        expected.append(f"{digits}-{v}" if len(v) == 8 and v[3] == "-" and len(digits) == 3 else v)
+    assert _merge_area_code(area, nums).tolist() == expected
+    assert _merge_area_code(None, nums).tolist() == [_normalize_phone_value(n) for n in nums.fillna("").astype(str)]
+
+
+def test_split_csz_series_matches_scalar_rules():
+    from preprocess import _split_csz_series, _split_csz_value
+
+    values = pd.Series(
+        ["Fontana, CA 92335", "Fontana CA 92335-1234", "Fontana, CA", "CA 92335", "Fontana 92335", "ZIP 92335",
+         "City 92335", "CA", "", None, 12345, "12345-67890", "New York, , NY", "123 Main, Apt 4, CA 90001",
+         "Coeur d'Alene ID 83814", "Montréal QC", " , CA 92335", "Fontana, CA\n92335", "X Y Z", "Fontana, CAL 92335"],
+        dtype=object,
+        index=range(5, 25),
+    )
+    city, state, zipc = _split_csz_series(values)
+    assert list(zip(city, state, zipc)) == [_split_csz_value(v) for v in values]
+    assert city.index.equals(values.index)
+
+
+def test_build_canonical_frame_leaves_input_untouched():
+    raw = pd.DataFrame({
+        "Last Name": [" SMITH ", "JONES ", "LEE", "DIAZ"],
+        "Street": ["12  MAIN ST", "40 OAK AVE", "7 PINE RD", "PO BOX 9"],
+        "City State Zip": ["FONTANA, CA 92335", "RIALTO CA 92376", "POMONA, CA 91766", "FONTANA, CA 92335"],
+        "Notes": ["  a  ", "b", "c", "d"],
+    })
+    before = raw.copy()
+    can, mapping, _ = build_canonical_frame(raw)
+    pd.testing.assert_frame_equal(raw, before)
+    assert can["Last_Name"].tolist() == ["SMITH", "JONES", "LEE", "DIAZ"]
+    assert can["Email"].eq("").all() and can["Mileage"].isna().all()
+    # Reusing the mapping (only its source columns are normalized) gives the same frame
+    from preprocess import find_csz_columns, _pre_trim_normalize
+    again, _, _ = build_canonical_frame(raw, mapping=mapping, csz_cols=find_csz_columns(_pre_trim_normalize(raw)))
+    pd.testing.assert_frame_equal(again, can)
+
+
+def test_unmapped_canonical_columns_do_not_alias():
+    raw = pd.DataFrame({
+        "Last Name": ["SMITH", "JONES"],
+        "Street": ["12 MAIN ST", "40 OAK AVE"],
+        "City State Zip": ["FONTANA, CA 92335", "RIALTO CA 92376"],
+    })
+    can, mapping, _ = build_canonical_frame(raw)
+    blank_cols = [c for c in ["Email", "Work_Phone", "Phone2", "CustomerID", "Store", "Deal_Number"] if c not in mapping]
+    missing_cols = [c for c in ["VIN", "Make", "Model"] if c not in mapping]
+    assert len(blank_cols) > 1 and len(missing_cols) > 1
+    can.loc[0, blank_cols[0]] = "x@y.com"
+    can.loc[0, missing_cols[0]] = "1HGCM82633A000001"
+    assert all(can.loc[0, c] == "" for c in blank_cols[1:])
+    assert all(pd.isna(can.loc[0, c]) for c in missing_cols[1:])
+
+
+def test_effective_date_parsed_once_with_inferred_format():
+    from schema_detection import infer_date_format, parse_dates
+
+    dates = pd.Series(["03/04/2021", "12/31/2020", "", "not a date", "2021-05-06", "01/02/2019"])
+    assert infer_date_format(dates) == "%m/%d/%Y"
+    parsed = parse_dates(dates)
+    assert parsed.tolist()[:2] == [pd.Timestamp("2021-03-04"), pd.Timestamp("2020-12-31")]
+    assert parsed.isna().tolist() == [False, False, True, True, True, False]
+
+    raw = pd.DataFrame({
+        "Last Name": ["SMITH", "JONES", "LEE"],
+        "Street": ["12 MAIN ST", "40 OAK AVE", "7 PINE RD"],
+        "City State Zip": ["FONTANA, CA 92335", "RIALTO CA 92376", "POMONA, CA 91766"],
+        "Delivery Date": ["03/04/2021", "12/31/2020", ""],
+    })
+    can, _, _ = build_canonical_frame(raw)
+    assert pd.api.types.is_datetime64_any_dtype(can["__EffectiveDate"])
+    assert can["__EffectiveDate"].isna().tolist() == [False, False, True]
+    out, removed = filter_delivery_age(can, 18)
+    assert removed == 1 and out["Last_Name"].tolist() == ["SMITH", "JONES"]
+
+
+def test_low_cardinality_fields_are_categorical_and_filter_alike():
+    from preprocess import decode_compact_dtypes
+
+    raw = pd.DataFrame({
+        "Last Name": [f"NAME{i}" for i in range(12)],
+        "Street": [f"{i} MAIN ST" for i in range(12)],
+        "City": ["FONTANA", "RIALTO", "", "SPOKANE"] * 3,
+        "State": ["ca", "CA", "CA", "WA"] * 3,
+        "Zip": ["92335", "92376", "92335", "99201"] * 3,
+    })
+    can, _, _ = build_canonical_frame(raw)
+    assert isinstance(can["State"].dtype, pd.CategoricalDtype)
+    assert isinstance(can["City"].dtype, pd.CategoricalDtype)
+    assert not isinstance(can["Last_Name"].dtype, pd.CategoricalDtype)
+    plain = decode_compact_dtypes(can)
+    assert plain["State"].dtype == object and plain["State"].tolist() == ["CA", "CA", "CA", "WA"] * 3
+    for filt in (lambda d: filter_out_of_state(d, "ca"), filter_address_present):
+        enc_out, enc_removed = filt(can)
+        plain_out, plain_removed = filt(plain)
+        assert enc_removed == plain_removed
+        pd.testing.assert_frame_equal(decode_compact_dtypes(enc_out), plain_out)
+
+
+def test_numeric_fields_typed_once_and_filtered_vectorized():
+    from preprocess import parse_numeric
+
+    years = parse_numeric(pd.Series([" 2015 ", "2012", "2025", "abc", "", None, "2015.5", "99999"]), "Int16")
+    assert str(years.dtype) == "Int16"
+    assert years.tolist()[:3] == [2015, 2012, 2025] and years.isna().tolist()[3:] == [True] * 5
+    # Years parse like int(): no thousands separators or decimal point
+    assert parse_numeric(pd.Series(["2,019", "2015.0", "+2016"]), "Int16").tolist() == [pd.NA, pd.NA, 2016]
+    miles = parse_numeric(pd.Series(["12.3", "1,000", "x"]), "Float32")
+    assert str(miles.dtype) == "Float32"
+    assert miles.tolist()[1] == 1000.0 and pd.isna(miles.iloc[2])
+
+    df = pd.DataFrame({"Year": years, "Distance": parse_numeric(pd.Series(["5", "150", "", "1500", "99.5", "0", "7", "x"]), "Float32")})
+    window, removed = filter_model_year_window(df, 2013, 2024)
+    assert window.index.tolist() == [0] and window["Year"].tolist() == [2015] and removed == 7
+    # Either bound alone; rows without a numeric year are still dropped
+    assert filter_model_year_window(df, None, 2012)[0]["Year"].tolist() == [2012]
+    # 150 is over the limit; 1500 is implausible and treated as missing, so it is kept
+    near, removed = filter_distance(df, 100)
+    assert removed == 1 and 1 not in near.index
+
+
+def test_numeric_fields_keep_source_text():
+    raw = pd.DataFrame({
+        "Last Name": ["SMITH", "JONES", "LEE"],
+        "Street": ["12 MAIN ST", "40 OAK AVE", "7 PINE RD"],
+        "City State Zip": ["FONTANA, CA 92335", "RIALTO CA 92376", "POMONA, CA 91766"],
+        "Mileage": ["12345.6", "80,000", "abc"],
+        "Year": ["2019", "2,019", "2015.0"],
+        "Distance": ["5", "12.5", "n/a"],
+    })
+    can, mapping, _ = build_canonical_frame(raw)
+    assert mapping["Mileage"] == "Mileage"
+    # Output fields are written as read; the filters use the parsed internal columns
+    for col in ["Mileage", "Year", "Distance"]:
+        assert can[col].tolist() == raw[col].tolist()
+    assert can["__Year"].tolist()[0] == 2019 and can["__Year"].isna().tolist() == [False, True, True]
+    assert can["__Distance"].tolist()[:2] == [5.0, 12.5]
+    out, removed = filter_model_year_window(can, 2010, 2024)
+    assert removed == 2 and out["Year"].tolist() == ["2019"]
+    assert filter_distance(can, 10)[0]["Distance"].tolist() == ["5", "n/a"]
+
+
+def test_filter_corporate_matches_rowwise_decisions():
+    import itertools
+    from filters import _is_corporate_row, filter_corporate
+
+    words = ["", "John", "SMITH", "Smith", "Toyota", "HONDA", "Ford Motors", "Avis", "DAVIS", "Fontana Auto Inc",
+             "llc", "Mercedes-Benz", "Group 1", "vw Ram", "Ann-Marie", "O'Brien", "Été", "Co."]
+    rows = [(f, a, b) for f, a, b in itertools.product(words[:9], words, words)]
+    df = pd.DataFrame(rows, columns=["FullName", "First_Name", "Last_Name"], index=range(7, 7 + len(rows)))
+    out, removed = filter_corporate(df)
+    expected = [not _is_corporate_row(f, a, b) for f, a, b in rows]
+    assert out.index.equals(df.index[expected])
+    assert removed == len(rows) - sum(expected) and 0 < removed < len(rows)
+
+
+def test_address_key_series_matches_scalar_key():
+    import itertools
+
+    a1 = ["123 Main St.", " p.o. box 9 ", "Apt 4, 5 Oak", "#12 Elm", "", "Été Rd", "1\t2  3"]
+    cities = ["Fontana", "FONTANA ", "St. Louis", ""]
+    states = ["ca", "CA", ""]
+    zips = ["92335-1234", "9233", "ZIP 92335", ""]
+    rows = list(itertools.product(a1, cities, states, zips))
+    df = pd.DataFrame(rows, columns=["Address1", "City", "State", "Zip"], index=range(3, 3 + len(rows)))
+    expected = [_normalize_address_key(*r) for r in rows]
+    assert address_key_series(df).tolist() == expected
+    # Categorical parts are normalized per category
+    encoded = df.astype({"City": "category", "State": "category"})
+    assert address_key_series(encoded).tolist() == expected
+    can, _, _ = build_canonical_frame(pd.DataFrame({
+        "Last Name": ["SMITH", "JONES"],
+        "Street": ["12 Main St", "PO BOX 9"],
+        "City State Zip": ["FONTANA, CA 92335", "RIALTO CA 92376"],
+    }))
+    assert can["__AddressKey"].tolist() == ["12 MAIN ST|FONTANA|CA|92335", "PO BOX 9|RIALTO|CA|92376"]
+
+
+def _delete_duplicates_reference(df_can: pd.DataFrame) -> Tuple[pd.DataFrame, int]:
+    """Sort-based implementation delete_duplicates replaced, kept as the reference for its equivalence test."""
+    initial = len(df_can)
+    if initial == 0:
+        return df_can, 0
+
+    work = df_can.copy()
+    # Helper columns
+    work["___DATE"] = _effective_date_series(work)
+    work["___ORDER"] = range(len(work))
+
+    # Build VIN validity and address key
+    vin_valid = pd.Series([False] * len(work))
+    if "VIN" in work.columns:
+        vin_valid = _safe_str(work["VIN"]).str.upper().apply(lambda v: bool(VIN_RE.fullmatch(v)))
+    # Computed once; every pass below looks rows up in it
+    addr_key = _address_keys(work)
+
+    # Track address groups to prune if VIN-pass dropped a newer row than any remaining at that address
+    prune_addr_keys: set[str] = set()
+
+    # Pass 1: VIN-only dedupe (valid VINs). Keep most recent DeliveryDate with deterministic tiebreaks.
+    if vin_valid.any():
+        with_vin = work.loc[vin_valid].copy()
+        without_vin = work.loc[~vin_valid].copy()
+
+        # Helper tie-break columns
+        if "Deal_Number" in with_vin.columns:
+            with_vin["__HAS_DEAL"] = _safe_str(with_vin["Deal_Number"]).ne("")
+            with_vin["__DN_NUM"] = pd.to_numeric(_safe_str(with_vin["Deal_Number"]), errors="coerce")
+        else:
+            with_vin["__HAS_DEAL"] = False
+            with_vin["__DN_NUM"] = pd.Series([pd.NA] * len(with_vin))
+        with_vin["__DN_NUM_FILLED"] = with_vin["__DN_NUM"].astype(float).fillna(float("-inf"))
+
+        with_vin["___VIN_UP"] = _safe_str(with_vin["VIN"]).str.upper()
+        # Sort within groups then take the last row per VIN
+        with_vin_sorted = with_vin.sort_values(
+            ["___VIN_UP", "___DATE", "__HAS_DEAL", "__DN_NUM_FILLED", "___ORDER"],
+            ascending=[True, True, True, True, True],
+        )
+        with_vin_dedup = with_vin_sorted.groupby("___VIN_UP", sort=False).tail(1)
+        # Identify VIN-dropped rows and compute address keys for pruning logic
+        dropped_vin = with_vin.loc[~with_vin.index.isin(with_vin_dedup.index)].copy()
+        if not dropped_vin.empty:
+            dropped_vin["___ADDR_KEY_FOR_DROP"] = addr_key.loc[dropped_vin.index]
+        # Remaining after VIN-pass
+        remaining_after_vin = pd.concat([with_vin_dedup, without_vin], ignore_index=False)
+        if not dropped_vin.empty:
+            # Compute address keys and max date among remaining for comparison
+            if all(c in remaining_after_vin.columns for c in ["Address1", "City", "State", "Zip"]):
+                rem_addr_keys = addr_key.loc[remaining_after_vin.index]
+                rem_dates = remaining_after_vin["___DATE"]
+                max_date_by_addr = pd.Series(rem_dates.values, index=rem_addr_keys).groupby(level=0).max()
+                for _, r in dropped_vin.iterrows():
+                    k = r.get("___ADDR_KEY_FOR_DROP", "")
+                    if not k:
+                        continue
+                    drop_date = r.get("___DATE")
+                    rem_max = max_date_by_addr.get(k, pd.NaT)
+                    try:
+                        if pd.notna(drop_date) and (pd.isna(rem_max) or drop_date > rem_max):
+                            prune_addr_keys.add(k)
+                    except Exception:
+                        # Fallback safe compare via string
+                        if str(drop_date) > str(rem_max):
+                            prune_addr_keys.add(k)
+        # Update work to remaining
+        work = remaining_after_vin
+
+    # Pass 2: Address-only dedupe. Keep most recent DeliveryDate with deterministic tiebreaks.
+    addr_mask = addr_key != ""
+    if addr_mask.any():
+        with_addr = work.loc[addr_mask].copy()
+        # If VIN-pass dropped a newer row at an address, prune that whole address group here
+        if prune_addr_keys:
+            with_addr["___ADDR_KEY"] = addr_key.loc[with_addr.index]
+            with_addr = with_addr.loc[~with_addr["___ADDR_KEY"].isin(prune_addr_keys)].copy()
+            # Recompute mask for without_addr based on pruning
+            without_addr = work.loc[~addr_mask].copy()
+        else:
+            without_addr = work.loc[~addr_mask].copy()
+        without_addr = work.loc[~addr_mask].copy()
+
+        # Helper tie-break columns
+        if "Deal_Number" in with_addr.columns:
+            with_addr["__HAS_DEAL"] = _safe_str(with_addr["Deal_Number"]).ne("")
+            with_addr["__DN_NUM"] = pd.to_numeric(_safe_str(with_addr["Deal_Number"]), errors="coerce")
+        else:
+            with_addr["__HAS_DEAL"] = False
+            with_addr["__DN_NUM"] = pd.Series([pd.NA] * len(with_addr))
+        with_addr["__DN_NUM_FILLED"] = with_addr["__DN_NUM"].astype(float).fillna(float("-inf"))
+
+        if "___ADDR_KEY" not in with_addr.columns:
+            with_addr["___ADDR_KEY"] = addr_key.loc[with_addr.index]
+
+        with_addr_sorted = with_addr.sort_values(
+            ["___ADDR_KEY", "___DATE", "__HAS_DEAL", "__DN_NUM_FILLED", "___ORDER"],
+            ascending=[True, True, True, True, True],
+        )
+        with_addr_dedup = with_addr_sorted.groupby("___ADDR_KEY", sort=False).tail(1)
+        work = pd.concat([with_addr_dedup, without_addr], ignore_index=False)
+
+    # Cleanup helper cols
+    work = work.drop(columns=[c for c in ["___DATE", "___ORDER", "___VIN_UP", "___ADDR_KEY", "__HAS_DEAL", "__DN_NUM", "__DN_NUM_FILLED"] if c in work.columns])
+    removed = initial - len(work)
+    return work, removed
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_delete_duplicates_matches_sort_based_reference(seed):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n = [400, 40, 3][seed % 3]
+    vins = [f"1HGCM82633A{i:06d}" for i in range(n // 3)] + ["", "NOTAVIN", "1hgcm82633a000001"]
+    streets = [f"{i} MAIN ST" for i in range(n // 4)] + ["", "PO BOX 4", "12 Oak Ave Apt 3", "12 OAK AVE UNIT 3"]
+    dates = [f"2023-{m:02d}-{d:02d}" for m in range(1, 13) for d in (1, 15)] + ["", "bad"]
+    df = pd.DataFrame({
+        "VIN": rng.choice(vins, n),
+        "Address1": rng.choice(streets, n),
+        "City": rng.choice(["FONTANA", "Rialto", ""], n),
+        "State": rng.choice(["CA", "ca", ""], n),
+        "Zip": rng.choice(["92335", "92376-1111", ""], n),
+        "Deal_Number": rng.choice(["", "5001", "5002", "x"], n),
+        "DeliveryDate": pd.to_datetime(pd.Series(rng.choice(dates, n)), format="%Y-%m-%d", errors="coerce"),
+    }, index=range(5, 5 + 2 * n, 2))
+    if seed % 2:
+        df = df.drop(columns=["VIN"]) if seed == 5 else df.astype({"City": "category", "State": "category"})
+    expected, expected_removed = _delete_duplicates_reference(df)
+    out, removed = delete_duplicates(df)
+    pd.testing.assert_frame_equal(out, expected)
+    assert removed == expected_removed
+
+
+def test_explode_vins_repeats_rows_per_distinct_vin():
+    from filters import explode_vins_on_raw
+
+    v1, v2, v3 = "1HGCM82633A000001", "1HGCM82633A000002", "1HGCM82633A000003"
+    raw = pd.DataFrame({
+        "VIN": [v3, None, f" {v1.lower()} ", "NOTAVIN"],
+        "VIN List": [f"{v2}, {v1}|{v2}", "too short;1HGCM82633A00000I", None, f"{v1}\t/{v3}"],
+        "Name": ["A", "B", "C", "D"],
+        "__ROWNUM": [2, 3, 4, 5],
+    }, index=[10, 11, 12, 13])
+    out = explode_vins_on_raw(raw, vin_col="VIN", vin_list_col="VIN List")
+    assert out["VIN"].tolist() == [v1, v2, v3, v1, v1, v3]
+    assert out["__ROWNUM"].tolist() == [2, 2, 2, 4, 5, 5]
+    assert out["Name"].tolist() == ["A", "A", "A", "C", "D", "D"]
+    assert out.index.equals(pd.RangeIndex(6))
+    assert explode_vins_on_raw(raw.iloc[[1]], vin_col="VIN", vin_list_col="VIN List").empty
+
+
+def test_row_filter_executor_matches_sequential_filters():
+    from filters import apply_row_filters, describe_drop_mask, drop_reason_bit, enabled_row_filters, filter_corporate, filter_name_present
+
+    n = 240
+    df = pd.DataFrame({
+        "FullName": ["" if i % 9 else "Fontana Motors Inc" for i in range(n)],
+        "Last_Name": ["" if i % 17 == 3 else "Smith" for i in range(n)],
+        "Address1": ["" if i % 13 == 1 else f"{i} MAIN ST" for i in range(n)],
+        "City": ["FONTANA"] * n,
+        "State": ["NV" if i % 11 == 2 else "CA" for i in range(n)],
+        "Zip": ["92335"] * n,
+        "Year": [str(2008 + i % 18) for i in range(n)],
+        "DeliveryDate": pd.to_datetime([f"20{15 + i % 11}-{1 + i % 12:02d}-15" for i in range(n)]),
+        # Mostly missing distances: the gate is only met on the rows the earlier filters keep
+        "Distance": [str(20 + 40 * (i % 5)) if i % 23 == 0 else "" for i in range(n)],
+    }, index=range(100, 100 + n))
+    presets = {
+        "exclude_corporate": True,
+        "name_present": True,
+        "address_present": True,
+        "delete_out_of_state": True,
+        "home_state": "CA",
+        "model_year_filter": {"enabled": True, "min_year": 2012, "max_year": 2022},
+        "delivery_age_filter": {"enabled": True, "months": 18},
+        "distance_filter": {"enabled": True, "max_miles": 100},
+    }
+    row_filters = enabled_row_filters(presets)
+    reason, would_drop = apply_row_filters(df, row_filters)
+    assert reason.dtype == "uint8" and would_drop.dtype == "uint16"
+
+    sequential = [
+        filter_corporate,
+        filter_name_present,
+        filter_address_present,
+        lambda d: filter_out_of_state(d, "CA"),
+        lambda d: filter_model_year_window(d, 2012, 2022),
+        lambda d: filter_delivery_age(d, 18),
+        lambda d: filter_distance(d, 100),
+    ]
+    cur = df
+    assert [f.name for f in row_filters] == ["exclude_corporate", "name_present", "address_present", "out_of_state", "model_year_window", "delivery_age", "distance"]
+    for f, filt in zip(row_filters, sequential):
+        nxt, removed = filt(cur)
+        dropped = reason == f.code
+        assert removed == int(dropped.sum()), f.name
+        assert cur.index.difference(nxt.index).equals(df.index[dropped]), f.name
+        # The first dropping filter is always in the would-drop mask
+        assert (would_drop[dropped] & drop_reason_bit(f.name)).all(), f.name
+        cur = nxt
+    assert int((reason == row_filters[-1].code).sum()) > 0
+    assert df.index[reason == 0].equals(cur.index) and not would_drop[reason == 0].any()
+
+    # Rows several filters reject are visible: no state/year filter dropped them first, but they would have
+    nevada = (df["State"] == "NV").to_numpy()
+    assert (nevada & (reason != row_filters[3].code)).any()
+    assert (would_drop[nevada] & drop_reason_bit("out_of_state")).all()
+    labels = describe_drop_mask(would_drop)
+    # Row 90 is a corporate name in NV with a 2008 model year: dropped as corporate, rejected by all three
+    assert reason[90] == row_filters[0].code
+    assert labels[90] == "exclude_corporate, out_of_state, model_year_window"
+    assert (labels[reason == 0] == "").all()
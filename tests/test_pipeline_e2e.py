@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import os
 import glob
+import logging
 import pandas as pd
+import pytest
 
 from run_preset import run_pipeline
 from verify_dedup import verify
@@ -52,3 +54,113 @@ def test_pipeline_different_format_end_to_end(tmp_path):
     assert ok, report
 
 
+
+
+def _write_synthetic_sales_csv(path, n: int = 60) -> None:
+    streets = ["MAIN ST", "OAK AVE", "PINE RD", "ELM DR", "CEDAR LN"]
+    cities = [("FONTANA", "CA", "92335"), ("RIALTO", "CA", "92376"), ("POMONA", "CA", "91766")]
+    vin_chars = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+    rows = []
+    for i in range(n):
+        city, state, zipc = cities[i % len(cities)]
+        # Every 7th row repeats an earlier VIN and every 5th shares an address, to exercise dedupe
+        vin_seed = i - 3 if i % 7 == 6 else i
+        vin = "".join(vin_chars[(vin_seed * 7 + k * 3) % len(vin_chars)] for k in range(17))
+        addr_seed = i - 1 if i % 5 == 4 else i
+        rows.append({
+            "First Name": f"Person{i}",
+            "Last Name": "Smith" if i % 11 else "Fontana Motors Inc",
+            "Address": f"{100 + addr_seed} {streets[addr_seed % len(streets)]}" if i % 13 else "",
+            "City": city,
+            "State": state,
+            "Zip Code": zipc,
+            "VIN": vin,
+            "Year": str(2011 + i % 15),
+            "Delivery Date": f"2023-{1 + i % 12:02d}-{1 + i % 27:02d}",
+            "Deal Number": str(5000 + i),
+        })
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_pipeline_streaming_matches_in_memory(tmp_path, monkeypatch):
+    import run_preset
+    monkeypatch.setattr(run_preset, "STREAM_DETECT_MIN_ROWS", 20)
+    src = tmp_path / "synthetic.csv"
+    _write_synthetic_sales_csv(src)
+    full_df, _ = run_pipeline(str(src))
+    stream_df, out_path = run_pipeline(str(src), chunksize=7)
+    assert os.path.exists(out_path)
+    pd.testing.assert_frame_equal(full_df.reset_index(drop=True), stream_df.reset_index(drop=True))
+
+
+def test_pipeline_arrow_strings_matches_default(tmp_path):
+    pytest.importorskip("pyarrow")
+    src = tmp_path / "synthetic.csv"
+    _write_synthetic_sales_csv(src)
+    default_df, _ = run_pipeline(str(src))
+    arrow_df, _ = run_pipeline(str(src), arrow_strings=True)
+    assert str(arrow_df["Address1"].dtype) == "string"
+    assert arrow_df["Address1"].dtype.storage == "pyarrow"
+    pd.testing.assert_frame_equal(
+        default_df.reset_index(drop=True).astype(object).where(default_df.notna().values, ""),
+        arrow_df.reset_index(drop=True).astype(object).where(arrow_df.notna().values, ""),
+        check_dtype=False,
+    )
+
+
+def test_pipeline_diagnostics_only_at_debug(tmp_path, caplog):
+    src = tmp_path / "synthetic.csv"
+    _write_synthetic_sales_csv(src)
+    caplog.set_level(logging.INFO)
+    quiet_df, _ = run_pipeline(str(src))
+    assert not any("SAMPLE" in m or "VIN DIAG" in m for m in caplog.messages)
+    assert any(m.startswith("dedupe: ") for m in caplog.messages)
+    caplog.clear()
+    caplog.set_level(logging.DEBUG)
+    debug_df, _ = run_pipeline(str(src))
+    assert any(m.startswith("DEDUPE DROPPED SAMPLE") for m in caplog.messages)
+    pd.testing.assert_frame_equal(quiet_df, debug_df)
+
+
+@pytest.mark.parametrize("ext", [".csv", ".xlsx"])
+def test_pipeline_two_phase_read_matches_single_read(tmp_path, monkeypatch, ext):
+    import run_preset
+    src = tmp_path / "synthetic.csv"
+    _write_synthetic_sales_csv(src)
+    wide = pd.read_csv(src, dtype=str, keep_default_na=False)
+    for i in range(20):
+        wide[f"Unused {i}"] = "x"
+    if ext == ".xlsx":
+        src = tmp_path / "synthetic.xlsx"
+        wide.to_excel(src, index=False)
+    else:
+        wide.to_csv(src, index=False)
+    single_df, _ = run_pipeline(str(src))
+
+    reads = []
+    real_read_any = run_preset._read_any
+    monkeypatch.setattr(run_preset, "_read_any", lambda *a, **kw: reads.append(kw.get("usecols")) or real_read_any(*a, **kw))
+    monkeypatch.setattr(run_preset, "DETECT_SAMPLE_ROWS", 25)
+    two_phase_df, _ = run_pipeline(str(src))
+    assert len(reads) == 1
+    if ext == ".xlsx":
+        # Workbooks are parsed once in full; the sample is the head of that frame
+        assert reads[0] is None
+    else:
+        assert not any(c.startswith("Unused") for c in reads[0])
+    pd.testing.assert_frame_equal(single_df, two_phase_df)
+
+
+def test_pipeline_cache_dir_hits_on_second_run(tmp_path, caplog):
+    pytest.importorskip("pyarrow")
+    src = tmp_path / "synthetic.csv"
+    _write_synthetic_sales_csv(src)
+    cache_dir = str(tmp_path / "cache")
+    caplog.set_level(logging.INFO)
+    first_df, _ = run_pipeline(str(src), cache_dir=cache_dir)
+    assert not any(m.startswith("CACHE: hit") for m in caplog.messages)
+    assert os.listdir(cache_dir)
+    caplog.clear()
+    second_df, _ = run_pipeline(str(src), cache_dir=cache_dir)
+    assert any(m.startswith("CACHE: hit") for m in caplog.messages)
+    pd.testing.assert_frame_equal(first_df, second_df)
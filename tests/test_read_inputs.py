@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from read_inputs import iter_xlsx_frames, read_xlsx
+
+
+def _write_workbook(path) -> None:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Summary"
+    ws.append(["ignored"])
+    data = wb.create_sheet("Sales")
+    data.append(["Name", "Year", None, "Name", "Delivered"])
+    data.append(["ANA", 2021, "x", "N/A", datetime.datetime(2023, 5, 1)])
+    data.append([None, 2020.5, None, "NULL", datetime.date(2023, 6, 2)])
+    data.append([None, None, None, None, None])
+    data.append(["  BO  ", 2019.0, None, "dup", None])
+    data.append([None, None, None, None, None])
+    wb.save(path)
+
+
+def test_read_xlsx_matches_read_excel(tmp_path):
+    path = tmp_path / "book.xlsx"
+    _write_workbook(path)
+    expected = pd.read_excel(path, sheet_name="Sales", dtype=str).fillna("")
+    pd.testing.assert_frame_equal(read_xlsx(str(path), sheet_name="Sales"), expected)
+    pd.testing.assert_frame_equal(read_xlsx(str(path), sheet_name=1), expected)
+
+
+def test_iter_xlsx_frames_batches_and_sheet_errors(tmp_path):
+    path = tmp_path / "book.xlsx"
+    _write_workbook(path)
+    batches = list(iter_xlsx_frames(str(path), sheet_name="Sales", batch_size=2))
+    assert [len(b) for b in batches] == [2, 2]
+    with pytest.raises(ValueError):
+        read_xlsx(str(path), sheet_name="Missing")
+
+
+def test_read_cached_hits_by_content_and_evicts(tmp_path):
+    pytest.importorskip("pyarrow")
+    from read_inputs import read_cached
+
+    src = tmp_path / "export.csv"
+    src.write_text("Name,Zip\nANA,92335\nBO,\n")
+    cache_dir = tmp_path / "cache"
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return pd.read_csv(src, dtype=str, keep_default_na=False)
+
+    first = read_cached(str(src), parse, {"ext": ".csv"}, str(cache_dir))
+    second = read_cached(str(src), parse, {"ext": ".csv"}, str(cache_dir))
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, second)
+    # Different reader options are a different entry; a tiny budget evicts the older one
+    read_cached(str(src), parse, {"ext": ".csv", "sheet_name": 1}, str(cache_dir), max_bytes=1)
+    assert len(calls) == 2
+    assert len(list(cache_dir.glob("*.arrow"))) == 1
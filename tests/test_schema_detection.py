@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import pandas as pd
+import pytest
 
 from preprocess import build_canonical_frame
 
@@ -28,3 +29,148 @@ def test_schema_maps_critical_fields_different_format():
         assert key in mapping, f"Expected mapping for {key} in differentFormatExample .csv"
 
 
+def test_column_profile_rates():
+    from schema_detection import ColumnProfile, value_pattern_score
+
+    addr = ColumnProfile.of(pd.Series(["123 Main St", "PO BOX 5", "Rte 66", "mainst", "ÉCOLE RD", None]))
+    assert addr.street_rate == 0.8
+    assert addr.po_box_rate == 0.2
+    geo = ColumnProfile.of(pd.Series([" ca ", "Fontana", "92335-1234", "O'Fallon", "HONDA"]))
+    assert (geo.state_rate, geo.zip_rate, geo.city_rate, geo.oem_rate) == (0.2, 0.2, 0.8, 0.2)
+    assert value_pattern_score("Zip", geo) == 2
+    assert value_pattern_score("VIN", geo) == 0
+    empty = ColumnProfile.of(pd.Series([None, None]))
+    assert empty.street_rate == 0.0 and value_pattern_score("Year", empty) == 0
+
+
+def test_detect_schema_cached_reuses_and_revalidates(tmp_path, monkeypatch):
+    import schema_detection
+    from schema_detection import SchemaError, detect_schema_cached
+
+    df = pd.DataFrame({
+        "Last Name": ["SMITH", "JONES", "LEE", "DIAZ"],
+        "Street": ["12 MAIN ST", "40 OAK AVE", "7 PINE RD", "PO BOX 9"],
+        "City": ["FONTANA", "RIALTO", "POMONA", "FONTANA"],
+        "State": ["CA", "CA", "CA", "CA"],
+        "Zip": ["92335", "92376", "91766", "92335"],
+        "VIN": ["1HGCM82633A004352", "2T1BURHE0JC000001", "1FTFW1ET5DFC10312", "3VWFE21C04M000001"],
+    })
+    mapping, _ = detect_schema_cached(df, str(tmp_path))
+    assert len(list(tmp_path.glob("schema_*.json"))) == 1
+
+    calls = []
+    real = schema_detection.detect_schema
+    monkeypatch.setattr(schema_detection, "detect_schema", lambda d, **kw: calls.append(1) or real(d, **kw))
+    # Same layout with different label styling hits the cache without re-detecting
+    renamed = df.rename(columns={"Last Name": "LAST_NAME", "Zip": "ZIP"})
+    hit, _ = detect_schema_cached(renamed, str(tmp_path))
+    assert calls == []
+    assert hit == {k: {"Last Name": "LAST_NAME", "Zip": "ZIP"}.get(v, v) for k, v in mapping.items()}
+    # Values that fail a gate force full detection
+    with pytest.raises(SchemaError, match="City mapping is low confidence"):
+        detect_schema_cached(df.assign(Zip=["N/A"] * 4), str(tmp_path))
+    assert calls == [1]
+
+
+def test_detect_schema_cached_rejects_stale_city_mapping(tmp_path, monkeypatch):
+    import schema_detection
+    from schema_detection import detect_schema_cached
+
+    cities = ["FONTANA", "RIALTO", "POMONA", "FONTANA"]
+    df = pd.DataFrame({
+        "Last Name": ["AUSTIN", "JORDAN", "HOUSTON", "DALLAS"],
+        "Street": ["12 MAIN ST", "40 OAK AVE", "7 PINE RD", "PO BOX 9"],
+        "City": cities,
+        "__CSZ_City": cities[:3] + [None],
+        "__CSZ_State": ["CA"] * 3 + [None],
+        "__CSZ_Zip": ["92335", "92376", "91766", None],
+    })
+    mapping, _ = detect_schema_cached(df, str(tmp_path))
+    assert mapping["City"] == "City"
+
+    calls = []
+    real = schema_detection.detect_schema
+    monkeypatch.setattr(schema_detection, "detect_schema", lambda d, **kw: calls.append(1) or real(d, **kw))
+    # Same layout, but City now repeats Last Name: fresh detection moves City to the composite split
+    stale = df.assign(City=df["Last Name"])
+    fresh, _ = real(stale)
+    assert fresh["City"] == "__CSZ_City"
+    again, _ = detect_schema_cached(stale, str(tmp_path))
+    assert calls == [1] and again == fresh
+
+
+def _header_score_reference(canonical: str, header_norm: str) -> int:
+    """Pairwise header_score HEADER_INDEX replaced, kept as the reference for its equivalence test."""
+    from rapidfuzz import fuzz
+    from constants import FUZZY_STRONG, NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS, SYNONYMS
+
+    # Exact or synonym contains check
+    synonyms = SYNONYMS.get(canonical, set())
+    if header_norm in synonyms or header_norm == canonical.lower():
+        return FUZZY_STRONG
+    # Fuzzy against each synonym and canonical token
+    pool = list(synonyms) + [canonical.replace("_", " ")]
+    scores = [
+        fuzz.token_set_ratio(header_norm, s) for s in pool
+    ]
+    base = max(scores) if scores else 0
+    # Apply negative keyword penalty for misleading columns
+    negatives = NEGATIVE_KEYWORDS.get(canonical, set())
+    if any(tok in header_norm.split() for tok in negatives) or any(tok in header_norm for tok in negatives):
+        penalty = 20
+        # Stronger penalty for Store to avoid mapping fees/ids as Store
+        if canonical == "Store":
+            penalty = 40
+        base = max(0, base - penalty)
+    # Apply small boost for positive keywords
+    positives = POSITIVE_KEYWORDS.get(canonical, set())
+    if any(tok in header_norm for tok in positives):
+        base = min(100, base + 5)
+    return base
+
+
+def test_header_index_matches_pairwise_scoring():
+    from constants import FUZZY_STRONG, NEGATIVE_KEYWORDS, POSITIVE_KEYWORDS, SYNONYMS
+    from schema_detection import HEADER_INDEX, normalize_label
+
+    # Every synonym (exact hits), every negative and positive keyword alone and next to a synonym,
+    # plus plain and unrelated labels
+    headers = {"x", "customer zip code", "store fee", "dealer id", "home phone", "store number"}
+    for canon, syns in SYNONYMS.items():
+        headers |= set(syns) | {canon.lower(), canon.replace("_", " ").lower()}
+        some = sorted(syns)[0] if syns else canon.lower()
+        for tok in NEGATIVE_KEYWORDS.get(canon, set()) | POSITIVE_KEYWORDS.get(canon, set()):
+            headers |= {tok, f"{some} {tok}", f"{tok} {some}"}
+    headers = sorted({normalize_label(h) for h in headers} - {""})
+    scores, exact = HEADER_INDEX.score(headers)
+    assert scores.shape == (len(headers), len(SYNONYMS))
+
+    branches = {"exact": 0, "negative": 0, "store": 0, "positive": 0}
+    for i, h in enumerate(headers):
+        for j, canon in enumerate(HEADER_INDEX.canonicals):
+            got = FUZZY_STRONG if exact[i, j] else scores[i, j]
+            assert got == _header_score_reference(canon, h), (canon, h)
+            if exact[i, j]:
+                branches["exact"] += 1
+            elif any(tok in h for tok in NEGATIVE_KEYWORDS.get(canon, set())):
+                branches["store" if canon == "Store" else "negative"] += 1
+            if any(tok in h for tok in POSITIVE_KEYWORDS.get(canon, set())):
+                branches["positive"] += 1
+    assert all(branches.values()), branches
+
+def test_detect_schema_parallel_matches_serial():
+    from schema_detection import detect_schema
+
+    df = pd.DataFrame({
+        "Customer Name": ["Ann Smith", "Bo Jones", "Cy Lee", "Di Diaz"],
+        "Address": ["12 MAIN ST", "40 OAK AVE", "7 PINE RD", "PO BOX 9"],
+        "City": ["FONTANA", "RIALTO", "POMONA", "FONTANA"],
+        "State": ["CA", "CA", "CA", "CA"],
+        "Zip": ["92335", "92376", "91766", "92335"],
+        "Sold Date": ["2023-01-05", "2023-02-11", "2022-12-30", "2023-03-02"],
+        "VIN": ["1HGCM82633A004352", "2T1BURHE0JC000001", "1FTFW1ET5DFC10312", "3VWFE21C04M000001"],
+    })
+    # Widen with filler columns so each worker gets several columns
+    filler = pd.DataFrame({f"Option {i}": [f"PKG{i}{j}" for j in range(4)] for i in range(12)})
+    wide = pd.concat([filler.iloc[:, :6], df, filler.iloc[:, 6:]], axis=1)
+    assert detect_schema(wide, workers=4) == detect_schema(wide)
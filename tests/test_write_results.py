@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from write_results import write_audit_sets, write_multi_sheet, write_output, write_xlsx
+
+
+def test_write_xlsx_round_trips_values_and_sizes_columns(tmp_path):
+    df = pd.DataFrame({
+        "Name": ["ANA", None, "A" * 120],
+        "DeliveryDate": pd.to_datetime(["2023-05-01", None, "2024-01-31"]),
+        "Year": pd.array([2021, None, 2019], dtype="Int64"),
+    })
+    out = write_xlsx(df, str(tmp_path / "in.csv"), output_path=str(tmp_path / "out.xlsx"))
+    back = pd.read_excel(out, dtype=str)
+    assert back["Name"].fillna("").tolist() == ["ANA", "", "A" * 120]
+    assert back["DeliveryDate"].fillna("").tolist() == ["2023-05-01 00:00:00", "", "2024-01-31 00:00:00"]
+    assert back["Year"].fillna("").tolist() == ["2021", "", "2019"]
+    ws = load_workbook(out).active
+    # Longest value + 2 padding, capped at 80; datetimes render as 19 chars
+    assert ws.column_dimensions["A"].width == 80
+    assert ws.column_dimensions["B"].width == 21
+    assert ws.column_dimensions["C"].width == 6
+
+
+def test_write_multi_sheet_truncates_sheet_names(tmp_path):
+    dfs = {"Dropped_" + "x" * 40: pd.DataFrame({"VIN": ["1"]}), "Other": pd.DataFrame({"VIN": []})}
+    out = write_multi_sheet(dfs, "in.csv", str(tmp_path / "audits.xlsx"))
+    sheets = pd.read_excel(out, sheet_name=None, dtype=str)
+    assert list(sheets) == [("Dropped_" + "x" * 40)[:31], "Other"]
+    assert sheets["Other"].empty
+
+
+@pytest.mark.parametrize("output_format, reader", [
+    ("csv", lambda p: pd.read_csv(p, dtype=str, keep_default_na=False)),
+    ("parquet", pd.read_parquet),
+    ("feather", pd.read_feather),
+])
+def test_write_output_columnar_formats_round_trip(tmp_path, output_format, reader):
+    if output_format != "csv":
+        pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"VIN": ["1HGCM82633A004352", "2T1BURHE0JC000001"], "Zip": ["02134", "90210"]}, index=[5, 9])
+    out = write_output(df, str(tmp_path / "in.csv"), output_format=output_format)
+    assert out.startswith(str(tmp_path / "in_filtered_"))
+    assert out.endswith({"csv": ".csv.gz", "parquet": ".parquet", "feather": ".feather"}[output_format])
+    back = reader(out)
+    assert back.astype(str).values.tolist() == df.astype(str).values.tolist()
+
+    audits = write_audit_sets({"Dropped_dedupe": df}, "in.csv", str(tmp_path / "audits"), output_format=output_format)
+    assert len(reader(next((tmp_path / "audits").iterdir()))) == 2
+    assert audits == str(tmp_path / "audits")
+
+
+def test_write_output_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported output format"):
+        write_output(pd.DataFrame({"VIN": ["1"]}), str(tmp_path / "in.csv"), output_format="json")
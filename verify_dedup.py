@@ -7,7 +7,7 @@ from typing import Tuple
 import pandas as pd
 
 from preprocess import build_canonical_frame
-from filters import _normalize_address_key
+from filters import _address_keys, _effective_date_series
 from constants import PRESETS
 
 from filters import (
@@ -26,18 +26,12 @@ def normalize_keys(df: pd.DataFrame) -> pd.DataFrame:
     else:
         out["__VIN_UP"] = ""
     # Address key
-    if all(c in out.columns for c in ["Address1", "City", "State", "Zip"]):
-        out["__ADDR_KEY"] = out.apply(lambda r: _normalize_address_key(r.get("Address1"), r.get("City"), r.get("State"), r.get("Zip")), axis=1)
-    else:
-        out["__ADDR_KEY"] = ""
+    # (canonical frames carry it as __AddressKey)
+    out["__ADDR_KEY"] = _address_keys(out)
     # Dates
     # Effective date: first non-NaT among DeliveryDate, SoldDate, SaleDate, Last_Date
-    eff = pd.to_datetime(out.get("DeliveryDate"), errors="coerce")
-    for col in ["SoldDate", "SaleDate", "Last_Date"]:
-        if col in out.columns:
-            d = pd.to_datetime(out[col], errors="coerce")
-            eff = eff.combine_first(d)
-    out["__DATE"] = eff
+    # (canonical frames already carry it parsed)
+    out["__DATE"] = _effective_date_series(out)
     return out
 
 
@@ -90,7 +84,7 @@ def verify(input_csv: str, final_xlsx: str, dropped_xlsx: str | None = None) ->
         for _, r in dropped.iterrows():
             vin = r.get("__VIN_UP", "")
             addr = r.get("__ADDR_KEY", "")
-            date = pd.to_datetime(r.get("DeliveryDate"), errors="coerce")
+            date = r.get("__DATE")
 
             pre_candidates = pre[(pre["__VIN_UP"] == vin) | ((addr != "") & (pre["__ADDR_KEY"] == addr))]
             if pre_candidates.empty:
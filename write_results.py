@@ -2,23 +2,121 @@ from __future__ import annotations
 
 import os
 from datetime import datetime
-from typing import Optional
+from typing import Iterator, List, Optional
 
 import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
 
 
-def _auto_size_columns(writer: pd.ExcelWriter, sheet_name: str):
-    ws = writer.sheets[sheet_name]
-    for idx, col in enumerate(ws.iter_cols(1, ws.max_column), 1):
-        max_len = 0
-        for cell in col:
-            try:
-                v = str(cell.value) if cell.value is not None else ""
-            except Exception:
-                v = ""
-            max_len = max(max_len, len(v))
-        # Add padding
-        ws.column_dimensions[col[0].column_letter].width = min(max_len + 2, 80)
+MAX_COLUMN_WIDTH = 80
+# Matches the number format pandas' to_excel uses for datetime cells
+DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+
+# Output format -> file extension. XLSX stays the default (GUI); the others skip Excel's
+# row limit and styling work and are far faster to write and smaller on disk.
+OUTPUT_FORMATS = {"xlsx": ".xlsx", "csv": ".csv.gz", "parquet": ".parquet", "feather": ".feather"}
+
+_THIN = Side(style="thin")
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_HEADER_ALIGNMENT = Alignment(horizontal="center", vertical="top")
+
+
+def _column_widths(df: pd.DataFrame) -> List[float]:
+    """Width per column from the longest rendered value (header included), plus padding.
+
+    Computed with vectorized string lengths on the frame before writing, so nothing has to be
+    read back from the worksheet. Lengths match str() of the value openpyxl stores.
+    """
+    widths: List[float] = []
+    for idx, col in enumerate(df.columns):
+        s = df.iloc[:, idx]
+        max_len = len(str(col))
+        present = s[s.notna()]
+        if not present.empty:
+            if pd.api.types.is_datetime64_any_dtype(present.dtype):
+                # str(datetime) is 19 chars, 26 with microseconds
+                has_micro = (present.dt.microsecond != 0).any() or (present.dt.nanosecond != 0).any()
+                max_len = max(max_len, 26 if has_micro else 19)
+            else:
+                max_len = max(max_len, int(present.astype(str).str.len().max()))
+        widths.append(min(max_len + 2, MAX_COLUMN_WIDTH))
+    return widths
+
+
+def _iter_rows(ws, df: pd.DataFrame) -> Iterator[list]:
+    """Yield rows of Python values for ws.append; missing values become empty cells."""
+    columns = []
+    for idx in range(df.shape[1]):
+        s = df.iloc[:, idx]
+        values = s.astype(object).where(s.notna(), None).tolist()
+        if pd.api.types.is_datetime64_any_dtype(s.dtype):
+            values = [_datetime_cell(ws, v) if v is not None else None for v in values]
+        columns.append(values)
+    return (list(row) for row in zip(*columns))
+
+
+def _datetime_cell(ws, value) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value.to_pydatetime() if isinstance(value, pd.Timestamp) else value)
+    cell.number_format = DATETIME_FORMAT
+    return cell
+
+
+def _write_sheet(wb: Workbook, df: pd.DataFrame, sheet_name: str) -> None:
+    """Append df to a new write-only worksheet; widths must be set before any row is written."""
+    ws = wb.create_sheet(title=sheet_name)
+    for idx, width in enumerate(_column_widths(df), 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    header = []
+    for col in df.columns:
+        cell = WriteOnlyCell(ws, value=str(col))
+        cell.font = _HEADER_FONT
+        cell.border = _HEADER_BORDER
+        cell.alignment = _HEADER_ALIGNMENT
+        header.append(cell)
+    ws.append(header)
+    for row in _iter_rows(ws, df):
+        ws.append(row)
+
+
+def _check_format(output_format: str) -> str:
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format} (expected one of {', '.join(OUTPUT_FORMATS)})")
+    return OUTPUT_FORMATS[output_format]
+
+
+def output_file_path(input_path: str, kind: str, output_format: str = "xlsx", ts: Optional[str] = None) -> str:
+    """Sidecar path next to the input: <base>_<kind>_<timestamp><ext>."""
+    ext = _check_format(output_format)
+    base_dir = os.path.dirname(os.path.abspath(input_path))
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    ts = ts or datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(base_dir, f"{base_name}_{kind}_{ts}{ext}")
+
+
+def _write_table(df: pd.DataFrame, path: str, output_format: str) -> None:
+    if output_format == "csv":
+        df.to_csv(path, index=False, compression="gzip")
+    elif output_format == "parquet":
+        df.to_parquet(path, index=False)
+    elif output_format == "feather":
+        # Feather requires a default RangeIndex
+        df.reset_index(drop=True).to_feather(path)
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+
+def write_output(df: pd.DataFrame, input_path: str, output_format: str = "xlsx", output_path: Optional[str] = None) -> str:
+    """Write one result frame as XLSX, gzip CSV, Parquet or Feather (the last two need pyarrow)."""
+    _check_format(output_format)
+    if output_format == "xlsx":
+        return write_xlsx(df, input_path, output_path=output_path)
+    final_path = output_path or output_file_path(input_path, "filtered", output_format)
+    _write_table(df, final_path, output_format)
+    return final_path
 
 
 def write_xlsx(df: pd.DataFrame, input_path: str, output_path: Optional[str] = None) -> str:
@@ -28,18 +126,28 @@ def write_xlsx(df: pd.DataFrame, input_path: str, output_path: Optional[str] = N
     out_name = f"{base_name}_filtered_{ts}.xlsx"
     final_path = output_path or os.path.join(base_dir, out_name)
 
-    with pd.ExcelWriter(final_path, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Filtered")
-        _auto_size_columns(writer, "Filtered")
+    # Write-only workbook streams rows to disk instead of holding every cell object in memory
+    wb = Workbook(write_only=True)
+    _write_sheet(wb, df, "Filtered")
+    wb.save(final_path)
     return final_path
 
 
 def write_multi_sheet(dfs: dict, input_path: str, output_path: str) -> str:
     """Write multiple dataframes to one workbook; keys are sheet names."""
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        for sheet_name, df in dfs.items():
-            df.to_excel(writer, index=False, sheet_name=sheet_name[:31] or "Sheet1")
-            _auto_size_columns(writer, sheet_name[:31] or "Sheet1")
+    wb = Workbook(write_only=True)
+    for sheet_name, df in dfs.items():
+        _write_sheet(wb, df, sheet_name[:31] or "Sheet1")
+    wb.save(output_path)
     return output_path
 
 
+def write_audit_sets(dfs: dict, input_path: str, output_path: str, output_format: str = "xlsx") -> str:
+    """Write per-step audit frames: one workbook for XLSX, else a directory with one file per set."""
+    ext = _check_format(output_format)
+    if output_format == "xlsx":
+        return write_multi_sheet(dfs, input_path, output_path)
+    os.makedirs(output_path, exist_ok=True)
+    for name, df in dfs.items():
+        _write_table(df, os.path.join(output_path, f"{name}{ext}"), output_format)
+    return output_path